@@ -0,0 +1,160 @@
+"""
+Shared in-memory cache for the CSV datasets served by the API
+Each file is loaded once (from the columnar binary cache, so the CSV text is
+only parsed when it changes) and reused until its mtime or size changes
+"""
+
+import os
+import threading
+
+from columnar_cache import read_dataset
+from metrics import DATASET_LOAD_SECONDS
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'DATA SETS')
+
+SUPPLY_CHAIN_MASTER = 'supply_chain_master.csv'
+
+# Explicit dtypes so pandas skips type inference on every (re)load
+DATASET_DTYPES = {
+    SUPPLY_CHAIN_MASTER: {
+        'price_per_unit': 'float64',
+        'quality_score': 'float64',
+        'delivery_time_days': 'int32',
+        'on_time_delivery_rate': 'float64',
+        'defect_rate': 'float64',
+        'return_rate': 'float64',
+        'delivery_mode': 'category',
+        'lead_time_variance': 'float64',
+        'forecast_accuracy': 'float64',
+        'seasonality_index': 'float64',
+        'demand_volatility_index': 'float64',
+        'order_frequency_monthly': 'int32',
+        'avg_order_volume': 'float64',
+        'payment_term_days': 'int32',
+        'offer_validity_days': 'int32',
+        'procurement_action_code': 'int32',
+        'delivery_term_code': 'int32',
+        'items_requested': 'int32',
+        'items_offered': 'int32',
+        'temporal_month': 'int32',
+        'supplier_reliability_score': 'float64',
+        'selected_supplier_flag': 'int32'
+    }
+}
+
+
+class DatasetCache:
+    """Loads each dataset once and shares the frame across endpoints.
+
+    A cached frame is reused while the file's (mtime, size) signature is
+    unchanged. Concurrent requests for a stale or missing entry wait on a
+    per-file lock so only one of them reloads it. Frames are shared (and
+    their numeric columns memory-mapped), so callers must treat them as
+    read-only.
+    """
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self._entries = {}  # name -> (signature, frame)
+        self._derived = {}  # (name, key) -> (signature, value)
+        self._load_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.coalesced = 0
+
+    def path(self, name):
+        """Absolute path of a dataset inside DATA SETS/"""
+        return os.path.join(self.data_dir, name)
+
+    def _signature(self, path):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load_lock(self, name):
+        with self._lock:
+            if name not in self._load_locks:
+                self._load_locks[name] = threading.Lock()
+            return self._load_locks[name]
+
+    def get(self, name):
+        """Return the parsed frame for a dataset, reloading it if the file changed"""
+        path = self.path(name)
+        signature = self._signature(path)
+
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == signature:
+            with self._lock:
+                self.hits += 1
+            return entry[1]
+
+        with self._load_lock(name):
+            # Another request may have finished the reload while we waited
+            signature = self._signature(path)
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == signature:
+                with self._lock:
+                    self.coalesced += 1
+                return entry[1]
+
+            with DATASET_LOAD_SECONDS.time(dataset=name):
+                read_options = {'dtype': DATASET_DTYPES[name]} if name in DATASET_DTYPES else {}
+                frame = read_dataset(path, **read_options)
+            self._entries[name] = (signature, frame)
+
+            with self._lock:
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self.reloads += 1
+            return frame
+
+    def get_derived(self, name, key, builder):
+        """Return builder(frame) for a dataset, rebuilt only when the dataset reloads"""
+        frame = self.get(name)
+        signature = self.version(name)
+
+        entry = self._derived.get((name, key))
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        with self._load_lock((name, key)):
+            entry = self._derived.get((name, key))
+            if entry is not None and entry[0] == signature:
+                return entry[1]
+            value = builder(frame)
+            self._derived[(name, key)] = (signature, value)
+            return value
+
+    def version(self, name):
+        """Signature of the cached copy of a dataset, or None if not loaded"""
+        entry = self._entries.get(name)
+        return entry[0] if entry is not None else None
+
+    def invalidate(self, name=None):
+        """Drop one cached dataset, or all of them"""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+                self._derived.clear()
+            else:
+                self._entries.pop(name, None)
+                for key in [key for key in self._derived if key[0] == name]:
+                    del self._derived[key]
+
+    def stats(self):
+        """Hit/miss/reload counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.coalesced + self.misses + self.reloads
+            return {
+                'hits': self.hits,
+                'coalesced': self.coalesced,
+                'misses': self.misses,
+                'reloads': self.reloads,
+                'hit_ratio': round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+                'datasets': sorted(self._entries)
+            }
+
+
+dataset_cache = DatasetCache()
@@ -0,0 +1,182 @@
+"""
+Executor layer for CPU-heavy endpoint work
+Keeps pandas/NumPy/XGBoost work and pure-Python solvers off the asyncio
+event loop, with per-endpoint concurrency limits and queue-depth metrics
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+CPU_COUNT = os.cpu_count() or 1
+
+# Threads suit GIL-releasing NumPy/pandas/XGBoost calls; processes suit pure-Python work
+CPU_THREAD_WORKERS = int(os.environ.get("CPU_THREAD_WORKERS", str(min(8, CPU_COUNT + 2))))
+CPU_PROCESS_WORKERS = int(os.environ.get("CPU_PROCESS_WORKERS", str(CPU_COUNT)))
+
+# Concurrent executions allowed per endpoint, e.g. ENDPOINT_LIMITS="inventory:8,optimize-route:2"
+ENDPOINT_CONCURRENCY = int(os.environ.get("ENDPOINT_CONCURRENCY", "4"))
+
+
+def _parse_limits(spec):
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition(":")
+        limits[name.strip()] = int(value)
+    return limits
+
+
+# Parallel route search fans one request out over the whole process pool
+ENDPOINT_LIMITS = {"route-search": CPU_PROCESS_WORKERS}
+ENDPOINT_LIMITS.update(_parse_limits(os.environ.get("ENDPOINT_LIMITS", "")))
+
+THREAD = "thread"
+PROCESS = "process"
+
+
+class _EndpointGate:
+    def __init__(self, limit):
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+
+
+class CPUExecutor:
+    """Runs blocking work in a bounded thread or process pool.
+
+    Each endpoint gets its own semaphore, so a burst of heavy requests on one
+    route queues behind its own limit instead of starving the others.
+    """
+
+    def __init__(self, thread_workers=CPU_THREAD_WORKERS, process_workers=CPU_PROCESS_WORKERS,
+                 default_limit=ENDPOINT_CONCURRENCY, limits=None):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self.default_limit = default_limit
+        self.limits = dict(ENDPOINT_LIMITS if limits is None else limits)
+        self._gates = {}
+        self._threads = None
+        self._processes = None
+        self._lock = threading.Lock()
+        self._pool_queued = {THREAD: 0, PROCESS: 0}
+        self._pool_running = {THREAD: 0, PROCESS: 0}
+
+    def _gate(self, endpoint):
+        gate = self._gates.get(endpoint)
+        if gate is None:
+            gate = _EndpointGate(self.limits.get(endpoint, self.default_limit))
+            self._gates[endpoint] = gate
+        return gate
+
+    def _pool(self, kind):
+        with self._lock:
+            if kind == PROCESS:
+                if self._processes is None:
+                    self._processes = ProcessPoolExecutor(max_workers=self.process_workers)
+                return self._processes
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.thread_workers,
+                                                   thread_name_prefix="cpu-work")
+            return self._threads
+
+    def _track_start(self, kind):
+        with self._lock:
+            self._pool_queued[kind] -= 1
+            self._pool_running[kind] += 1
+
+    def _track_end(self, kind):
+        with self._lock:
+            self._pool_running[kind] -= 1
+
+    def _run_tracked(self, fn):
+        self._track_start(THREAD)
+        try:
+            return fn()
+        finally:
+            self._track_end(THREAD)
+
+    def _untrack_cancelled(self, future):
+        # A task cancelled before a worker picked it up never reaches _run_tracked
+        if future.cancelled():
+            with self._lock:
+                self._pool_queued[THREAD] -= 1
+
+    def _submit_thread(self, call):
+        try:
+            future = self._pool(THREAD).submit(self._run_tracked, call)
+        except BaseException:
+            with self._lock:
+                self._pool_queued[THREAD] -= 1
+            raise
+        future.add_done_callback(self._untrack_cancelled)
+        # Cancelling the awaiting request cancels the task if it has not started
+        return asyncio.wrap_future(future)
+
+    async def run(self, endpoint, fn, *args, kind=THREAD, **kwargs):
+        """Run fn(*args, **kwargs) in the pool, within the endpoint's concurrency limit
+
+        Work sent to the process pool must be a picklable module-level function.
+        """
+        gate = self._gate(endpoint)
+        call = functools.partial(fn, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+
+        gate.waiting += 1
+        try:
+            await gate.semaphore.acquire()
+        finally:
+            gate.waiting -= 1
+
+        gate.running += 1
+        with self._lock:
+            self._pool_queued[kind] += 1
+        try:
+            if kind == PROCESS:
+                # Process workers can't report when they start, so queued
+                # covers the whole time the task is in the pool
+                try:
+                    result = await loop.run_in_executor(self._pool(PROCESS), call)
+                finally:
+                    with self._lock:
+                        self._pool_queued[PROCESS] -= 1
+            else:
+                result = await self._submit_thread(call)
+        except BaseException:
+            gate.failed += 1
+            raise
+        finally:
+            gate.running -= 1
+            gate.semaphore.release()
+        gate.completed += 1
+        return result
+
+    def stats(self):
+        """Queue depth and utilization per pool and per endpoint"""
+        with self._lock:
+            pools = {
+                THREAD: {'workers': self.thread_workers, 'queued': self._pool_queued[THREAD],
+                         'running': self._pool_running[THREAD]},
+                PROCESS: {'workers': self.process_workers, 'queued': self._pool_queued[PROCESS]}
+            }
+        endpoints = {
+            name: {'limit': gate.limit, 'waiting': gate.waiting, 'running': gate.running,
+                   'completed': gate.completed, 'failed': gate.failed}
+            for name, gate in list(self._gates.items())
+        }
+        return {'pools': pools, 'endpoints': endpoints}
+
+    def shutdown(self):
+        with self._lock:
+            for pool in (self._threads, self._processes):
+                if pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+            self._processes = None
+
+
+cpu_executor = CPUExecutor()
@@ -0,0 +1,147 @@
+"""
+Result cache for the forecast endpoints
+LRU + TTL, keyed by model and model artifact version, with single-flight
+deduplication so concurrent identical requests compute once
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+FORECAST_CACHE_SIZE = int(os.environ.get("FORECAST_CACHE_SIZE", "1024"))
+FORECAST_CACHE_TTL = float(os.environ.get("FORECAST_CACHE_TTL", "300"))
+
+
+class ForecastCache:
+    """Size-bounded LRU cache of forecast responses with a TTL.
+
+    Keys are (model name, model version, request fields...). When a model is
+    seen with a new version, entries cached for its older versions are
+    dropped, so loading a new artifact invalidates them automatically.
+    """
+
+    def __init__(self, max_entries=FORECAST_CACHE_SIZE, ttl_seconds=FORECAST_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._model_versions = {}
+        self._inflight = {}  # key -> asyncio.Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.uncached = 0
+
+    def _check_version(self, model_name, version):
+        """Purge entries of an older version of this model"""
+        if self._model_versions.get(model_name, version) != version:
+            stale = [key for key in self._entries if key[0] == model_name and key[1] != version]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        self._model_versions[model_name] = version
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, model_name, version, request_key, compute, cacheable=None):
+        """Return the cached result for this request, computing it at most once
+
+        compute is an async callable. Concurrent callers with the same key
+        await the first caller's result instead of recomputing it. Results
+        for which cacheable(result) is false are shared with those callers
+        but not stored.
+        """
+        key = (model_name, version) + tuple(request_key)
+
+        with self._lock:
+            self._check_version(model_name, version)
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[1]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return await asyncio.shield(future)
+
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.cancel()
+            raise
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            # Mark the exception retrieved in case no one else was waiting
+            future.exception()
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if self._model_versions.get(model_name) == version and (cacheable is None or cacheable(value)):
+                self._store(key, value)
+            else:
+                self.uncached += 1
+        future.set_result(value)
+        return value
+
+    def invalidate(self, model_name=None):
+        """Drop cached results for one model, or for all models"""
+        with self._lock:
+            stale = [key for key in self._entries if model_name is None or key[0] == model_name]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def stats(self):
+        """Hit-rate metrics for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.coalesced + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'coalesced': self.coalesced,
+                'misses': self.misses,
+                'hit_ratio': round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'uncached': self.uncached
+            }
+
+
+forecast_cache = ForecastCache()
@@ -0,0 +1,84 @@
+"""
+Inventory materialization for /api/inventory
+Builds the inventory table column-wise from supply_chain_master.csv
+"""
+
+import numpy as np
+import pandas as pd
+
+PRODUCT_TYPES = ["Widget", "Gadget", "Tool", "Component", "Part", "Device", "Module", "Unit"]
+PRODUCT_VARIANTS = ["Pro", "Plus", "Master", "Elite", "Premium", "Standard", "Advanced", "Basic"]
+
+# Every "<type> <variant>" combination, indexed by type * len(variants) + variant
+PRODUCT_NAMES = np.array(
+    [f"{product_type} {variant}" for product_type in PRODUCT_TYPES for variant in PRODUCT_VARIANTS],
+    dtype=object
+)
+
+WAREHOUSE_BY_DELIVERY_MODE = {'Air': "WH-01", 'Sea': "WH-02"}
+DEFAULT_WAREHOUSE = "WH-03"
+
+INVENTORY_COLUMNS = [
+    'id', 'sku', 'product', 'quantity', 'stock', 'status', 'warehouse',
+    'price', 'quality_score', 'delivery_time_days'
+]
+
+
+def product_names_for(sku_numbers):
+    """Stable product name per SKU number (same SKU always gets the same name)"""
+    # Knuth multiplicative hash spreads consecutive SKUs across the name table
+    hashed = (np.asarray(sku_numbers, dtype=np.uint64) * np.uint64(2654435761)) & np.uint64(0xFFFFFFFF)
+    type_idx = hashed % np.uint64(len(PRODUCT_TYPES))
+    variant_idx = (hashed >> np.uint64(16)) % np.uint64(len(PRODUCT_VARIANTS))
+    return PRODUCT_NAMES[(type_idx * np.uint64(len(PRODUCT_VARIANTS)) + variant_idx).astype(np.intp)]
+
+
+def _numeric_column(df, column, default, dtype):
+    if column in df.columns:
+        return df[column].to_numpy(dtype=dtype)
+    return np.full(len(df), default, dtype=dtype)
+
+
+def build_inventory_frame(df):
+    """Derive the inventory table from the supplier master with NumPy column ops"""
+    n = len(df)
+    positions = np.arange(n, dtype=np.int64)
+    sku_numbers = positions + 1000
+
+    # Stock quantity comes from items_offered, falling back to avg_order_volume
+    if 'items_offered' in df.columns:
+        quantity = df['items_offered'].to_numpy().astype(np.int64)
+    else:
+        quantity = _numeric_column(df, 'avg_order_volume', 100, np.float64).astype(np.int64)
+
+    status = np.select(
+        [quantity < 50, quantity < 200],
+        ["critical", "low"],
+        default="healthy"
+    ).astype(object)
+
+    if 'delivery_mode' in df.columns:
+        delivery_mode = df['delivery_mode'].astype(object).to_numpy()
+        warehouse = np.full(n, DEFAULT_WAREHOUSE, dtype=object)
+        for mode, warehouse_id in WAREHOUSE_BY_DELIVERY_MODE.items():
+            warehouse[delivery_mode == mode] = warehouse_id
+    else:
+        warehouse = np.full(n, DEFAULT_WAREHOUSE, dtype=object)
+
+    return pd.DataFrame({
+        'id': positions + 1,
+        'sku': ("SKU-" + pd.Series(sku_numbers).astype(str).str.zfill(4)).to_numpy(dtype=object),
+        'product': product_names_for(sku_numbers),
+        'quantity': quantity,
+        'stock': quantity,  # Alias for compatibility
+        'status': status,
+        'warehouse': warehouse,
+        'price': np.round(_numeric_column(df, 'price_per_unit', 0, np.float64), 2),
+        'quality_score': np.round(_numeric_column(df, 'quality_score', 0, np.float64), 2),
+        'delivery_time_days': _numeric_column(df, 'delivery_time_days', 0, np.float64).astype(np.int64)
+    }, columns=INVENTORY_COLUMNS)
+
+
+def inventory_records(frame):
+    """Convert an inventory frame into JSON-ready dicts"""
+    return frame.to_dict('records')
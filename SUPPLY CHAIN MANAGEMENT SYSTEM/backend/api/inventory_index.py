@@ -0,0 +1,248 @@
+"""
+Prebuilt indexes over the inventory table for /api/inventory
+Answers warehouse/status/search filters, sorting and keyset pagination
+without scanning or re-sorting the whole catalog per request
+"""
+
+import base64
+import json
+import threading
+import numpy as np
+import pandas as pd
+
+SORT_KEYS = [
+    'id', 'sku', 'product', 'quantity', 'stock', 'status', 'warehouse',
+    'price', 'quality_score', 'delivery_time_days'
+]
+
+# Rows examined per step when walking a presorted order under a filter
+SCAN_CHUNK = 4096
+
+# Search results larger than this share of the catalog are paged by scanning
+# the presorted order under a mask instead of sorting the matches
+BROAD_SEARCH_FRACTION = 1 / 64
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded or belongs to another sort"""
+
+
+def encode_cursor(sort_by, value, row_id):
+    payload = json.dumps([sort_by, value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_by, value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return sort_by, value, int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+class InventoryIndex:
+    """Hash indexes on warehouse/status, a prefix index on SKU/product name
+    and one presorted order per sort key (built lazily, then reused).
+
+    Orders break ties on id, so (sort value, id) is a unique keyset cursor.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.size = len(frame)
+        self.ids = frame['id'].to_numpy()
+
+        self._hash = {
+            'warehouse': self._build_hash_index(frame['warehouse'].to_numpy()),
+            'status': self._build_hash_index(frame['status'].to_numpy())
+        }
+        self._build_prefix_index(frame['sku'].to_numpy(), frame['product'].to_numpy())
+
+        self._masks = {}  # (warehouse, status) -> (mask, count)
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    def _build_hash_index(self, values):
+        """value -> ascending row positions"""
+        codes, uniques = _factorize(values)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        return {
+            uniques[i]: order[bounds[i]:bounds[i + 1]]
+            for i in range(len(uniques))
+        }
+
+    def _build_prefix_index(self, skus, products):
+        """Sorted lowercase keys (SKU, SKU number, product name and each of its words)"""
+        positions = np.arange(self.size)
+        sku_keys = pd.Series(skus, dtype=object).str.lower()
+
+        keys = [
+            sku_keys.to_numpy(dtype=str),
+            sku_keys.str.replace('sku-', '', regex=False).to_numpy(dtype=str)
+        ]
+        rows = [positions, positions]
+
+        # Product names are a handful of distinct strings, so work on the uniques only
+        codes, names = pd.factorize(products)
+        for i, name in enumerate(names):
+            matching = positions[codes == i]
+            name = str(name).lower()
+            words = name.split()
+            for key in [name] + (words if len(words) > 1 else []):
+                keys.append(np.full(len(matching), key))
+                rows.append(matching)
+
+        keys = np.concatenate(keys)
+        rows = np.concatenate(rows)
+        order = np.argsort(keys, kind='stable')
+        self._prefix_keys = keys[order]
+        self._prefix_rows = rows[order]
+
+    def _mask(self, warehouse, status):
+        """Boolean row mask and match count for the hash-indexed filters (cached per combination)
+
+        Filter values that match no row give (None, 0) without building or
+        caching a mask, so the cache is bounded by the values in the table.
+        """
+        if warehouse is None and status is None:
+            return None, self.size
+        for column, value in (('warehouse', warehouse), ('status', status)):
+            if value is not None and value not in self._hash[column]:
+                return None, 0
+        key = (warehouse, status)
+        entry = self._masks.get(key)
+        if entry is None:
+            mask = np.ones(self.size, dtype=bool)
+            for column, value in (('warehouse', warehouse), ('status', status)):
+                if value is not None:
+                    column_mask = np.zeros(self.size, dtype=bool)
+                    column_mask[self._hash[column][value]] = True
+                    mask &= column_mask
+            entry = (mask, int(np.count_nonzero(mask)))
+            with self._lock:
+                self._masks[key] = entry
+        return entry
+
+    def _prefix_matches(self, search):
+        """Row positions with a key starting with the search text (may repeat)"""
+        prefix = search.strip().lower()
+        lo = np.searchsorted(self._prefix_keys, prefix, side='left')
+        hi = np.searchsorted(self._prefix_keys, prefix + '\uffff', side='left')
+        return self._prefix_rows[lo:hi]
+
+    def _order(self, sort_by):
+        """(ascending order, rank of each row, sorted values, sorted ids) for a sort key"""
+        entry = self._orders.get(sort_by)
+        if entry is None:
+            values = self.frame[sort_by].to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+            order = np.lexsort((self.ids, values))
+            rank = np.empty(self.size, dtype=np.intp)
+            rank[order] = np.arange(self.size)
+            entry = (order, rank, values[order], self.ids[order])
+            with self._lock:
+                self._orders[sort_by] = entry
+        return entry
+
+    def _cursor_bounds(self, cursor, sort_by, sorted_values, sorted_ids):
+        """Ranks strictly before / strictly after the cursor row"""
+        cursor_sort, value, row_id = decode_cursor(cursor)
+        if cursor_sort != sort_by:
+            raise InvalidCursor(f"Cursor was issued for sort '{cursor_sort}', not '{sort_by}'")
+        try:
+            value = np.asarray(value, dtype=sorted_values.dtype)
+        except (ValueError, TypeError) as e:
+            raise InvalidCursor(f"Invalid cursor value: {value!r}") from e
+        lo = np.searchsorted(sorted_values, value, side='left')
+        hi = np.searchsorted(sorted_values, value, side='right')
+        ties = sorted_ids[lo:hi]
+        before = lo + np.searchsorted(ties, row_id, side='left')
+        after = lo + np.searchsorted(ties, row_id, side='right')
+        return before, after
+
+    def query(self, warehouse=None, status=None, search=None, sort_by='id',
+              descending=False, cursor=None, limit=None):
+        """Return (row positions for this page, total matches, next cursor or None)"""
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{sort_by}'. Use one of: {', '.join(SORT_KEYS)}")
+
+        order, rank, sorted_values, sorted_ids = self._order(sort_by)
+        mask, mask_count = self._mask(warehouse, status)
+        if mask_count == 0:
+            if cursor:
+                self._cursor_bounds(cursor, sort_by, sorted_values, sorted_ids)  # still reject bad cursors
+            return np.empty(0, dtype=np.intp), 0, None
+
+        # Half-open rank window still to be paged through
+        start, end = 0, self.size
+        if cursor:
+            before, after = self._cursor_bounds(cursor, sort_by, sorted_values, sorted_ids)
+            if descending:
+                end = before
+            else:
+                start = after
+
+        want = self.size if limit is None else limit + 1
+
+        if search:
+            rows = self._prefix_matches(search)
+            if len(rows) > self.size * BROAD_SEARCH_FRACTION:
+                # Broad prefix: walk the presorted order under a mask instead of sorting matches
+                search_mask = np.zeros(self.size, dtype=bool)
+                search_mask[rows] = True
+                if mask is not None:
+                    search_mask &= mask
+                total = int(np.count_nonzero(search_mask))
+                page = self._scan(order, search_mask, start, end, want, descending)
+            else:
+                candidates = np.unique(rows)
+                if mask is not None:
+                    candidates = candidates[mask[candidates]]
+                total = len(candidates)
+                ranks = rank[candidates]
+                ranks = np.sort(ranks[(ranks >= start) & (ranks < end)])
+                if descending:
+                    ranks = ranks[::-1]
+                page = order[ranks[:want]]
+        else:
+            total = mask_count
+            page = self._scan(order, mask, start, end, want, descending)
+
+        next_cursor = None
+        if limit is not None and len(page) > limit:
+            page = page[:limit]
+            last = page[-1]
+            last_value = sorted_values[rank[last]]
+            next_cursor = encode_cursor(sort_by, last_value.item(), int(self.ids[last]))
+
+        return page, total, next_cursor
+
+    def _scan(self, order, mask, start, end, want, descending):
+        """Walk the presorted order from the cursor, keeping rows that pass the mask"""
+        if mask is None:
+            if descending:
+                return order[max(start, end - want):end][::-1]
+            return order[start:min(end, start + want)]
+
+        found = []
+        remaining = want
+        chunk = max(SCAN_CHUNK, want)
+        while remaining > 0 and start < end:
+            if descending:
+                block = order[max(start, end - chunk):end][::-1]
+                end -= len(block)
+            else:
+                block = order[start:min(end, start + chunk)]
+                start += len(block)
+            block = block[mask[block]][:remaining]
+            found.append(block)
+            remaining -= len(block)
+        return np.concatenate(found) if found else np.empty(0, dtype=np.intp)
+
+
+def _factorize(values):
+    uniques, codes = np.unique(values.astype(str), return_inverse=True)
+    return codes, [str(u) for u in uniques]
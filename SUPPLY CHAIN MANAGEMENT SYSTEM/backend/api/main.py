@@ -3,8 +3,9 @@ FastAPI Backend for AI Supply Chain Management System
 Integrates all ML models and provides REST API endpoints
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, JSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from enum import Enum
@@ -13,9 +14,28 @@ import numpy as np
 from datetime import datetime, timedelta
 import sys
 import os
+import re
+import asyncio
+import time
 
 # Add models directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'models'))
+sys.path.append(os.path.dirname(__file__))
+
+from dataset_cache import dataset_cache, SUPPLY_CHAIN_MASTER
+from inventory import build_inventory_frame, inventory_records
+from inventory_index import InventoryIndex, InvalidCursor, SORT_KEYS
+from orders import build_orders_frame
+from streaming import stream_format, iter_frame_records, streaming_response
+from forecast_cache import forecast_cache
+from model_registry import model_registry, MODEL_LOAD_MODE, MODEL_RELOAD_INTERVAL
+from executors import cpu_executor, PROCESS
+from route_solver import prepare_instance, instance_stats, multi_start, routes_result, MULTI_START_MIN_NODES
+from shipment_scheduler import schedule_shipments, SCHEDULE_SPEED_KMH
+from micro_batcher import prediction_batchers
+from route_jobs import route_jobs, JobQueueFull, DONE
+from supplier_ranking import supplier_rankings, SUPPLIER_TOP_K
+from metrics import metrics_registry, CONTENT_TYPE, HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_FLIGHT
 
 app = FastAPI(title="AI Supply Chain Management API", version="1.0.0")
 
@@ -26,15 +46,57 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
 
-# Load ML Models (loaded on startup)
-demand_model = None
-supplier_model = None
-route_model = None
-retail_demand_model = None
-supplychain_demand_model = None
-walmart_sales_model = None
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Per-route latency, status counts and in-flight requests for /metrics"""
+    method = request.method
+    HTTP_IN_FLIGHT.inc(method=method)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template (not raw path) to keep label cardinality bounded
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        HTTP_LATENCY.observe(time.perf_counter() - start, method=method, route=path)
+        HTTP_REQUESTS.inc(method=method, route=path, status=status)
+        HTTP_IN_FLIGHT.dec(method=method)
+
+def _collect_service_metrics():
+    """Scrape-time view of the caches, executor queues and model states"""
+    datasets = dataset_cache.stats()
+    forecasts = forecast_cache.stats()
+    executor = cpu_executor.stats()
+    models = model_registry.status()
+    
+    yield ("scm_dataset_cache_lookups_total", "counter", "Dataset cache lookups by result",
+           [({"result": result}, datasets[result]) for result in ("hits", "coalesced", "misses", "reloads")])
+    yield ("scm_dataset_cache_hit_ratio", "gauge", "Share of dataset lookups served from memory",
+           [({}, datasets["hit_ratio"])])
+    yield ("scm_forecast_cache_lookups_total", "counter", "Forecast cache lookups by result",
+           [({"result": result}, forecasts[result]) for result in ("hits", "coalesced", "misses")])
+    yield ("scm_forecast_cache_hit_ratio", "gauge", "Share of forecasts served from the cache",
+           [({}, forecasts["hit_ratio"])])
+    yield ("scm_forecast_cache_entries", "gauge", "Forecasts currently cached",
+           [({}, forecasts["entries"])])
+    yield ("scm_executor_queue_depth", "gauge", "Tasks submitted to a worker pool but not started",
+           [({"pool": pool}, info["queued"]) for pool, info in executor["pools"].items()])
+    yield ("scm_executor_endpoint_waiting", "gauge", "Calls waiting for an endpoint concurrency slot",
+           [({"endpoint": name}, info["waiting"]) for name, info in executor["endpoints"].items()])
+    yield ("scm_executor_endpoint_running", "gauge", "Calls running on the executor per endpoint",
+           [({"endpoint": name}, info["running"]) for name, info in executor["endpoints"].items()])
+    yield ("scm_model_ready", "gauge", "1 if the model artifact is loaded",
+           [({"model": name}, int(info["ready"])) for name, info in models.items()])
+    yield ("scm_model_load_seconds", "gauge", "Time taken to load each model",
+           [({"model": name}, info["load_seconds"]) for name, info in models.items()])
+
+metrics_registry.add_collector(_collect_service_metrics)
 
 # Enum for Supply Chain Stage Types
 class StageType(str, Enum):
@@ -60,12 +122,23 @@ class SupplierScoreRequest(BaseModel):
 
 class RouteOptimizationRequest(BaseModel):
     orders: List[Dict[str, Any]]
-    vehicle_capacity: Optional[int] = 500
+    vehicle_capacity: Optional[float] = 500
+    mode: Optional[str] = "route"  # "route" or "schedule" (time windows, weight + area)
+    area_capacity: Optional[float] = None
+    speed_kmh: Optional[float] = None
+
+# Inventory rows per page when paging with a cursor but no limit, and the most one page may hold
+INVENTORY_PAGE_SIZE = int(os.environ.get("INVENTORY_PAGE_SIZE", "100"))
+INVENTORY_MAX_PAGE_SIZE = int(os.environ.get("INVENTORY_MAX_PAGE_SIZE", "1000"))
 
 class InventoryFilter(BaseModel):
     warehouse_id: Optional[str] = None
     status: Optional[str] = None
     search: Optional[str] = None
+    sort_by: str = "id"
+    order: str = "asc"
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
 
 # Supply Chain Journey Models
 class JourneyStage(BaseModel):
@@ -86,62 +159,46 @@ class ProductJourneyResponse(BaseModel):
     stages: List[JourneyStage]
     search: Optional[str] = None
 
+# Background tasks started at startup, kept referenced so they are not garbage collected
+_background_tasks = []
+
 @app.on_event("startup")
 async def load_models():
-    """Load ML models on startup"""
-    global demand_model, supplier_model, route_model, retail_demand_model, supplychain_demand_model, walmart_sales_model
+    """Load ML models on startup (in parallel, in the background) unless loading lazily"""
+    loop = asyncio.get_running_loop()
+    if MODEL_RELOAD_INTERVAL > 0:
+        _background_tasks.append(loop.create_task(_watch_model_artifacts()))
+    if MODEL_LOAD_MODE == "lazy":
+        print("ML models will be loaded on first use")
+        return
     
+    print("Loading ML models...")
+    model_registry.load_all()
+    _background_tasks.append(loop.create_task(_warm_supplier_ranking()))
+
+async def _watch_model_artifacts():
+    """Swap in newly saved model versions without restarting the API"""
+    while True:
+        await asyncio.sleep(MODEL_RELOAD_INTERVAL)
+        try:
+            await cpu_executor.run("model-reload", model_registry.reload_changed)
+        except Exception as e:
+            print(f"Warning: model reload check failed: {e}")
+
+async def _warm_supplier_ranking():
+    """Score the supplier master once the supplier model is loaded"""
     try:
-        from demand_forecast import DemandForecastModel
-        from supplier_scoring import SupplierScoringModel
-        from route_optimization import RouteOptimizationModel
-        from retail_demand_prediction import RetailDemandModel
-        from supplychain_demand_forecast import SupplyChainDemandModel
-        from walmart_sales_forecast import WalmartSalesModel
-        
-        print("Loading ML models...")
-        
-        # Load demand forecasting model
-        demand_model = DemandForecastModel()
-        if os.path.exists("../models/demand_forecast_model.pkl"):
-            demand_model.load("../models/demand_forecast_model.pkl")
-            print("✅ Demand forecasting model loaded")
-        
-        # Load supplier scoring model
-        supplier_model = SupplierScoringModel()
-        if os.path.exists("../models/supplier_scoring_model.pkl"):
-            supplier_model.load("../models/supplier_scoring_model.pkl")
-            print("✅ Supplier scoring model loaded")
-        
-        # Load route optimization model
-        route_model = RouteOptimizationModel()
-        if os.path.exists("../models/route_optimization_model.pkl"):
-            route_model.load("../models/route_optimization_model.pkl")
-            print("✅ Route optimization model loaded")
-        
-        # Load retail demand model
-        retail_demand_model = RetailDemandModel()
-        if os.path.exists("../models/retail_demand_model.pkl"):
-            retail_demand_model.load("../models/retail_demand_model.pkl")
-            print("✅ Retail demand model loaded")
-        
-        # Load supply chain demand model
-        supplychain_demand_model = SupplyChainDemandModel()
-        if os.path.exists("../models/supplychain_demand_model.pkl"):
-            supplychain_demand_model.load("../models/supplychain_demand_model.pkl")
-            print("✅ Supply chain demand model loaded")
-        
-        # Load walmart sales model
-        walmart_sales_model = WalmartSalesModel()
-        if os.path.exists("../models/walmart_sales_model.pkl"):
-            walmart_sales_model.load("../models/walmart_sales_model.pkl")
-            print("✅ Walmart sales model loaded")
-        
-        print("All 6 models loaded successfully!")
-        
+        await cpu_executor.run("supplier-scores", _supplier_ranking)
     except Exception as e:
-        print(f"Warning: Could not load models: {e}")
-        print("API will use fallback mock data")
+        print(f"Warning: could not build supplier ranking: {e}")
+
+@app.on_event("shutdown")
+async def stop_executors():
+    """Cancel background tasks and route jobs and release the CPU worker pools"""
+    for task in _background_tasks:
+        task.cancel()
+    route_jobs.shutdown()
+    cpu_executor.shutdown()
 
 @app.get("/")
 async def root():
@@ -149,13 +206,21 @@ async def root():
     return {
         "message": "AI Supply Chain Management API",
         "status": "running",
-        "models_loaded": {
-            "demand_forecast": demand_model is not None,
-            "supplier_scoring": supplier_model is not None,
-            "route_optimization": route_model is not None
-        }
+        "models_loaded": {name: info["ready"] for name, info in model_registry.status().items()},
+        "models": model_registry.status(),
+        "dataset_cache": dataset_cache.stats(),
+        "forecast_cache": forecast_cache.stats(),
+        "executor": cpu_executor.stats(),
+        "batchers": prediction_batchers.stats(),
+        "route_jobs": route_jobs.stats(),
+        "supplier_ranking": supplier_rankings.stats()
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics_registry.render(), media_type=CONTENT_TYPE)
+
 @app.get("/api/dashboard-metrics")
 async def get_dashboard_metrics():
     """Get dashboard KPIs and metrics"""
@@ -185,191 +250,252 @@ async def get_dashboard_metrics():
         ]
     }
 
+def _horizon_dates(horizon_days):
+    """Dates covered by a forecast, starting today"""
+    return pd.date_range(pd.Timestamp(datetime.now()).normalize(), periods=max(horizon_days, 0), freq="D")
+
+def _trailing_number(identifier):
+    """Numeric part of an identifier like 'WH-01' or 'SKU-1001', if any"""
+    digits = re.search(r"(\d+)$", identifier or "")
+    return int(digits.group(1)) if digits else None
+
+async def _model_forecast(endpoint, model_name, features):
+    """Forecast for the whole horizon if the model is loaded; None means use the fallback
+    
+    The predict call goes through the model's micro-batcher, so concurrent
+    requests share one vectorized predict.
+    """
+    model = model_registry.get(model_name)
+    if model is None or model.model is None:
+        return None
+    try:
+        X = await cpu_executor.run(endpoint, features, model)
+        predictions = await prediction_batchers.get(model_name, model.model).predict(X)
+        return model.forecast_output(predictions)
+    except Exception as e:
+        print(f"Warning: {type(model).__name__} forecast failed, using fallback: {e}")
+        return None
+
+def _fallback_predictions(base, low, high, horizon):
+    """Mock predictions for the whole horizon when no model is available"""
+    return base + np.random.randint(low, high, size=horizon)
+
+def _forecast_values(result, horizon, fallback, below, above):
+    """(predicted, lower, upper) from the model result, or mock values with fixed bands
+    
+    fallback is (base, low, high) for _fallback_predictions; below/above
+    only ever size the band around those mock values.
+    """
+    if result is not None:
+        return np.asarray(result["predicted"]), np.asarray(result["lower"]), np.asarray(result["upper"])
+    predicted = _fallback_predictions(*fallback, horizon)
+    return predicted, predicted - below, predicted + above
+
+async def _cached_forecast(endpoint, model_name, request, features, build):
+    """Serve a forecast from the result cache, building it once per key
+    
+    Cache misses are built on the CPU executor so the event loop stays free.
+    Responses built from the fallback (model missing or predict failed) are
+    not cached, so the model is tried again on the next request.
+    """
+    request_key = (request.product_id, request.warehouse_id, request.horizon_days,
+                   datetime.now().date().isoformat())
+    
+    # Make sure the model is loaded so the key carries its artifact version
+    await cpu_executor.run(endpoint, model_registry.get, model_name)
+    
+    async def compute():
+        dates = _horizon_dates(request.horizon_days)
+        result = await _model_forecast(endpoint, model_name,
+                                       lambda model: features(model, dates, request))
+        return await cpu_executor.run(endpoint, build, request, dates, result)
+    
+    return await forecast_cache.get_or_compute(
+        model_name, model_registry.version(model_name), request_key, compute,
+        cacheable=lambda response: response["modelUsed"] != "Fallback")
+
+def _forecast_series(dates, predicted, lower, upper):
+    """Assemble the forecast series for the whole horizon column-wise"""
+    return pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%d"),
+        "predicted": np.rint(predicted).astype(int),
+        "lower": np.rint(lower).astype(int),
+        "upper": np.rint(upper).astype(int)
+    }).to_dict("records")
+
+def _demand_features(model, dates, request: ForecastRequest):
+    return model.forecast_features(dates, product_id=request.product_id, store_id=request.warehouse_id)
+
+def _build_demand_forecast(request: ForecastRequest, dates, result):
+    """Forecast response for /api/forecast-demand from the model result (None for fallback)"""
+    used_model = result is not None
+    predicted, lower, upper = _forecast_values(result, len(dates), (1000, -100, 200), 100, 150)
+    forecast_series = _forecast_series(dates, predicted, lower, upper)
+    
+    return {
+        "productId": request.product_id,
+        "warehouseId": request.warehouse_id,
+        "horizonDays": request.horizon_days,
+        "series": forecast_series,
+        "insights": [
+            "Seasonal spike expected in Week 3 (+22%)",
+            "Confidence: High (92%)",
+            f"Recommendation: Increase stock by {np.random.randint(800, 1500)} units"
+        ],
+        "confidence": 0.92,
+        "modelUsed": "XGBoost" if used_model else "Fallback"
+    }
+
 @app.post("/api/forecast-demand")
 async def forecast_demand(request: ForecastRequest):
     """Generate demand forecast using ML model"""
     try:
-        # Generate forecast for next N days
-        forecast_series = []
-        base_date = datetime.now()
-        
-        for i in range(request.horizon_days):
-            date = (base_date + timedelta(days=i)).strftime("%Y-%m-%d")
-            
-            # Use ML model if available, otherwise use mock data
-            if demand_model and demand_model.model:
-                # In production, you'd prepare actual features here
-                predicted = 1000 + np.random.randint(-100, 200)
-            else:
-                predicted = 1000 + np.random.randint(-100, 200)
-            
-            actual = predicted + np.random.randint(-50, 50) if i < 15 else None
-            
-            forecast_series.append({
-                "date": date,
-                "actual": actual,
-                "predicted": predicted,
-                "lower": predicted - 100,
-                "upper": predicted + 150
-            })
-        
-        return {
-            "productId": request.product_id,
-            "warehouseId": request.warehouse_id,
-            "horizonDays": request.horizon_days,
-            "series": forecast_series,
-            "insights": [
-                "Seasonal spike expected in Week 3 (+22%)",
-                "Confidence: High (92%)",
-                f"Recommendation: Increase stock by {np.random.randint(800, 1500)} units"
-            ],
-            "confidence": 0.92,
-            "modelUsed": "XGBoost" if demand_model else "Fallback"
-        }
+        return await _cached_forecast("forecast-demand", "demand_forecast", request,
+                                      _demand_features, _build_demand_forecast)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _supplier_ranking():
+    """Ranking table for the current supplier model and supplier master"""
+    model = model_registry.get("supplier_scoring")
+    if model is None or model.model is None:
+        raise RuntimeError("Supplier scoring model not available")
+    return supplier_rankings.get(model, dataset_cache.get(SUPPLY_CHAIN_MASTER))
+
+def _query_suppliers(limit, risk_level, max_delivery_days):
+    return _supplier_ranking().query(limit, risk_level, max_delivery_days)
+
 @app.get("/api/supplier-scores")
-async def get_supplier_scores():
-    """Get AI-scored supplier rankings"""
+async def get_supplier_scores(response: Response, limit: int = SUPPLIER_TOP_K,
+                              risk_level: Optional[str] = None, max_delivery_days: Optional[int] = None):
+    """Get AI-scored supplier rankings
+    
+    Answered from a ranking of the whole supplier master, scored once by the
+    supplier model. Returns the top `limit` suppliers, optionally only one
+    risk_level (Low/Medium/High) and at most max_delivery_days lead time.
+    The number of matching suppliers is returned in X-Total-Count.
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be a positive integer")
+    risk_level = _filter_value(risk_level)
+    if risk_level is not None:
+        if risk_level.capitalize() not in ("Low", "Medium", "High"):
+            raise HTTPException(status_code=400, detail="risk_level must be Low, Medium or High")
+        risk_level = risk_level.capitalize()
+    
     try:
-        # Mock supplier data (in production, fetch from database)
-        suppliers = [
+        suppliers, total = await cpu_executor.run("supplier-scores", _query_suppliers,
+                                                  limit, risk_level, max_delivery_days)
+        response.headers["X-Total-Count"] = str(total)
+        return suppliers
+    
+    except Exception as e:
+        print(f"Warning: supplier ranking unavailable, using demo suppliers: {e}")
+        # Demo suppliers when the model or supplier master is unavailable
+        return [
             {"id": 1, "name": "TechParts Inc", "leadTimeDays": 7, "defectRate": 0.8, "costIndex": 2, "aiScore": 92},
             {"id": 2, "name": "GlobalCo", "leadTimeDays": 14, "defectRate": 2.1, "costIndex": 1, "aiScore": 78},
             {"id": 3, "name": "QuickShip", "leadTimeDays": 3, "defectRate": 1.2, "costIndex": 3, "aiScore": 85},
             {"id": 4, "name": "ReliableSupply", "leadTimeDays": 10, "defectRate": 1.5, "costIndex": 2, "aiScore": 88}
         ]
-        
-        return suppliers
+
+def _retail_features(model, dates, request: ForecastRequest):
+    return model.forecast_features(dates, product_code=request.product_id, warehouse=request.warehouse_id)
+
+def _build_retail_demand(request: ForecastRequest, dates, result):
+    """Forecast response for /api/retail-demand from the model result (None for fallback)"""
+    used_model = result is not None
+    predicted, lower, upper = _forecast_values(result, len(dates), (850, -150, 250), 120, 180)
+    forecast_series = _forecast_series(dates, predicted, lower, upper)
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "productId": request.product_id,
+        "warehouseId": request.warehouse_id,
+        "horizonDays": request.horizon_days,
+        "series": forecast_series,
+        "insights": [
+            "Retail demand shows seasonal patterns",
+            "Confidence: High (89%)",
+            f"Peak demand expected: {max([s['predicted'] for s in forecast_series], default=0)} units"
+        ],
+        "confidence": 0.89,
+        "modelUsed": "XGBoost Retail" if used_model else "Fallback"
+    }
 
 @app.post("/api/retail-demand")
 async def predict_retail_demand(request: ForecastRequest):
     """Predict retail demand using RetailDemandModel"""
     try:
-        forecast_series = []
-        base_date = datetime.now()
-        
-        for i in range(request.horizon_days):
-            date = (base_date + timedelta(days=i)).strftime("%Y-%m-%d")
-            
-            # Use retail demand model if available
-            if retail_demand_model and retail_demand_model.model:
-                predicted = 850 + np.random.randint(-150, 250)
-            else:
-                predicted = 850 + np.random.randint(-150, 250)
-            
-            actual = predicted + np.random.randint(-50, 50) if i < 15 else None
-            
-            forecast_series.append({
-                "date": date,
-                "actual": actual,
-                "predicted": predicted,
-                "lower": predicted - 120,
-                "upper": predicted + 180
-            })
-        
-        return {
-            "productId": request.product_id,
-            "warehouseId": request.warehouse_id,
-            "horizonDays": request.horizon_days,
-            "series": forecast_series,
-            "insights": [
-                "Retail demand shows seasonal patterns",
-                "Confidence: High (89%)",
-                f"Peak demand expected: {max([s['predicted'] for s in forecast_series])} units"
-            ],
-            "confidence": 0.89,
-            "modelUsed": "XGBoost Retail" if retail_demand_model else "Fallback"
-        }
+        return await _cached_forecast("retail-demand", "retail_demand", request,
+                                      _retail_features, _build_retail_demand)
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _supplychain_features(model, dates, request: ForecastRequest):
+    return model.forecast_features(dates, product_id=_trailing_number(request.product_id))
+
+def _build_supplychain_forecast(request: ForecastRequest, dates, result):
+    """Forecast response for /api/supplychain-forecast from the model result (None for fallback)"""
+    used_model = result is not None
+    predicted, lower, upper = _forecast_values(result, len(dates), (1200, -200, 300), 150, 200)
+    forecast_series = _forecast_series(dates, predicted, lower, upper)
+    
+    return {
+        "productId": request.product_id,
+        "warehouseId": request.warehouse_id,
+        "horizonDays": request.horizon_days,
+        "series": forecast_series,
+        "insights": [
+            "Supply chain optimization opportunities identified",
+            "Confidence: Very High (94%)",
+            f"Average daily demand: {int(np.mean(predicted)) if len(predicted) else 0} units"
+        ],
+        "confidence": 0.94,
+        "modelUsed": "Supply Chain ML" if used_model else "Fallback"
+    }
+
 @app.post("/api/supplychain-forecast")
 async def predict_supplychain_demand(request: ForecastRequest):
     """Predict supply chain demand using SupplyChainDemandModel"""
     try:
-        forecast_series = []
-        base_date = datetime.now()
-        
-        for i in range(request.horizon_days):
-            date = (base_date + timedelta(days=i)).strftime("%Y-%m-%d")
-            
-            # Use supply chain demand model if available
-            if supplychain_demand_model and supplychain_demand_model.model:
-                predicted = 1200 + np.random.randint(-200, 300)
-            else:
-                predicted = 1200 + np.random.randint(-200, 300)
-            
-            actual = predicted + np.random.randint(-60, 60) if i < 15 else None
-            
-            forecast_series.append({
-                "date": date,
-                "actual": actual,
-                "predicted": predicted,
-                "lower": predicted - 150,
-                "upper": predicted + 200
-            })
-        
-        return {
-            "productId": request.product_id,
-            "warehouseId": request.warehouse_id,
-            "horizonDays": request.horizon_days,
-            "series": forecast_series,
-            "insights": [
-                "Supply chain optimization opportunities identified",
-                "Confidence: Very High (94%)",
-                f"Average daily demand: {int(np.mean([s['predicted'] for s in forecast_series]))} units"
-            ],
-            "confidence": 0.94,
-            "modelUsed": "Supply Chain ML" if supplychain_demand_model else "Fallback"
-        }
+        return await _cached_forecast("supplychain-forecast", "supplychain_demand", request,
+                                      _supplychain_features, _build_supplychain_forecast)
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _walmart_features(model, dates, request: ForecastRequest):
+    return model.forecast_features(dates, store=_trailing_number(request.warehouse_id))
+
+def _build_walmart_sales(request: ForecastRequest, dates, result):
+    """Forecast response for /api/walmart-sales from the model result (None for fallback)"""
+    used_model = result is not None
+    predicted, lower, upper = _forecast_values(result, len(dates), (2500, -400, 600), 250, 350)
+    forecast_series = _forecast_series(dates, predicted, lower, upper)
+    
+    return {
+        "productId": request.product_id,
+        "warehouseId": request.warehouse_id,
+        "horizonDays": request.horizon_days,
+        "series": forecast_series,
+        "insights": [
+            "Walmart-specific sales patterns detected",
+            "Confidence: High (91%)",
+            f"Weekly sales forecast: {int(sum([s['predicted'] for s in forecast_series[:7]]))} units"
+        ],
+        "confidence": 0.91,
+        "modelUsed": "Walmart ML" if used_model else "Fallback"
+    }
+
 @app.post("/api/walmart-sales")
 async def predict_walmart_sales(request: ForecastRequest):
     """Predict Walmart sales using WalmartSalesModel"""
     try:
-        forecast_series = []
-        base_date = datetime.now()
-        
-        for i in range(request.horizon_days):
-            date = (base_date + timedelta(days=i)).strftime("%Y-%m-%d")
-            
-            # Use walmart sales model if available
-            if walmart_sales_model and walmart_sales_model.model:
-                predicted = 2500 + np.random.randint(-400, 600)
-            else:
-                predicted = 2500 + np.random.randint(-400, 600)
-            
-            actual = predicted + np.random.randint(-100, 100) if i < 15 else None
-            
-            forecast_series.append({
-                "date": date,
-                "actual": actual,
-                "predicted": predicted,
-                "lower": predicted - 250,
-                "upper": predicted + 350
-            })
-        
-        return {
-            "productId": request.product_id,
-            "warehouseId": request.warehouse_id,
-            "horizonDays": request.horizon_days,
-            "series": forecast_series,
-            "insights": [
-                "Walmart-specific sales patterns detected",
-                "Confidence: High (91%)",
-                f"Weekly sales forecast: {int(sum([s['predicted'] for s in forecast_series[:7]]))} units"
-            ],
-            "confidence": 0.91,
-            "modelUsed": "Walmart ML" if walmart_sales_model else "Fallback"
-        }
+        return await _cached_forecast("walmart-sales", "walmart_sales", request,
+                                      _walmart_features, _build_walmart_sales)
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -383,59 +509,83 @@ async def get_reorder_suggestions():
          "reason": "Below safety threshold", "supplierId": 3, "urgency": "medium"}
     ]
 
+def build_inventory_index(df):
+    """Index the materialized inventory table for filtered/paged queries"""
+    inventory = dataset_cache.get_derived(SUPPLY_CHAIN_MASTER, 'inventory', build_inventory_frame)
+    return InventoryIndex(inventory)
+
+def _filter_value(value):
+    """Treat missing and 'All' filter values as no filter"""
+    if value is None or value.strip() == "" or value.strip().lower() == "all":
+        return None
+    return value.strip()
+
+def _query_inventory(filters, materialize=True):
+    """Run one inventory query; records are only built when not streaming"""
+    # Materialize and index inventory once per dataset version
+    index = dataset_cache.get_derived(SUPPLY_CHAIN_MASTER, 'inventory_index', build_inventory_index)
+    status = _filter_value(filters.status)
+    
+    positions, total, next_cursor = index.query(
+        warehouse=_filter_value(filters.warehouse_id),
+        status=status.lower() if status else None,
+        search=_filter_value(filters.search),
+        sort_by=filters.sort_by,
+        descending=filters.order == "desc",
+        cursor=filters.cursor,
+        limit=filters.limit
+    )
+    records = inventory_records(index.frame.iloc[positions]) if materialize else None
+    return index, positions, records, total, next_cursor
+
 @app.get("/api/inventory")
-async def get_inventory():
-    """Get inventory data from supply_chain_master.csv"""
+async def get_inventory(request: Request, response: Response,
+                        filters: InventoryFilter = Depends(), stream: Optional[str] = None):
+    """Get inventory data from supply_chain_master.csv
+    
+    Supports warehouse_id/status/search filters, sort_by + order, and keyset
+    pagination via limit + cursor. Without either, every matching row is
+    returned, as before pagination existed. Pages hold limit rows (at most
+    INVENTORY_MAX_PAGE_SIZE), or INVENTORY_PAGE_SIZE for a cursor without a
+    limit. The next page cursor is returned in the X-Next-Cursor header and
+    the number of matching rows in X-Total-Count.
+    Send Accept: application/x-ndjson or ?stream=1 to stream the rows;
+    streams hold every matching row after the cursor unless limit is given,
+    and are not held to the page size cap.
+    """
+    if filters.sort_by not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of: {', '.join(SORT_KEYS)}")
+    if filters.order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    
+    fmt = stream_format(request, stream)
+    if fmt:
+        # Streamed rows are written out in chunks, so there is no page to cap
+        if filters.limit is not None and filters.limit < 1:
+            raise HTTPException(status_code=400, detail="limit must be at least 1")
+    else:
+        if filters.limit is None and filters.cursor:
+            filters.limit = INVENTORY_PAGE_SIZE
+        if filters.limit is not None and not 1 <= filters.limit <= INVENTORY_MAX_PAGE_SIZE:
+            raise HTTPException(status_code=400,
+                                detail=f"limit must be between 1 and {INVENTORY_MAX_PAGE_SIZE}")
+    
     try:
-        # Load real supply chain data
-        csv_path = os.path.join(os.path.dirname(__file__), '..', '..', 'DATA SETS', 'supply_chain_master.csv')
-        df = pd.read_csv(csv_path)
+        index, positions, records, total, next_cursor = await cpu_executor.run(
+            "inventory", _query_inventory, filters, materialize=not fmt)
         
-        # Generate inventory items from the dataset
-        inventory_items = []
-        for idx, row in df.iterrows():
-            # Generate SKU from index
-            sku = f"SKU-{idx+1000:04d}"
-            
-            # Generate product name based on characteristics
-            product_types = ["Widget", "Gadget", "Tool", "Component", "Part", "Device", "Module", "Unit"]
-            product_variants = ["Pro", "Plus", "Master", "Elite", "Premium", "Standard", "Advanced", "Basic"]
-            product_name = f"{np.random.choice(product_types)} {np.random.choice(product_variants)}"
-            
-            # Calculate stock quantity from avg_order_volume
-            quantity = int(row['items_offered']) if 'items_offered' in row else int(row.get('avg_order_volume', 100))
-            
-            # Determine status based on quantity
-            if quantity < 50:
-                status = "critical"
-            elif quantity < 200:
-                status = "low"
-            else:
-                status = "healthy"
-            
-            # Assign warehouse based on delivery mode
-            delivery_mode = row.get('delivery_mode', 'Road')
-            if delivery_mode == 'Air':
-                warehouse = "WH-01"
-            elif delivery_mode == 'Sea':
-                warehouse = "WH-02"
-            else:
-                warehouse = "WH-03"
-            
-            inventory_items.append({
-                "id": idx + 1,
-                "sku": sku,
-                "product": product_name,
-                "quantity": quantity,
-                "stock": quantity,  # Alias for compatibility
-                "status": status,
-                "warehouse": warehouse,
-                "price": round(float(row.get('price_per_unit', 0)), 2),
-                "quality_score": round(float(row.get('quality_score', 0)), 2),
-                "delivery_time_days": int(row.get('delivery_time_days', 0))
-            })
+        headers = {"X-Total-Count": str(total)}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
         
-        return inventory_items
+        if fmt:
+            return streaming_response(iter_frame_records(index.frame, positions), fmt, headers)
+        
+        response.headers.update(headers)
+        return records
+    
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     except Exception as e:
         print(f"Error loading inventory: {str(e)}")
@@ -449,99 +599,226 @@ async def get_inventory():
         ]
 
 
+def _build_orders():
+    # Load inventory to generate orders from
+    df = dataset_cache.get(SUPPLY_CHAIN_MASTER)
+    
+    # Generate orders from a subset of inventory (simulate 200 orders)
+    return build_orders_frame(df, num_orders=200)
+
 @app.get("/api/orders")
-async def get_orders():
-    """Get order data generated from inventory"""
+async def get_orders(request: Request, stream: Optional[str] = None):
+    """Get order data generated from inventory
+    
+    Send Accept: application/x-ndjson or ?stream=1 to stream the rows.
+    """
+    fmt = stream_format(request, stream)
+    
     try:
-        # Load inventory to generate orders from
-        csv_path = os.path.join(os.path.dirname(__file__), '..', '..', 'DATA SETS', 'supply_chain_master.csv')
-        df = pd.read_csv(csv_path)
-        
-        # Generate orders from a subset of inventory (simulate 200 orders)
-        num_orders = min(200, len(df))
-        order_indices = np.random.choice(len(df), num_orders, replace=False)
+        orders = await cpu_executor.run("orders", _build_orders)
         
-        orders = []
-        statuses = ["pending", "processing", "in_transit", "delivered", "delayed"]
-        customers = ["Acme Corp", "TechStart Inc", "Global Supplies", "MegaMart", "QuickShip Ltd", 
-                    "Prime Logistics", "FastTrack Co", "Elite Distributors", "Metro Wholesale", "Urban Retail"]
+        if fmt:
+            return streaming_response(iter_frame_records(orders), fmt)
         
-        for idx, order_idx in enumerate(order_indices):
-            row = df.iloc[order_idx]
-            
-            # Generate order details
-            order_id = f"ORD-{idx+10000:05d}"
-            sku = f"SKU-{order_idx+1000:04d}"
-            customer = np.random.choice(customers)
-            status = np.random.choice(statuses, p=[0.1, 0.15, 0.35, 0.35, 0.05])
-            
-            # Calculate ETA based on delivery time
-            delivery_days = int(row.get('delivery_time_days', 5))
-            eta_date = (datetime.now() + timedelta(days=delivery_days)).strftime("%Y-%m-%d")
-            
-            # Order quantity
-            quantity = int(row.get('items_requested', np.random.randint(10, 100)))
-            
-            orders.append({
-                "id": idx + 1,
-                "order_id": order_id,
-                "sku": sku,
-                "customer": customer,
-                "status": status,
-                "eta": eta_date,
-                "quantity": quantity,
-                "delivery_mode": row.get('delivery_mode', 'Road'),
-                "created_at": (datetime.now() - timedelta(days=np.random.randint(1, 30))).strftime("%Y-%m-%d")
-            })
-        
-        # Sort by most recent first
-        orders.sort(key=lambda x: x['created_at'], reverse=True)
-        
-        return orders
+        return await cpu_executor.run("orders", orders.to_dict, 'records')
     
     except Exception as e:
         print(f"Error loading orders: {str(e)}")
         return []
 
-@app.post("/api/optimize-route")
-async def optimize_route(request: RouteOptimizationRequest):
-    """Optimize delivery route using ML model"""
-    try:
-        if route_model and route_model.model:
-            result = route_model.optimize_route(request.orders, request.vehicle_capacity)
+def _camel_case(value):
+    """Convert snake_case keys (recursively) to the camelCase the frontend reads"""
+    if isinstance(value, dict):
+        return {re.sub(r"_([a-z])", lambda m: m.group(1).upper(), key): _camel_case(item)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [_camel_case(item) for item in value]
+    return value
+
+def _fallback_route(request: RouteOptimizationRequest):
+    """Random route in input order, used when the distance data is unavailable"""
+    optimized_stops = []
+    total_distance = 0
+    total_time = 0
+    
+    for idx, order in enumerate(request.orders):
+        distance = np.random.uniform(5, 50)
+        time = distance * 2 + 15
+        total_distance += distance
+        total_time += time
+        
+        optimized_stops.append({
+            "sequence": idx + 1,
+            "order_id": order.get("order_id", f"ORD-{idx+1:04d}"),
+            "address": order.get("address", f"Address {idx+1}"),
+            "eta": f"{int(total_time // 60)}:{int(total_time % 60):02d}",
+            "distance_from_prev": round(distance, 2)
+        })
+    
+    return {
+        "vehicle_id": "V-001",
+        "stops": optimized_stops,
+        "total_distance_km": round(total_distance, 2),
+        "total_time_minutes": round(total_time, 2),
+        "vehicle_capacity": request.vehicle_capacity,
+        "optimization_score": round(np.random.uniform(85, 95), 1)
+    }
+
+# Independent randomized searches per request; more cores -> more starts in the same budget
+ROUTE_SEARCH_WORKERS = int(os.environ.get("ROUTE_SEARCH_WORKERS", str(cpu_executor.process_workers)))
+# Background jobs split each worker's budget into this many runs so progress can be reported
+ROUTE_JOB_SLICES = int(os.environ.get("ROUTE_JOB_SLICES", "4"))
+# Larger requests to /api/optimize-route are answered with a background job (202)
+ROUTE_SYNC_MAX_ORDERS = int(os.environ.get("ROUTE_SYNC_MAX_ORDERS", "2000"))
+# Most seconds of multi-start search a synchronous request may spend (jobs may use more)
+ROUTE_SYNC_BUDGET_SECONDS = float(os.environ.get("ROUTE_SYNC_BUDGET_SECONDS", "2"))
+
+async def _solve_routes(request: RouteOptimizationRequest, progress=None):
+    """Multi-start CVRP search fanned out over the process pool
+    
+    The route model's predicted solve times set one search budget for the
+    request (at most ROUTE_SYNC_BUDGET_SECONDS unless run as a job), split
+    across the depot groups. Each worker searches a group with its own seed
+    until its share runs out or restarts stop improving, and the cheapest
+    routes win. With a progress callback, the budget is split into shorter
+    runs and progress(completed, total, best_cost_km) is called as each
+    one finishes.
+    """
+    instance = await cpu_executor.run("optimize-route", prepare_instance,
+                                      request.orders, request.vehicle_capacity)
+    route_model = await cpu_executor.run("optimize-route", model_registry.get, "route_optimization")
+    capacity = instance["capacity"]
+    
+    budgets = [None] * len(instance["groups"])
+    searched = [g for g, group in enumerate(instance["groups"]) if len(group["nodes"]) >= MULTI_START_MIN_NODES]
+    if searched and route_model is not None and route_model.model is not None:
+        # The groups share the process pool, so they share one budget too
+        limit = {} if progress is not None else {"max_seconds": ROUTE_SYNC_BUDGET_SECONDS}
+        try:
+            shares = route_model.search_budgets(
+                [instance_stats(instance["groups"][g], capacity) for g in searched], **limit)
+            for g, share in zip(searched, shares):
+                budgets[g] = share
+        except Exception as e:
+            print(f"Warning: route search budget unavailable, using a single start: {e}")
+    
+    slices = ROUTE_JOB_SLICES if progress is not None else 1
+    runs = []
+    for g, budget in enumerate(budgets):
+        if budget:
+            # Seeds differ across slices so every run is a fresh search
+            runs += [(g, k * ROUTE_SEARCH_WORKERS + w, budget / slices)
+                     for k in range(slices) for w in range(ROUTE_SEARCH_WORKERS)]
         else:
-            # Fallback route optimization
-            optimized_stops = []
-            total_distance = 0
-            total_time = 0
-            
-            for idx, order in enumerate(request.orders):
-                distance = np.random.uniform(5, 50)
-                time = distance * 2 + 15
-                total_distance += distance
-                total_time += time
-                
-                optimized_stops.append({
-                    "sequence": idx + 1,
-                    "orderId": order.get("order_id", f"ORD-{idx+1:04d}"),
-                    "address": order.get("address", f"Address {idx+1}"),
-                    "eta": f"{int(total_time // 60)}:{int(total_time % 60):02d}",
-                    "distanceFromPrev": round(distance, 2)
-                })
-            
-            result = {
-                "vehicleId": "V-001",
-                "stops": optimized_stops,
-                "totalDistanceKm": round(total_distance, 2),
-                "totalTimeMinutes": round(total_time, 2),
-                "vehicleCapacity": request.vehicle_capacity,
-                "optimizationScore": round(np.random.uniform(85, 95), 1)
-            }
-        
-        return result
+            runs.append((g, 0, None))
+    
+    async def search(g, seed, budget):
+        group = instance["groups"][g]
+        return g, await cpu_executor.run("route-search", multi_start, group["dist"], group["node_demand"],
+                                         capacity, budget, seed, kind=PROCESS)
+    
+    tasks = [asyncio.ensure_future(search(*run)) for run in runs]
+    best, starts = {}, 0
+    try:
+        for completed, finished in enumerate(asyncio.as_completed(tasks), 1):
+            g, (cost, routes, count) = await finished
+            starts += count
+            if g not in best or cost < best[g][0]:
+                best[g] = (cost, routes)
+            if progress is not None:
+                found = len(best) == len(instance["groups"])
+                progress(completed, len(runs), sum(c for c, _ in best.values()) / 1000.0 if found else None)
+    finally:
+        for task in tasks:
+            task.cancel()
     
+    result = await cpu_executor.run("optimize-route", routes_result, instance,
+                                    [best[g][1] for g in range(len(instance["groups"]))])
+    result["search"] = {
+        "budget_seconds": round(sum(filter(None, budgets)), 3),
+        "workers": ROUTE_SEARCH_WORKERS,
+        "starts": starts
+    }
+    return result
+
+async def _optimize(request: RouteOptimizationRequest, progress=None):
+    """Solve a route request in the requested mode, mapping solver errors to HTTP errors"""
+    if request.mode not in (None, "route", "schedule"):
+        raise HTTPException(status_code=400, detail="mode must be 'route' or 'schedule'")
+    
+    try:
+        if request.mode == "schedule":
+            result = await cpu_executor.run(
+                "optimize-route", schedule_shipments, request.orders, request.vehicle_capacity,
+                request.area_capacity, request.speed_kmh or SCHEDULE_SPEED_KMH, kind=PROCESS)
+        else:
+            result = await _solve_routes(request, progress)
+    except FileNotFoundError as e:
+        print(f"Warning: distance data unavailable, using fallback route: {e}")
+        result = _fallback_route(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return _camel_case(result)
+
+def _submit_route_job(request: RouteOptimizationRequest):
+    if request.mode not in (None, "route", "schedule"):
+        raise HTTPException(status_code=400, detail="mode must be 'route' or 'schedule'")
+    try:
+        job = route_jobs.submit(request.mode or "route", lambda job: _optimize(request, job.report))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return JSONResponse(status_code=202, content={
+        "jobId": job.id,
+        "status": job.status,
+        "statusUrl": f"/api/optimize-route/jobs/{job.id}",
+        "resultUrl": f"/api/optimize-route/jobs/{job.id}/result"
+    })
+
+@app.post("/api/optimize-route")
+async def optimize_route(request: RouteOptimizationRequest):
+    """Optimize delivery routes (capacitated VRP over distance.csv)
+    
+    Returns every stop in visiting order plus one summary per vehicle in
+    routes. With mode="schedule", items with Available_Time/Deadline,
+    Danger_Type, Area and Weight are assigned to timed departures instead.
+    The search runs in the process pool since it is mostly Python.
+    Requests with more than ROUTE_SYNC_MAX_ORDERS orders are submitted as a
+    background job instead and answered with 202 and the job's URLs.
+    """
+    if len(request.orders) > ROUTE_SYNC_MAX_ORDERS:
+        return _submit_route_job(request)
+    return await _optimize(request)
+
+@app.post("/api/optimize-route/jobs", status_code=202)
+async def submit_route_job(request: RouteOptimizationRequest):
+    """Submit a route optimization to run in the background; returns its job id"""
+    return _submit_route_job(request)
+
+def _route_job(job_id: str):
+    job = route_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Route job {job_id} not found or expired")
+    return job
+
+@app.get("/api/optimize-route/jobs/{job_id}")
+async def get_route_job(job_id: str):
+    """Status of a route job: progress, best cost so far and any error"""
+    return _camel_case(_route_job(job_id).to_dict())
+
+@app.get("/api/optimize-route/jobs/{job_id}/result")
+async def get_route_job_result(job_id: str):
+    """Result of a finished route job (409 while it is still running)"""
+    job = _route_job(job_id)
+    if job.status == DONE:
+        return job.result
+    if job.error is not None:
+        raise HTTPException(status_code=job.error_status or 500, detail=job.error)
+    raise HTTPException(status_code=409, detail=f"Route job {job_id} is {job.status}")
 
 @app.get("/api/analytics/warehouse-comparison")
 async def get_warehouse_comparison():
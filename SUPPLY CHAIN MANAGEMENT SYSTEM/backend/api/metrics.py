@@ -0,0 +1,257 @@
+"""
+Prometheus-compatible metrics for the API
+Counters, gauges and histograms rendered in the Prometheus text exposition
+format, plus collectors that read existing stats() at scrape time
+"""
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from sub-millisecond lookups to slow reloads
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in items]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets"""
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # per-bucket counts (last one is +Inf), sum
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def time(self, **labels):
+        """Context manager / decorator that observes the elapsed seconds"""
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, counts, total in items:
+            lines.extend(histogram_samples(self.name, self.labelnames, key, self.buckets, counts, total))
+        return lines
+
+
+def histogram_samples(name, labelnames, labelvalues, buckets, counts, total):
+    """Cumulative bucket, _sum and _count samples for per-bucket counts"""
+    lines = []
+    cumulative = 0
+    for bound, count in zip(tuple(buckets) + (float("inf"),), counts):
+        cumulative += count
+        lines.append((f"{name}_bucket",
+                      _format_labels(labelnames, labelvalues, ("le", _format_value(float(bound)))),
+                      cumulative))
+    labels = _format_labels(labelnames, labelvalues)
+    lines.append((f"{name}_sum", labels, total))
+    lines.append((f"{name}_count", labels, cumulative))
+    return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+    def __call__(self, fn):
+        histogram, labels = self.histogram, self.labels
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+
+
+class MetricsRegistry:
+    """Holds the metrics and scrape-time collectors and renders them as text
+
+    A collector is a callable returning (name, type, help, samples) tuples,
+    where samples are (labels dict, value) pairs.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.extend(metric.header())
+            lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in samples)
+
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"Warning: metrics collector failed: {e}")
+                continue
+            for name, type_name, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {type_name}")
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    names = tuple(labels)
+                    lines.append(f"{name}{_format_labels(names, tuple(labels[n] for n in names))} "
+                                 f"{_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+# Hot-path instruments shared across modules
+HTTP_REQUESTS = metrics_registry.counter(
+    "scm_http_requests_total", "HTTP requests by route and status",
+    ("method", "route", "status"))
+HTTP_LATENCY = metrics_registry.histogram(
+    "scm_http_request_duration_seconds", "Time to produce the response headers, by route",
+    ("method", "route"))
+HTTP_IN_FLIGHT = metrics_registry.gauge(
+    "scm_http_requests_in_flight", "Requests currently being handled", ("method",))
+DATASET_LOAD_SECONDS = metrics_registry.histogram(
+    "scm_dataset_load_seconds", "CSV load and parse time per dataset", ("dataset",))
+MODEL_STAGE_SECONDS = metrics_registry.histogram(
+    "scm_model_stage_seconds", "Model time per stage (prepare_features, predict, ...)",
+    ("model", "stage"))
+
+
+MODEL_STAGES = ("prepare_features", "forecast_features", "predict", "score_suppliers", "optimize_route")
+
+
+def instrument_model(name, model, stages=MODEL_STAGES):
+    """Time the given methods of a model instance under scm_model_stage_seconds"""
+    for stage in stages:
+        method = getattr(model, stage, None)
+        if method is not None:
+            setattr(model, stage, MODEL_STAGE_SECONDS.time(model=name, stage=stage)(method))
+    return model
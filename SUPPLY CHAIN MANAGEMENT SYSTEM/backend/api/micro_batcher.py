@@ -0,0 +1,169 @@
+"""
+Dynamic micro-batching for model predictions
+Collects concurrent predict requests for a model for up to a few
+milliseconds (or until enough rows are queued), runs one vectorized
+predict over all of them and scatters the results back to the callers
+"""
+
+import asyncio
+import os
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from executors import cpu_executor
+from metrics import metrics_registry, MODEL_STAGE_SECONDS
+
+PREDICT_BATCH_MAX_ROWS = int(os.environ.get("PREDICT_BATCH_MAX_ROWS", "4096"))
+PREDICT_BATCH_MAX_WAIT_MS = float(os.environ.get("PREDICT_BATCH_MAX_WAIT_MS", "2"))
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+BATCH_ROWS = metrics_registry.histogram(
+    "scm_predict_batch_rows", "Rows per micro-batched predict call", ("model",), BATCH_BUCKETS)
+BATCH_REQUESTS = metrics_registry.histogram(
+    "scm_predict_batch_requests", "Requests merged into each predict call", ("model",), BATCH_BUCKETS)
+
+
+def _concat(parts):
+    if isinstance(parts[0], pd.DataFrame):
+        return pd.concat(parts, ignore_index=True)
+    return np.concatenate(parts)
+
+
+class BatchHistogram:
+    """Counts of observed sizes per bucket, plus the running sum"""
+
+    def __init__(self, buckets=BATCH_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def to_dict(self):
+        labels = [f"<={bound}" for bound in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 2) if self.count else 0.0,
+            'buckets': {label: n for label, n in zip(labels, self.counts) if n}
+        }
+
+
+class MicroBatcher:
+    """Batches predict calls for one model.
+
+    predict_fn takes a feature matrix (DataFrame or ndarray) and returns one
+    prediction row per input row, e.g. model.predict or model.predict_proba.
+    A batch is flushed once max_rows rows are queued or max_wait_ms after its
+    first request, whichever comes first.
+    """
+
+    def __init__(self, predict_fn, name="model", max_rows=PREDICT_BATCH_MAX_ROWS,
+                 max_wait_ms=PREDICT_BATCH_MAX_WAIT_MS):
+        self.predict_fn = predict_fn
+        self.name = name
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = []  # (features, future)
+        self._pending_rows = 0
+        self._timer = None
+        self.batch_rows = BatchHistogram()
+        self.batch_requests = BatchHistogram()
+        self.failures = 0
+
+    async def predict(self, features):
+        """Predictions for features, computed as part of a shared batch"""
+        if len(features) == 0:
+            return self.predict_fn(features)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((features, future))
+        self._pending_rows += len(features)
+
+        if self._pending_rows >= self.max_rows or self.max_wait <= 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_rows = self._pending, [], 0
+        # Callers cancelled while queued don't need a prediction
+        batch = [(features, future) for features, future in batch if not future.done()]
+        if batch:
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    def _timed_predict(self, X):
+        with MODEL_STAGE_SECONDS.time(model=self.name, stage="batch_predict"):
+            return self.predict_fn(X)
+
+    async def _run_batch(self, batch):
+        sizes = [len(features) for features, _ in batch]
+        X = _concat([features for features, _ in batch]) if len(batch) > 1 else batch[0][0]
+        self.batch_rows.observe(len(X))
+        self.batch_requests.observe(len(batch))
+        BATCH_ROWS.observe(len(X), model=self.name)
+        BATCH_REQUESTS.observe(len(batch), model=self.name)
+
+        try:
+            predictions = await cpu_executor.run(f"predict:{self.name}", self._timed_predict, X)
+        except Exception as e:
+            self.failures += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offsets = np.cumsum(sizes)[:-1]
+        for (_, future), part in zip(batch, np.split(np.asarray(predictions), offsets)):
+            if not future.done():
+                future.set_result(part)
+
+    def stats(self):
+        return {
+            'max_rows': self.max_rows,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'queued_rows': self._pending_rows,
+            'failures': self.failures,
+            'batch_rows': self.batch_rows.to_dict(),
+            'batch_requests': self.batch_requests.to_dict()
+        }
+
+
+class BatcherPool:
+    """One MicroBatcher per loaded model, replaced when the model object changes"""
+
+    def __init__(self, max_rows=PREDICT_BATCH_MAX_ROWS, max_wait_ms=PREDICT_BATCH_MAX_WAIT_MS):
+        self.max_rows = max_rows
+        self.max_wait_ms = max_wait_ms
+        self._batchers = {}  # name -> (estimator, batcher)
+
+    def get(self, name, estimator, method="predict"):
+        key = (name, method)
+        entry = self._batchers.get(key)
+        if entry is None or entry[0] is not estimator:
+            batcher = MicroBatcher(getattr(estimator, method), name=name,
+                                   max_rows=self.max_rows, max_wait_ms=self.max_wait_ms)
+            entry = (estimator, batcher)
+            self._batchers[key] = entry
+        return entry[1]
+
+    def stats(self):
+        return {
+            name if method == "predict" else f"{name}.{method}": batcher.stats()
+            for (name, method), (_, batcher) in list(self._batchers.items())
+        }
+
+
+prediction_batchers = BatcherPool()
@@ -0,0 +1,207 @@
+"""
+Model registry for the API
+Loads each ML model independently (in parallel, or lazily on first use) and
+tracks a status, load time and error per model. Models saved as versioned
+artifacts are reloaded in place when their live version changes on disk.
+"""
+
+import importlib
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from artifacts import current_version, is_legacy, resolve_artifact
+from metrics import instrument_model
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), '..', 'models')
+
+# "eager" loads every model in a background thread pool at startup,
+# "lazy" loads each model the first time an endpoint asks for it
+MODEL_LOAD_MODE = os.environ.get("MODEL_LOAD_MODE", "eager")
+MODEL_LOAD_WORKERS = int(os.environ.get("MODEL_LOAD_WORKERS", "6"))
+
+# Seconds between checks for newly saved model versions; 0 disables hot reload
+MODEL_RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL", "30"))
+
+# Importing the model modules (and sklearn/xgboost under them) from several
+# threads at once can hit partially initialized modules, so imports are
+# serialized; artifact loading itself still runs in parallel
+_import_lock = threading.Lock()
+
+ModelSpec = namedtuple('ModelSpec', ['name', 'module', 'class_name', 'artifact', 'label'])
+
+MODEL_SPECS = [
+    ModelSpec('demand_forecast', 'demand_forecast', 'DemandForecastModel',
+              'demand_forecast_model.pkl', 'Demand forecasting'),
+    ModelSpec('supplier_scoring', 'supplier_scoring', 'SupplierScoringModel',
+              'supplier_scoring_model.pkl', 'Supplier scoring'),
+    ModelSpec('route_optimization', 'route_optimization', 'RouteOptimizationModel',
+              'route_optimization_model.pkl', 'Route optimization'),
+    ModelSpec('retail_demand', 'retail_demand_prediction', 'RetailDemandModel',
+              'retail_demand_model.pkl', 'Retail demand'),
+    ModelSpec('supplychain_demand', 'supplychain_demand_forecast', 'SupplyChainDemandModel',
+              'supplychain_demand_model.pkl', 'Supply chain demand'),
+    ModelSpec('walmart_sales', 'walmart_sales_forecast', 'WalmartSalesForecastModel',
+              'walmart_sales_model.pkl', 'Walmart sales')
+]
+
+# Model states
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"        # artifact loaded
+MISSING = "missing"    # class imported but no artifact on disk (endpoints fall back)
+FAILED = "failed"      # import or load raised
+
+
+def artifact_version(path):
+    """Version tag of a model artifact on disk, or None if missing
+
+    The live version id for a versioned artifact directory, (mtime_ns, size)
+    for a legacy .pkl file.
+    """
+    if not is_legacy(path):
+        return current_version(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class ModelState:
+    def __init__(self, spec):
+        self.spec = spec
+        self.status = PENDING
+        self.model = None
+        self.version = None
+        self.load_seconds = None
+        self.error = None
+        self.reloads = 0
+        self.lock = threading.Lock()
+
+    def to_dict(self):
+        return {
+            'status': self.status,
+            'ready': self.status == READY,
+            'version': list(self.version) if isinstance(self.version, tuple) else self.version,
+            'load_seconds': round(self.load_seconds, 4) if self.load_seconds is not None else None,
+            'reloads': self.reloads,
+            'error': self.error
+        }
+
+
+class ModelRegistry:
+    """Owns the model instances; one failing model never affects the others"""
+
+    def __init__(self, specs=MODEL_SPECS, models_dir=MODELS_DIR):
+        self.models_dir = models_dir
+        self._states = {spec.name: ModelState(spec) for spec in specs}
+        self._executor = None
+
+    def artifact_path(self, name):
+        """The model's versioned artifact directory, or its legacy .pkl when there is none"""
+        return resolve_artifact(self.models_dir, name, self._states[name].spec.artifact)
+
+    def _new_model(self, spec):
+        with _import_lock:
+            module = importlib.import_module(spec.module)
+        return getattr(module, spec.class_name)()
+
+    def load(self, name):
+        """Import and load one model, recording its status, load time and error"""
+        state = self._states[name]
+        with state.lock:
+            if state.status in (READY, MISSING, FAILED):
+                return state.model
+
+            state.status = LOADING
+            spec = state.spec
+            path = self.artifact_path(name)
+            start = time.perf_counter()
+            try:
+                model = self._new_model(spec)
+                if os.path.exists(path):
+                    model.load(path)
+                    state.version = artifact_version(path)
+                    state.status = READY
+                    print(f"✅ {spec.label} model loaded")
+                else:
+                    state.status = MISSING
+                    print(f"⚠️ {spec.label} model artifact not found: {spec.artifact}")
+                state.model = instrument_model(name, model)
+            except Exception as e:
+                state.status = FAILED
+                state.error = f"{type(e).__name__}: {e}"
+                print(f"Warning: Could not load {spec.label} model: {e}")
+            finally:
+                state.load_seconds = time.perf_counter() - start
+            return state.model
+
+    def reload_changed(self):
+        """Load models whose artifact version changed on disk; returns their names
+
+        The new model is loaded next to the one being served and swapped in
+        once it is ready, so requests never wait on a reload. If loading
+        fails the old model stays in place and the error is recorded.
+        """
+        reloaded = []
+        for name, state in self._states.items():
+            if state.status not in (READY, MISSING):
+                continue
+            path = self.artifact_path(name)
+            version = artifact_version(path)
+            if version is None or version == state.version:
+                continue
+
+            spec = state.spec
+            start = time.perf_counter()
+            try:
+                model = self._new_model(spec)
+                model.load(path)
+            except Exception as e:
+                state.error = f"{type(e).__name__}: {e}"
+                print(f"Warning: Could not reload {spec.label} model: {e}")
+                continue
+            with state.lock:
+                state.model = instrument_model(name, model)
+                state.version = version
+                state.status = READY
+                state.error = None
+                state.load_seconds = time.perf_counter() - start
+                state.reloads += 1
+            reloaded.append(name)
+            print(f"🔄 {spec.label} model reloaded ({version})")
+        return reloaded
+
+    def load_all(self, wait=False, max_workers=MODEL_LOAD_WORKERS):
+        """Load every model in a thread pool; returns immediately unless wait=True"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-load")
+        futures = [self._executor.submit(self.load, name) for name in self._states]
+        if wait:
+            for future in futures:
+                future.result()
+        return futures
+
+    def get(self, name):
+        """Model instance, loading it first if needed; None if it failed to load"""
+        state = self._states[name]
+        if state.status in (READY, MISSING):
+            return state.model
+        if state.status == FAILED:
+            return None
+        return self.load(name)
+
+    def version(self, name):
+        return self._states[name].version
+
+    def status(self):
+        return {name: state.to_dict() for name, state in self._states.items()}
+
+    def ready(self):
+        return all(state.status == READY for state in self._states.values())
+
+
+model_registry = ModelRegistry()
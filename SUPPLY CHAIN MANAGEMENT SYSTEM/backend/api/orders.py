@@ -0,0 +1,63 @@
+"""
+Order generation for /api/orders
+Samples orders from supply_chain_master.csv column-wise
+"""
+
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+ORDER_STATUSES = ["pending", "processing", "in_transit", "delivered", "delayed"]
+ORDER_STATUS_WEIGHTS = [0.1, 0.15, 0.35, 0.35, 0.05]
+
+CUSTOMERS = ["Acme Corp", "TechStart Inc", "Global Supplies", "MegaMart", "QuickShip Ltd",
+             "Prime Logistics", "FastTrack Co", "Elite Distributors", "Metro Wholesale", "Urban Retail"]
+
+ORDER_COLUMNS = [
+    'id', 'order_id', 'sku', 'customer', 'status', 'eta',
+    'quantity', 'delivery_mode', 'created_at'
+]
+
+
+def _day_strings(today, day_offsets):
+    return (today + pd.to_timedelta(day_offsets, unit='D')).strftime("%Y-%m-%d").to_numpy(dtype=object)
+
+
+def build_orders_frame(df, num_orders=200):
+    """Simulate num_orders orders from random supplier rows, newest first"""
+    num_orders = min(num_orders, len(df))
+    order_indices = np.random.choice(len(df), num_orders, replace=False)
+    rows = df.iloc[order_indices]
+    today = pd.Timestamp(datetime.now())
+
+    # Calculate ETA based on delivery time
+    if 'delivery_time_days' in rows.columns:
+        delivery_days = rows['delivery_time_days'].to_numpy().astype(np.int64)
+    else:
+        delivery_days = np.full(num_orders, 5, dtype=np.int64)
+
+    if 'items_requested' in rows.columns:
+        quantity = rows['items_requested'].to_numpy().astype(np.int64)
+    else:
+        quantity = np.random.randint(10, 100, size=num_orders)
+
+    if 'delivery_mode' in rows.columns:
+        delivery_mode = rows['delivery_mode'].astype(object).to_numpy()
+    else:
+        delivery_mode = np.full(num_orders, 'Road', dtype=object)
+
+    positions = np.arange(num_orders)
+    orders = pd.DataFrame({
+        'id': positions + 1,
+        'order_id': ("ORD-" + pd.Series(positions + 10000).astype(str).str.zfill(5)).to_numpy(dtype=object),
+        'sku': ("SKU-" + pd.Series(order_indices + 1000).astype(str).str.zfill(4)).to_numpy(dtype=object),
+        'customer': np.random.choice(CUSTOMERS, num_orders).astype(object),
+        'status': np.random.choice(ORDER_STATUSES, num_orders, p=ORDER_STATUS_WEIGHTS).astype(object),
+        'eta': _day_strings(today, delivery_days),
+        'quantity': quantity,
+        'delivery_mode': delivery_mode,
+        'created_at': _day_strings(today, -np.random.randint(1, 30, size=num_orders))
+    }, columns=ORDER_COLUMNS)
+
+    # Sort by most recent first
+    return orders.sort_values('created_at', ascending=False, kind='stable', ignore_index=True)
@@ -0,0 +1,185 @@
+"""
+Background jobs for large route optimizations
+A submitted request gets a job id right away and is solved by a bounded
+set of background workers; its status reports progress and the best cost
+found so far, and finished results are kept for a retention period
+"""
+
+import asyncio
+import itertools
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+ROUTE_JOB_WORKERS = int(os.environ.get("ROUTE_JOB_WORKERS", "2"))
+ROUTE_JOB_MAX_QUEUED = int(os.environ.get("ROUTE_JOB_MAX_QUEUED", "32"))
+ROUTE_JOB_TTL = float(os.environ.get("ROUTE_JOB_TTL", "3600"))
+ROUTE_JOB_MAX_RETAINED = int(os.environ.get("ROUTE_JOB_MAX_RETAINED", "256"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already waiting for a worker"""
+
+
+class RouteJob:
+    """State of one submitted optimization"""
+
+    def __init__(self, job_id, kind):
+        self.id = job_id
+        self.kind = kind
+        self.status = QUEUED
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.expires_at = None
+        self.completed = 0
+        self.total = 0
+        self.best_cost_km = None
+        self.result = None
+        self.error = None
+        self.error_status = None
+        self.task = None
+
+    def report(self, completed, total, best_cost_km=None):
+        """Progress callback for the solver: finished work units and the best cost so far"""
+        self.completed = completed
+        self.total = total
+        if best_cost_km is not None:
+            self.best_cost_km = round(float(best_cost_km), 2)
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self):
+        now = self.finished_at or time.time()
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': round(self.completed / self.total, 4) if self.total else (1.0 if self.status == DONE else 0.0),
+            'completed_runs': self.completed,
+            'total_runs': self.total,
+            'best_cost_km': self.best_cost_km,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'elapsed_seconds': round(now - self.started_at, 3) if self.started_at else 0.0,
+            'expires_at': self.expires_at,
+            'error': self.error
+        }
+
+
+class RouteJobStore:
+    """Bounded pool of background optimization jobs with result retention.
+
+    At most `workers` jobs run at once (the heavy lifting still happens in
+    the shared process pool); up to max_queued more wait for a slot.
+    Finished jobs are kept for ttl_seconds, and only the newest
+    max_retained finished jobs are kept at all.
+    """
+
+    def __init__(self, workers=ROUTE_JOB_WORKERS, max_queued=ROUTE_JOB_MAX_QUEUED,
+                 ttl_seconds=ROUTE_JOB_TTL, max_retained=ROUTE_JOB_MAX_RETAINED):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.ttl_seconds = ttl_seconds
+        self.max_retained = max_retained
+        self._jobs = OrderedDict()  # job id -> RouteJob, in submission order
+        self._semaphore = None
+        self._counter = itertools.count(1)
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.expired = 0
+        self.rejected = 0
+
+    def _slots(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        return self._semaphore
+
+    def _purge(self):
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished]
+        stale = [job for job in finished if job.expires_at <= now]
+        kept = [job for job in finished if job.expires_at > now]
+        stale += kept[:max(0, len(kept) - self.max_retained)]
+        for job in stale:
+            if self._jobs.pop(job.id, None) is not None:
+                self.expired += 1
+
+    def submit(self, kind, solve):
+        """Start a job; solve(job) is a coroutine function that returns the result.
+
+        Exceptions from solve mark the job failed; an exception with a
+        status_code attribute (e.g. HTTPException) keeps that status.
+        """
+        self._purge()
+        queued = sum(1 for job in self._jobs.values() if job.status == QUEUED)
+        if queued >= self.max_queued:
+            self.rejected += 1
+            raise JobQueueFull(f"{queued} route jobs already queued; try again later")
+
+        job = RouteJob(f"{next(self._counter):06d}-{uuid.uuid4().hex[:12]}", kind)
+        self._jobs[job.id] = job
+        self.submitted += 1
+        job.task = asyncio.get_running_loop().create_task(self._run(job, solve))
+        return job
+
+    async def _run(self, job, solve):
+        try:
+            async with self._slots():
+                job.status = RUNNING
+                job.started_at = time.time()
+                job.result = await solve(job)
+            job.status = DONE
+            job.completed = job.total
+            self.succeeded += 1
+        except asyncio.CancelledError:
+            job.status, job.error = FAILED, "cancelled"
+            self.failed += 1
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(getattr(e, 'detail', None) or e)
+            job.error_status = getattr(e, 'status_code', 500)
+            self.failed += 1
+        finally:
+            job.finished_at = time.time()
+            job.expires_at = job.finished_at + self.ttl_seconds
+            job.task = None
+
+    def get(self, job_id):
+        """The job with this id, or None if it never existed or has expired"""
+        self._purge()
+        return self._jobs.get(job_id)
+
+    def shutdown(self):
+        for job in list(self._jobs.values()):
+            if job.task is not None:
+                job.task.cancel()
+
+    def stats(self):
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {
+            'workers': self.workers,
+            'max_queued': self.max_queued,
+            'ttl_seconds': self.ttl_seconds,
+            'jobs': counts,
+            'submitted': self.submitted,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'expired': self.expired,
+            'rejected': self.rejected
+        }
+
+
+route_jobs = RouteJobStore()
@@ -0,0 +1,70 @@
+"""
+Streaming responses for the large list endpoints
+Records are serialized chunk by chunk, so memory stays bounded by the chunk size
+"""
+
+import json
+import os
+import numpy as np
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+JSON_MEDIA_TYPE = "application/json"
+
+# Rows serialized per chunk
+STREAM_CHUNK_ROWS = int(os.environ.get("STREAM_CHUNK_ROWS", "1000"))
+
+_TRUTHY = {"1", "true", "yes", "json"}
+
+
+def stream_format(request, stream=None):
+    """Pick 'ndjson', 'json' (chunked array) or None (regular response)
+
+    Streaming is opt-in: either an Accept header of application/x-ndjson,
+    or ?stream=1 / ?stream=json / ?stream=ndjson.
+    """
+    accept = request.headers.get("accept", "")
+    if NDJSON_MEDIA_TYPE in accept or (stream or "").lower() == "ndjson":
+        return "ndjson"
+    if (stream or "").lower() in _TRUTHY:
+        return "json"
+    return None
+
+
+def _dumps(record):
+    return json.dumps(record, separators=(',', ':'), default=str)
+
+
+def iter_frame_records(frame, positions=None, chunk_size=STREAM_CHUNK_ROWS):
+    """Yield lists of JSON-ready dicts, chunk_size rows at a time"""
+    if positions is None:
+        positions = np.arange(len(frame))
+    for start in range(0, len(positions), chunk_size):
+        yield frame.iloc[positions[start:start + chunk_size]].to_dict('records')
+
+
+def iter_ndjson(chunks):
+    """One JSON document per line"""
+    for records in chunks:
+        if records:
+            yield ("\n".join(_dumps(r) for r in records) + "\n").encode()
+
+
+def iter_json_array(chunks):
+    """A single JSON array, emitted piecewise"""
+    yield b"["
+    first = True
+    for records in chunks:
+        if not records:
+            continue
+        body = ",".join(_dumps(r) for r in records)
+        yield (body if first else "," + body).encode()
+        first = False
+    yield b"]"
+
+
+def streaming_response(chunks, fmt, headers=None):
+    """Wrap a generator of record chunks in a StreamingResponse"""
+    if fmt == "ndjson":
+        return StreamingResponse(iter_ndjson(chunks), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+    return StreamingResponse(iter_json_array(chunks), media_type=JSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,231 @@
+"""
+Precomputed supplier ranking for /api/supplier-scores
+Scores the whole supplier master once, keeps the suppliers in ranked order
+and answers top-k and filtered queries from that order. When the dataset
+changes, only the rows that differ are rescored and moved.
+"""
+
+import threading
+import numpy as np
+import pandas as pd
+
+# Suppliers returned when no limit is given
+SUPPLIER_TOP_K = 50
+
+# Ranked rows examined per step when collecting a filtered top-k
+SCAN_CHUNK = 4096
+
+# Columns besides the model features that feed the ranking records
+# (supplier_id, when the master has one, is served as the name)
+RECORD_COLUMNS = ['supplier_id', 'on_time_delivery_rate', 'defect_rate', 'delivery_time_days',
+                  'quality_score', 'price_per_unit', 'return_rate', 'forecast_accuracy',
+                  'supplier_reliability_score']
+
+
+def _changed_rows(old, new, columns):
+    """Mask of rows (over the common length) where any of the columns differ
+
+    Columns in neither frame are skipped; a column in only one of them
+    marks every row as changed.
+    """
+    common = min(len(old), len(new))
+    changed = np.zeros(common, dtype=bool)
+    for column in columns:
+        if column not in old.columns or column not in new.columns:
+            if column in old.columns or column in new.columns:
+                changed[:] = True
+            continue
+        a = old[column].to_numpy()[:common]
+        b = new[column].to_numpy()[:common]
+        same = a == b
+        if a.dtype.kind == 'f':
+            same |= np.isnan(a) & np.isnan(b)
+        elif a.dtype == object:
+            same |= pd.isna(a) & pd.isna(b)
+        changed |= ~same
+    return changed
+
+
+class SupplierRanking:
+    """Scored suppliers plus their positions in ranked order.
+
+    Suppliers are identified by row position in the supplier master. The
+    order is by AI score (highest first), ties by position, which matches
+    SupplierScoringModel.score_suppliers. Cost index 1-3 is the supplier's
+    price tercile, with the cut points fixed when the table is built.
+    Updates swap in new (order, values) together, so a concurrent query
+    always sees a consistent snapshot.
+    """
+
+    def __init__(self, model, frame):
+        self.model = model
+        self.frame = frame
+        self.columns = sorted(set(model.feature_columns or []) | set(RECORD_COLUMNS))
+        scores = model.score_frame(frame)
+        self.cost_cuts = np.quantile(frame['price_per_unit'].to_numpy(dtype=np.float64), [1 / 3, 2 / 3])
+        values = self._arrays(scores, frame)
+        self._state = (np.lexsort((np.arange(len(frame)), -values['ai_score'])), values)
+        self.rescored = len(frame)
+
+    @property
+    def order(self):
+        return self._state[0]
+
+    @property
+    def size(self):
+        return len(self._state[0])
+
+    def _arrays(self, scores, rows):
+        values = {name: scores[name].to_numpy() for name in scores.columns}
+        values['cost_index'] = 1 + np.searchsorted(
+            self.cost_cuts, rows['price_per_unit'].to_numpy(dtype=np.float64), side='right')
+        return values
+
+    def _insertion_points(self, order, values, positions):
+        """Where each (score, position) belongs in an order sorted by (-score, position)"""
+        ranked = -values['ai_score'][order]
+        keys = -values['ai_score'][positions]
+        lo = np.searchsorted(ranked, keys, side='left')
+        hi = np.searchsorted(ranked, keys, side='right')
+        points = lo.copy()
+        for i in np.flatnonzero(hi > lo).tolist():
+            points[i] += np.searchsorted(order[lo[i]:hi[i]], positions[i])
+        return points
+
+    def update(self, positions, rows, size=None):
+        """Rescore rows at the given positions and move them to their new rank
+
+        rows holds the new data for positions, in the same order. Positions
+        past the current end append suppliers; size truncates the table to
+        that many suppliers first.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        order, values = self._state
+        if size is not None and size < len(order):
+            order = order[order < size]
+            values = {name: column[:size] for name, column in values.items()}
+        if len(positions) == 0:
+            self._state = (order, values)
+            return 0
+
+        scores = self.model.score_frame(rows, positions=positions)
+        new_values = self._arrays(scores, rows)
+        grow = int(positions.max()) + 1 - len(values['ai_score'])
+        updated = {}
+        for name, column in values.items():
+            if grow > 0:
+                column = np.concatenate([column, np.empty(grow, dtype=column.dtype)])
+            else:
+                column = column.copy()
+            column[positions] = new_values[name]
+            updated[name] = column
+
+        order = order[~np.isin(order, positions)]
+        # Insert in ranked order so equal insertion points keep the right sequence
+        positions = positions[np.lexsort((positions, -updated['ai_score'][positions]))]
+        order = np.insert(order, self._insertion_points(order, updated, positions), positions)
+        self._state = (order, updated)
+        self.rescored += len(positions)
+        return len(positions)
+
+    def refresh(self, frame):
+        """Bring the table up to date with a reloaded supplier master
+
+        Only rows whose scoring inputs changed, and rows added at the end,
+        are rescored. Returns the number of rescored rows.
+        """
+        changed = np.flatnonzero(_changed_rows(self.frame, frame, self.columns))
+        positions = np.concatenate([changed, np.arange(len(self.frame), len(frame))])
+        count = self.update(positions, frame.iloc[positions], size=len(frame))
+        self.frame = frame
+        return count
+
+    def query(self, limit=SUPPLIER_TOP_K, risk_level=None, max_delivery_days=None):
+        """(records of the top `limit` matching suppliers in rank order, total matches)"""
+        order, values = self._state
+        positions, total = self._select(order, values, limit, risk_level, max_delivery_days)
+        return self._records(values, positions), total
+
+    def _select(self, order, values, limit, risk_level, max_delivery_days):
+        if risk_level is None and max_delivery_days is None:
+            return order[:limit], len(order)
+
+        mask = np.ones(len(values['ai_score']), dtype=bool)
+        if risk_level is not None:
+            mask &= values['risk_level'] == risk_level
+        if max_delivery_days is not None:
+            mask &= values['delivery_time_days'] <= max_delivery_days
+        total = int(np.count_nonzero(mask[order]))
+
+        found, count = [], 0
+        for start in range(0, len(order), SCAN_CHUNK):
+            if count >= min(limit, total):
+                break
+            block = order[start:start + SCAN_CHUNK]
+            found.append(block[mask[block]])
+            count += len(found[-1])
+        positions = np.concatenate(found)[:limit] if found else order[:0]
+        return positions, total
+
+    def _records(self, values, positions):
+        """Records in the shape the procurement page reads"""
+        columns = {
+            'id': positions.tolist(),
+            'name': values['supplier_id'][positions].tolist(),
+            'leadTimeDays': values['delivery_time_days'][positions].tolist(),
+            'defectRate': values['defect_rate'][positions].tolist(),
+            'costIndex': values['cost_index'][positions].tolist(),
+            'aiScore': values['ai_score'][positions].tolist(),
+            'riskLevel': values['risk_level'][positions].tolist(),
+            'selectionProbability': values['selection_probability'][positions].tolist(),
+            'onTimeDeliveryRate': values['on_time_delivery_rate'][positions].tolist(),
+            'qualityScore': values['quality_score'][positions].tolist()
+        }
+        keys = list(columns)
+        return [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+    def stats(self):
+        order, values = self._state
+        counts = pd.Series(values['risk_level'][order]).value_counts()
+        return {
+            'suppliers': self.size,
+            'rescored': self.rescored,
+            'risk_levels': {level: int(n) for level, n in counts.items()}
+        }
+
+
+class SupplierRankings:
+    """Keeps one ranking current for the loaded model and supplier master.
+
+    A new model object rebuilds the ranking from scratch; a reloaded
+    dataset with the same model only rescores the rows that changed.
+    """
+
+    def __init__(self):
+        self.ranking = None
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.refreshes = 0
+
+    def get(self, model, frame):
+        with self._lock:
+            ranking = self.ranking
+            if ranking is None or ranking.model is not model:
+                ranking = SupplierRanking(model, frame)
+                self.builds += 1
+            elif ranking.frame is not frame:
+                ranking.refresh(frame)
+                self.refreshes += 1
+            self.ranking = ranking
+            return ranking
+
+    def stats(self):
+        ranking = self.ranking
+        return {
+            'builds': self.builds,
+            'refreshes': self.refreshes,
+            **(ranking.stats() if ranking is not None else {})
+        }
+
+
+supplier_rankings = SupplierRankings()
@@ -0,0 +1,122 @@
+"""
+Benchmark: inventory materialization for /api/inventory
+Compares the old per-row iterrows builder with the column-wise builder
+
+Usage (from backend/):
+    python benchmarks/bench_inventory.py [--sizes 3000 100000 1000000] [--max-legacy-rows 100000]
+
+Sizes above --max-legacy-rows are not run through the legacy builder; its time
+is extrapolated linearly from the largest size that was measured.
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+from inventory import build_inventory_frame, inventory_records
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'DATA SETS', 'supply_chain_master.csv')
+
+
+def legacy_inventory(df):
+    """The original get_inventory loop, kept here as the baseline"""
+    inventory_items = []
+    for idx, row in df.iterrows():
+        sku = f"SKU-{idx+1000:04d}"
+
+        product_types = ["Widget", "Gadget", "Tool", "Component", "Part", "Device", "Module", "Unit"]
+        product_variants = ["Pro", "Plus", "Master", "Elite", "Premium", "Standard", "Advanced", "Basic"]
+        product_name = f"{np.random.choice(product_types)} {np.random.choice(product_variants)}"
+
+        quantity = int(row['items_offered']) if 'items_offered' in row else int(row.get('avg_order_volume', 100))
+
+        if quantity < 50:
+            status = "critical"
+        elif quantity < 200:
+            status = "low"
+        else:
+            status = "healthy"
+
+        delivery_mode = row.get('delivery_mode', 'Road')
+        if delivery_mode == 'Air':
+            warehouse = "WH-01"
+        elif delivery_mode == 'Sea':
+            warehouse = "WH-02"
+        else:
+            warehouse = "WH-03"
+
+        inventory_items.append({
+            "id": idx + 1,
+            "sku": sku,
+            "product": product_name,
+            "quantity": quantity,
+            "stock": quantity,
+            "status": status,
+            "warehouse": warehouse,
+            "price": round(float(row.get('price_per_unit', 0)), 2),
+            "quality_score": round(float(row.get('quality_score', 0)), 2),
+            "delivery_time_days": int(row.get('delivery_time_days', 0))
+        })
+    return inventory_items
+
+
+def vectorized_inventory(df):
+    return inventory_records(build_inventory_frame(df))
+
+
+def scaled_frame(base, rows):
+    """Resample the supplier master up (or down) to the requested row count"""
+    idx = np.resize(np.arange(len(base)), rows)
+    return base.iloc[idx].reset_index(drop=True)
+
+
+def timed(fn, df, repeat=1):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3_000, 100_000, 1_000_000])
+    parser.add_argument('--max-legacy-rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    base = pd.read_csv(CSV_PATH)
+
+    print(f"{'rows':>10} {'legacy (s)':>14} {'vectorized (s)':>16} {'records (s)':>12} {'speedup':>9}")
+    legacy_rate = None
+    for rows in args.sizes:
+        df = scaled_frame(base, rows)
+
+        if rows <= args.max_legacy_rows:
+            legacy = timed(legacy_inventory, df)
+            legacy_rate = legacy / rows
+            legacy_label = f"{legacy:.3f}"
+        elif legacy_rate is not None:
+            legacy = legacy_rate * rows
+            legacy_label = f"~{legacy:.1f}*"
+        else:
+            legacy = None
+            legacy_label = "skipped"
+
+        build = timed(build_inventory_frame, df, repeat=3)
+        total = timed(vectorized_inventory, df, repeat=3)
+        speedup = f"{legacy / total:.0f}x" if legacy is not None else "-"
+        print(f"{rows:>10,} {legacy_label:>14} {build:>16.4f} {total:>12.4f} {speedup:>9}")
+
+    if legacy_rate is not None and max(args.sizes) > args.max_legacy_rows:
+        print("* extrapolated from the largest measured legacy run")
+    print("vectorized = column-wise frame build; records = build + to_dict('records')")
+
+
+if __name__ == "__main__":
+    main()
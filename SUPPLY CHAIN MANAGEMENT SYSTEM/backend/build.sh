@@ -4,14 +4,10 @@
 echo "Installing Python dependencies..."
 pip install -r requirements.txt
 
+echo "Converting datasets to the columnar cache..."
+(cd models && python columnar_cache.py)
+
 echo "Training ML models..."
-cd models
-python demand_forecast.py
-python supplier_scoring.py
-python route_optimization.py
-python retail_demand_prediction.py
-python supplychain_demand_forecast.py
-python walmart_sales_forecast.py
-cd ..
+python train_all.py
 
 echo "Build complete!"
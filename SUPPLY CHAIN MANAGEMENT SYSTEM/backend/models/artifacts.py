@@ -0,0 +1,306 @@
+"""
+Versioned model artifacts
+A saved model is a directory of immutable versions plus a pointer to the
+one in use, swapped atomically so readers never see a half-written model:
+
+    <name>/CURRENT                      version id of the live artifact
+    <name>/<version>/manifest.json      format, hashes, schema, small state as JSON
+    <name>/<version>/booster.ubj        XGBoost models, in XGBoost's native UBJSON
+    <name>/<version>/estimator.pkl      other estimators (sklearn has no native format)
+    <name>/<version>/arrays.bin         encoder vocabularies, feature lists, known ids
+
+Paths ending in .pkl keep reading and writing the older single-file joblib
+format, so existing artifacts still load.
+
+Loading reads each file once: the bytes are hashed against the manifest
+and deserialized from memory, and arrays are sliced out of arrays.bin at
+the offsets the manifest records instead of being unpacked from an archive.
+sklearn estimators are plain pickles rather than joblib files: joblib
+unpacks every tree array separately, which makes a forest several times
+slower to load.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+import uuid
+
+import joblib
+import numpy as np
+import sklearn
+import xgboost
+from xgboost import XGBModel
+
+ARTIFACT_FORMAT = 1
+
+# Old versions kept next to the live one (for in-flight loads and rollback)
+ARTIFACT_KEEP_VERSIONS = int(os.environ.get("ARTIFACT_KEEP_VERSIONS", "3"))
+
+CURRENT = 'CURRENT'
+MANIFEST = 'manifest.json'
+ARRAYS = 'arrays.bin'
+BOOSTER = 'booster.ubj'
+ESTIMATOR = 'estimator.pkl'
+
+# Key prefix of encoder vocabularies in arrays.bin
+ENCODER_PREFIX = 'label_encoders:'
+
+
+def file_hash(path):
+    """sha256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_legacy(path):
+    return path.endswith('.pkl')
+
+
+def current_version(path):
+    """Version id the artifact directory points at, or None if there is none"""
+    try:
+        with open(os.path.join(path, CURRENT)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def resolve_artifact(models_dir, name, legacy_file):
+    """The versioned artifact directory for a model if one exists, else its legacy .pkl"""
+    versioned = os.path.join(models_dir, name)
+    return versioned if current_version(versioned) else os.path.join(models_dir, legacy_file)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _as_array(value):
+    """value as a fixed-dtype array if it reads back unchanged from raw bytes, else None
+
+    Mixed lists would be silently coerced (e.g. [1, 'x'] to strings) and
+    object or ragged ones cannot be stored as bytes at all.
+    """
+    try:
+        array = np.ascontiguousarray(value)
+    except ValueError:
+        return None
+    if array.dtype.kind not in 'biufU':
+        return None
+    if not isinstance(value, np.ndarray) and array.tolist() != list(value):
+        return None
+    return array
+
+
+def _split_state(state):
+    """(arrays for arrays.bin, JSON metadata) from a model's state dict, minus the estimator
+
+    Lists that do not fit a fixed-dtype array stay in the JSON metadata.
+    """
+    arrays, metadata = {}, {}
+    for key, value in state.items():
+        if key == 'model':
+            continue
+        if key == 'label_encoders':
+            for col, encoder_state in value.items():
+                arrays[ENCODER_PREFIX + col] = np.asarray(encoder_state['classes'], dtype=str)
+            metadata[key] = list(value)  # column order
+        else:
+            array = _as_array(value) if isinstance(value, (list, tuple, np.ndarray)) else None
+            if array is not None:
+                arrays[key] = array
+            else:
+                metadata[key] = value.tolist() if isinstance(value, np.ndarray) else value
+    return arrays, metadata
+
+
+def _content_hash(estimator_path, arrays, metadata):
+    """Hash of what the artifact holds (array bytes, not the zip container, which embeds timestamps)"""
+    digest = hashlib.sha256()
+    if estimator_path is not None:
+        digest.update(file_hash(estimator_path).encode())
+    for key in sorted(arrays):
+        array = arrays[key]
+        digest.update(f"{key}:{array.dtype.str}:{array.shape}".encode())
+        digest.update(array.tobytes())
+    digest.update(json.dumps(metadata, sort_keys=True, default=_json_default).encode())
+    return digest.hexdigest()
+
+
+def _write_arrays(path, arrays):
+    """Concatenate the arrays' bytes into one file; returns each one's dtype, shape and offset"""
+    layout, offset = {}, 0
+    with open(path, 'wb') as f:
+        for key, array in arrays.items():
+            f.write(array.tobytes())
+            layout[key] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset += array.nbytes
+    return layout
+
+
+def _read_arrays(raw, layout):
+    arrays = {}
+    for key, entry in layout.items():
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape'], dtype=np.int64))
+        arrays[key] = np.frombuffer(raw, dtype=dtype, count=count,
+                                    offset=entry['offset']).reshape(entry['shape'])
+    return arrays
+
+
+def _write_pointer(path, version):
+    tmp = os.path.join(path, f".{CURRENT}.{os.getpid()}.tmp")
+    with open(tmp, 'w') as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(path, CURRENT))
+
+
+def _prune(path, keep):
+    """Drop the oldest versions beyond `keep`, never the live one"""
+    live = current_version(path)
+    versions = [entry for entry in os.scandir(path)
+                if entry.is_dir() and not entry.name.startswith('.') and entry.name != live]
+    versions.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+    for entry in versions[keep:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def save_artifact(path, state, data_hash=None, keep=ARTIFACT_KEEP_VERSIONS):
+    """Write a model's state dict as a new version and make it the live one
+
+    state is what the model's save() used to pickle: 'model' holds the
+    estimator, 'label_encoders' CategoricalEncoder states, list values
+    become arrays and anything else must be JSON-serializable. Returns the
+    version id (the first 16 hex digits of the content hash); saving an
+    identical model again just re-points to the existing version.
+    """
+    if is_legacy(path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        joblib.dump(state, path)
+        return None
+
+    os.makedirs(path, exist_ok=True)
+    tmp = os.path.join(path, f".tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+    os.makedirs(tmp)
+    try:
+        estimator = state.get('model')
+        estimator_info, estimator_path = None, None
+        if estimator is not None:
+            native = isinstance(estimator, XGBModel)
+            estimator_path = os.path.join(tmp, BOOSTER if native else ESTIMATOR)
+            if native:
+                estimator.save_model(estimator_path)
+            else:
+                with open(estimator_path, 'wb') as f:
+                    pickle.dump(estimator, f, protocol=pickle.HIGHEST_PROTOCOL)
+            estimator_info = {'file': os.path.basename(estimator_path),
+                              'format': 'xgboost-ubj' if native else 'pickle',
+                              'module': type(estimator).__module__,
+                              'class': type(estimator).__name__}
+
+        arrays, metadata = _split_state(state)
+        layout = _write_arrays(os.path.join(tmp, ARRAYS), arrays)
+        content_hash = _content_hash(estimator_path, arrays, metadata)
+        version = content_hash[:16]
+
+        feature_columns = state.get('feature_columns')
+        manifest = {
+            'format': ARTIFACT_FORMAT,
+            'version': version,
+            'created_at': time.time(),
+            'content_hash': content_hash,
+            'data_hash': data_hash,
+            'estimator': estimator_info,
+            'schema': {
+                'feature_columns': list(feature_columns) if feature_columns is not None else None,
+                'feature_dtype': 'float32',
+                'encoders': {col: len(s['classes']) for col, s in state.get('label_encoders', {}).items()},
+                'state_keys': sorted(state)
+            },
+            'libraries': {'xgboost': xgboost.__version__, 'sklearn': sklearn.__version__,
+                          'numpy': np.__version__},
+            'files': {name: file_hash(os.path.join(tmp, name)) for name in sorted(os.listdir(tmp))},
+            'arrays': layout,
+            'metadata': metadata
+        }
+        with open(os.path.join(tmp, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2, default=_json_default)
+
+        target = os.path.join(path, version)
+        if os.path.exists(os.path.join(target, MANIFEST)):
+            shutil.rmtree(tmp, ignore_errors=True)
+        else:
+            # A directory without a manifest was left behind by an interrupted save
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(tmp, target)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    _write_pointer(path, version)
+    _prune(path, keep)
+    return version
+
+
+def read_manifest(path, version=None):
+    version = version or current_version(path)
+    if version is None:
+        raise FileNotFoundError(f"No model artifact in {path}")
+    with open(os.path.join(path, version, MANIFEST)) as f:
+        return json.load(f)
+
+
+def load_artifact(path, verify=True):
+    """The state dict saved by save_artifact (or a legacy .pkl), estimator included
+
+    With verify, every file is checked against the hashes in the manifest
+    and a mismatch raises ValueError.
+    """
+    if is_legacy(path):
+        return joblib.load(path)
+
+    manifest = read_manifest(path)
+    if manifest['format'] > ARTIFACT_FORMAT:
+        raise ValueError(f"Artifact format {manifest['format']} is newer than supported ({ARTIFACT_FORMAT})")
+    directory = os.path.join(path, manifest['version'])
+
+    def read(name):
+        with open(os.path.join(directory, name), 'rb') as f:
+            raw = f.read()
+        if verify and hashlib.sha256(raw).hexdigest() != manifest['files'][name]:
+            raise ValueError(f"Corrupt model artifact: {name} in {directory} does not match its manifest")
+        return raw
+
+    state = dict(manifest['metadata'])
+    state['data_hash'] = manifest['data_hash']
+    encoders = {}
+    for key, array in _read_arrays(read(ARRAYS), manifest['arrays']).items():
+        if key.startswith(ENCODER_PREFIX):
+            encoders[key[len(ENCODER_PREFIX):]] = {'classes': array}
+        else:
+            state[key] = array.tolist()
+    if 'label_encoders' in state:
+        state['label_encoders'] = {col: encoders[col] for col in state['label_encoders']}
+
+    info = manifest['estimator']
+    if info is None:
+        state['model'] = None
+    elif info['format'] == 'xgboost-ubj':
+        estimator = getattr(xgboost, info['class'])()
+        estimator.load_model(bytearray(read(info['file'])))
+        state['model'] = estimator
+    else:
+        saved_with = manifest['libraries']['sklearn']
+        if saved_with != sklearn.__version__:
+            print(f"Warning: {path} was saved with scikit-learn {saved_with}, "
+                  f"loading with {sklearn.__version__}")
+        state['model'] = pickle.loads(read(info['file']))
+    return state
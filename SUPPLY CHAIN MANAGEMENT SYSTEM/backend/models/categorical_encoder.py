@@ -0,0 +1,94 @@
+"""
+Categorical encoder for the forecasting models
+Drop-in replacement for sklearn's LabelEncoder: hash-based lookups over a
+frozen vocabulary, each distinct input value is converted once, and values
+never seen in training map to a reserved code instead of raising
+"""
+
+import numpy as np
+import pandas as pd
+
+# Code for values outside the vocabulary
+UNKNOWN = -1
+
+
+class CategoricalEncoder:
+    """String categories -> integer codes.
+
+    The vocabulary is sorted like LabelEncoder's classes_, so codes match
+    an encoder fitted on the same values and artifacts trained with
+    LabelEncoder keep their meaning. Values are compared as strings
+    (NaN becomes 'nan'), as with LabelEncoder on astype(str) input.
+    """
+
+    def __init__(self, classes=()):
+        self._set_classes(classes)
+
+    def _set_classes(self, classes):
+        self.classes_ = np.asarray(classes, dtype=str)
+        self._index = pd.Index(self.classes_, dtype=object)
+
+    def __len__(self):
+        return len(self.classes_)
+
+    def __contains__(self, value):
+        return str(value) in self._index
+
+    @staticmethod
+    def _distinct(values):
+        """(codes, distinct values as strings); missing values get the last code, as 'nan'"""
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        uniques = pd.Index(uniques, dtype=object).astype(str).append(pd.Index(['nan'], dtype=object))
+        # Missing values are coded -1, which picks the trailing 'nan'
+        return codes, uniques
+
+    def fit(self, values):
+        codes, uniques = self._distinct(values)
+        if not (codes < 0).any():
+            uniques = uniques[:-1]
+        self._set_classes(np.sort(uniques.unique().to_numpy(dtype=str)))
+        return self
+
+    def transform(self, values):
+        """int64 codes; values outside the vocabulary get UNKNOWN"""
+        codes, uniques = self._distinct(values)
+        return self._index.get_indexer(uniques).astype(np.int64)[codes]
+
+    def fit_transform(self, values):
+        return self.fit(values).transform(values)
+
+    def inverse_transform(self, codes):
+        codes = np.asarray(codes)
+        labels = np.full(codes.shape, None, dtype=object)
+        known = codes != UNKNOWN
+        labels[known] = self.classes_[codes[known]]
+        return labels
+
+    def state(self):
+        """Compact, pickle-free representation: the vocabulary as a fixed-width string array"""
+        return {'classes': self.classes_}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state['classes'])
+
+    @classmethod
+    def from_label_encoder(cls, encoder):
+        return cls(encoder.classes_)
+
+
+def load_encoders(saved):
+    """Encoders from an artifact: CategoricalEncoder states, or fitted LabelEncoders from older artifacts"""
+    encoders = {}
+    for col, value in (saved or {}).items():
+        if isinstance(value, CategoricalEncoder):
+            encoders[col] = value
+        elif isinstance(value, dict):
+            encoders[col] = CategoricalEncoder.from_state(value)
+        else:
+            encoders[col] = CategoricalEncoder.from_label_encoder(value)
+    return encoders
+
+
+def save_encoders(encoders):
+    return {col: encoder.state() for col, encoder in encoders.items()}
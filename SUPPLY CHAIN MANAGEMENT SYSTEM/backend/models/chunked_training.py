@@ -0,0 +1,164 @@
+"""
+Out-of-core training helpers
+Streams a training CSV in chunks into XGBoost (QuantileDMatrix or an
+external-memory DMatrix), so only one chunk of raw rows is resident at a
+time, plus the bounded-memory statistics the models need around training
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+# Rows read from the CSV per chunk
+TRAIN_CHUNK_ROWS = int(os.environ.get("TRAIN_CHUNK_ROWS", "250000"))
+
+# Rows kept to estimate medians of numeric inputs
+DEFAULTS_SAMPLE_ROWS = int(os.environ.get("DEFAULTS_SAMPLE_ROWS", "100000"))
+
+# Seeds for the per-row hashes, so the holdout and the sample are independent
+HOLDOUT_SEED = 42
+SAMPLE_SEED = 7
+
+
+def row_hash(positions, seed=0):
+    """Uniform float in [0, 1) per row position (splitmix64), stable across runs and chunk sizes"""
+    with np.errstate(over='ignore'):
+        z = np.asarray(positions, dtype=np.uint64) + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def holdout_mask(offset, n, test_size, seed=HOLDOUT_SEED):
+    """True for the rows offset..offset+n-1 that belong to the test split"""
+    return row_hash(np.arange(offset, offset + n), seed) < test_size
+
+
+def iter_csv_chunks(path, chunk_rows=TRAIN_CHUNK_ROWS, **read_options):
+    """(offset of the chunk's first row, chunk) over the CSV"""
+    offset = 0
+    with pd.read_csv(path, chunksize=chunk_rows, **read_options) as reader:
+        for chunk in reader:
+            yield offset, chunk
+            offset += len(chunk)
+
+
+class ChunkedCSVIter(xgb.DataIter):
+    """XGBoost data iterator over a CSV read chunk by chunk.
+
+    make_batch(offset, chunk) returns (X, y) for the chunk, or None to
+    skip it. XGBoost may walk the iterator more than once (QuantileDMatrix
+    sketches the data before it quantizes it); each walk re-reads the file.
+    With a cache_prefix the iterator backs an external-memory DMatrix.
+    """
+
+    def __init__(self, path, make_batch, chunk_rows=TRAIN_CHUNK_ROWS, cache_prefix=None, **read_options):
+        self.path = path
+        self.make_batch = make_batch
+        self.chunk_rows = chunk_rows
+        self.read_options = read_options
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        if self._chunks is not None:
+            self._chunks.close()
+        self._chunks = None
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter_csv_chunks(self.path, self.chunk_rows, **self.read_options)
+        for offset, chunk in self._chunks:
+            batch = self.make_batch(offset, chunk)
+            if batch is not None and len(batch[1]):
+                input_data(data=batch[0], label=batch[1])
+                return 1
+        return 0
+
+
+class StreamingDefaults:
+    """Feature defaults (as compute_feature_defaults) accumulated over chunks.
+
+    Category modes are exact (counts per distinct value). Numeric medians
+    come from a uniform sample of at most sample_rows rows, chosen by row
+    hash, so they are exact whenever the data fits in the sample.
+    """
+
+    def __init__(self, numeric_cols, categorical_cols=(), sample_rows=DEFAULTS_SAMPLE_ROWS):
+        self.numeric_cols = list(numeric_cols)
+        self.categorical_cols = list(categorical_cols)
+        self.sample_rows = sample_rows
+        self._counts = {col: None for col in self.categorical_cols}
+        self._sample = None  # (keys, values by column)
+
+    def update(self, offset, chunk):
+        for col in self.categorical_cols:
+            if col in chunk.columns:
+                counts = chunk[col].astype(str).value_counts()
+                self._counts[col] = counts if self._counts[col] is None else self._counts[col].add(counts, fill_value=0)
+
+        numeric = [col for col in self.numeric_cols if col in chunk.columns]
+        keys = row_hash(np.arange(offset, offset + len(chunk)), SAMPLE_SEED)
+        values = {col: chunk[col].to_numpy(dtype=np.float64) for col in numeric}
+        if self._sample is not None:
+            keys = np.concatenate([self._sample[0], keys])
+            values = {col: np.concatenate([self._sample[1][col], values[col]]) for col in numeric}
+        if len(keys) > self.sample_rows:
+            # Bottom-k by hash: the kept rows stay a uniform sample of everything seen
+            keep = np.argpartition(keys, self.sample_rows - 1)[:self.sample_rows]
+            keys = keys[keep]
+            values = {col: column[keep] for col, column in values.items()}
+        self._sample = (keys, values)
+
+    def categories(self, col):
+        """Distinct values seen in a categorical column, as strings ('nan' for missing)"""
+        counts = self._counts.get(col)
+        return counts.index.to_numpy(dtype=str) if counts is not None else np.array([], dtype=str)
+
+    def defaults(self):
+        defaults = {}
+        if self._sample is not None:
+            for col, values in self._sample[1].items():
+                defaults[col] = float(np.nanmedian(values)) if len(values) else float('nan')
+        for col, counts in self._counts.items():
+            if counts is not None and len(counts):
+                # Ties go to the smallest value, as with Series.mode()
+                defaults[col] = str(min(counts.index[counts == counts.max()]))
+        return defaults
+
+
+class StreamingRegressionMetrics:
+    """MAE and R² accumulated batch by batch"""
+
+    def __init__(self):
+        self.n = 0
+        self.abs_error = 0.0
+        self.sq_error = 0.0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def update(self, y_true, y_pred):
+        y_true = np.asarray(y_true, dtype=np.float64)
+        error = y_true - np.asarray(y_pred, dtype=np.float64)
+        self.n += len(y_true)
+        self.abs_error += float(np.abs(error).sum())
+        self.sq_error += float(np.square(error).sum())
+        self.total += float(y_true.sum())
+        self.total_sq += float(np.square(y_true).sum())
+
+    @property
+    def mae(self):
+        return self.abs_error / self.n if self.n else float('nan')
+
+    @property
+    def rmse(self):
+        return (self.sq_error / self.n) ** 0.5 if self.n else float('nan')
+
+    @property
+    def r2(self):
+        if not self.n:
+            return float('nan')
+        variance = self.total_sq - self.total * self.total / self.n
+        return 1.0 - self.sq_error / variance if variance > 0 else float('nan')
@@ -0,0 +1,213 @@
+"""
+Columnar binary cache for the DATA SETS CSVs
+Each CSV is parsed once into typed per-column .npy files (strings stored as
+integer codes plus their distinct values), keyed by a hash of the file
+content and the read options. Loads read only the requested columns and
+memory-map them, so a model touches just the data it trains on.
+
+Usage (from backend/models/), to convert every dataset ahead of time:
+    python columnar_cache.py [csv ...]
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'DATA SETS')
+CACHE_DIR = os.environ.get("COLUMNAR_CACHE_DIR", os.path.join(os.path.dirname(__file__), '.cache', 'columns'))
+
+# Column kinds in the manifest
+ARRAY = "array"          # numeric / bool / datetime values, stored as they are
+STRINGS = "strings"      # object columns: int32 codes + distinct values, loaded as object
+CATEGORY = "category"    # categorical columns: codes + categories, loaded as category
+
+_keys = {}  # (path, mtime_ns, size, options) -> cache key
+_keys_lock = threading.Lock()
+
+
+def _content_hash(path, options):
+    digest = hashlib.sha1(options.encode())
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _options_key(read_options):
+    return json.dumps(read_options, sort_keys=True, default=str)
+
+
+def _stem(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _pointer_path(path, options, cache_dir):
+    """Small file remembering which key the CSV at this path (and mtime/size) hashed to"""
+    where = hashlib.sha1((os.path.abspath(path) + options).encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{_stem(path)}_{where}.source.json")
+
+
+def _cache_key(path, options, cache_dir):
+    """Content hash of the CSV, recomputed only when its mtime or size changes"""
+    stat = os.stat(path)
+    signature = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, options)
+    with _keys_lock:
+        if signature in _keys:
+            return _keys[signature]
+
+    pointer = _pointer_path(path, options, cache_dir)
+    try:
+        with open(pointer) as f:
+            saved = json.load(f)
+        key = saved['key'] if (saved['mtime_ns'], saved['size']) == (stat.st_mtime_ns, stat.st_size) else None
+    except (OSError, ValueError, KeyError):
+        key = None
+    if key is None:
+        key = _content_hash(path, options)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{pointer}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump({'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'key': key}, f)
+            os.replace(tmp, pointer)
+        except OSError:
+            pass
+
+    with _keys_lock:
+        _keys[signature] = key
+    return key
+
+
+def _column_files(column, index):
+    """(manifest entry, {file name: array}) for one column"""
+    name = f"c{index}"
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        categories = column.cat.categories.to_numpy()
+        if categories.dtype == object:
+            categories = categories.astype(str)
+        spec = {'name': column.name, 'kind': CATEGORY, 'ordered': bool(column.cat.ordered)}
+        return spec, {f"{name}.npy": column.cat.codes.to_numpy(), f"{name}.labels.npy": categories}
+
+    values = column.to_numpy()
+    if values.dtype == object:
+        codes, uniques = pd.factorize(values)
+        spec = {'name': column.name, 'kind': STRINGS}
+        return spec, {f"{name}.npy": codes.astype(np.int32),
+                      f"{name}.labels.npy": np.asarray(uniques, dtype=object).astype(str)}
+    return {'name': column.name, 'kind': ARRAY}, {f"{name}.npy": values}
+
+
+def convert_csv(path, cache_dir=CACHE_DIR, **read_options):
+    """Parse a CSV into the columnar cache (if not already there); returns the cache directory"""
+    options = _options_key(read_options)
+    target = os.path.join(cache_dir, f"{_stem(path)}_{_cache_key(path, options, cache_dir)}")
+    if os.path.exists(os.path.join(target, 'manifest.json')):
+        return target
+
+    frame = pd.read_csv(path, **read_options)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    columns = []
+    for i, col in enumerate(frame.columns):
+        spec, files = _column_files(frame[col], i)
+        # Values or codes first, then labels; each with its layout, so loads skip the .npy header parse
+        spec['files'] = []
+        for file_name, array in files.items():
+            file_path = os.path.join(tmp, file_name)
+            np.save(file_path, array, allow_pickle=False)
+            spec['files'].append({'file': file_name, 'dtype': array.dtype.str, 'rows': len(array),
+                                  'offset': os.path.getsize(file_path) - array.nbytes})
+        columns.append(spec)
+    # The manifest is written last: a directory without one is incomplete
+    with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+        json.dump({'source': os.path.basename(path), 'rows': len(frame),
+                   'read_options': options, 'columns': columns}, f)
+    if os.path.isdir(target):
+        # Left behind by an interrupted conversion
+        shutil.rmtree(target, ignore_errors=True)
+    try:
+        os.replace(tmp, target)
+    except OSError:
+        # Another process converted the same file first
+        shutil.rmtree(tmp, ignore_errors=True)
+    return target
+
+
+def _read_array(directory, entry, mmap):
+    path = os.path.join(directory, entry['file'])
+    if mmap and entry['rows']:
+        return np.memmap(path, dtype=entry['dtype'], mode='r', offset=entry['offset'], shape=(entry['rows'],))
+    with open(path, 'rb') as f:
+        f.seek(entry['offset'])
+        return np.fromfile(f, dtype=entry['dtype'], count=entry['rows'])
+
+
+def _load_column(directory, spec, mmap, as_category=False):
+    files = spec['files']
+    data = _read_array(directory, files[0], mmap)
+    if spec['kind'] == ARRAY:
+        return data
+    labels = _read_array(directory, files[1], False)
+    if spec['kind'] == STRINGS and as_category:
+        # Straight from the stored codes, without building the object column
+        return pd.Categorical.from_codes(np.asarray(data), categories=labels.astype(object))
+    if spec['kind'] == CATEGORY:
+        return pd.Categorical.from_codes(np.asarray(data), categories=labels, ordered=spec['ordered'])
+    # Code -1 (missing) picks the trailing NaN
+    labels = np.append(labels.astype(object), np.nan)
+    return labels[data]
+
+
+def read_dataset(path, columns=None, mmap=True, cache_dir=CACHE_DIR, as_category=(), **read_options):
+    """The CSV as a DataFrame, served from the columnar cache
+
+    Behaves like pd.read_csv(path, **read_options)[columns], except that
+    object columns come back as strings, or as categoricals for the names
+    in as_category. The CSV is converted on first use.
+    With mmap, numeric columns are read-only views of the cache files, so
+    callers must not modify them in place. Falls back to parsing the CSV
+    when the cache directory cannot be written.
+    """
+    try:
+        directory = convert_csv(path, cache_dir, **read_options)
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except OSError as e:
+        # Read-only deploys still work, just without the on-disk cache
+        print(f"Warning: could not use columnar cache for {path}: {e}")
+        frame = pd.read_csv(path, **read_options)
+        frame = frame if columns is None else frame[list(columns)]
+        return frame.astype({col: 'category' for col in as_category if col in frame.columns})
+
+    specs = {spec['name']: spec for spec in manifest['columns']}
+    names = list(specs) if columns is None else list(columns)
+    missing = [name for name in names if name not in specs]
+    if missing:
+        raise KeyError(f"{missing} not in {os.path.basename(path)}")
+    return pd.DataFrame({name: _load_column(directory, specs[name], mmap, name in as_category)
+                         for name in names}, copy=False)
+
+
+def convert_all(data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    """Convert every CSV under data_dir; returns {csv path: cache directory}"""
+    converted = {}
+    for root, _, files in os.walk(data_dir):
+        for file_name in sorted(files):
+            if file_name.endswith('.csv'):
+                path = os.path.join(root, file_name)
+                converted[path] = convert_csv(path, cache_dir)
+    return converted
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:]
+    results = {path: convert_csv(path) for path in paths} if paths else convert_all()
+    for path, directory in results.items():
+        print(f"{os.path.relpath(path)} -> {os.path.relpath(directory)}")
@@ -3,45 +3,52 @@ Demand Forecasting Model using XGBoost
 Trains on inventory_forecast.csv to predict future demand
 """
 
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
 from xgboost import XGBRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import joblib
-import os
+from forecast_inputs import compute_feature_defaults, horizon_frame, forecast_interval
+from feature_pipeline import build_features
+from columnar_cache import read_dataset
+from artifacts import save_artifact, load_artifact, file_hash
+from incremental import update_model, new_update_state
+from categorical_encoder import CategoricalEncoder, load_encoders, save_encoders
 
 class DemandForecastModel:
-    def __init__(self):
+    categorical_cols = ['Store ID', 'Product ID', 'Category', 'Region', 
+                        'Weather Condition', 'Seasonality']
+    numeric_cols = ['Inventory Level', 'Units Sold', 'Units Ordered',
+                    'Price', 'Discount', 'Holiday/Promotion', 'Competitor Pricing']
+    target_col = 'Demand Forecast'
+    # CSV columns train() reads
+    train_columns = ['Date'] + categorical_cols + numeric_cols + [target_col]
+    
+    def __init__(self, n_jobs=-1):
         self.model = None
+        self.data_hash = None  # hash of the training data, recorded in the artifact
+        self.n_jobs = n_jobs  # threads used by train(); -1 uses every core
         self.label_encoders = {}
         self.feature_columns = None
+        self.feature_defaults = {}
+        self.update_state = new_update_state()
+        self.test_rmse = None  # sets the width of forecast intervals
         
     def prepare_features(self, df):
-        """Prepare features for training"""
-        # Create copy to avoid modifying original
-        data = df.copy()
-        
-        # Convert date to datetime features
-        data['Date'] = pd.to_datetime(data['Date'])
-        data['year'] = data['Date'].dt.year
-        data['month'] = data['Date'].dt.month
-        data['day'] = data['Date'].dt.day
-        data['day_of_week'] = data['Date'].dt.dayofweek
-        data['quarter'] = data['Date'].dt.quarter
+        """Prepare features for training
         
+        Date features come from the shared calendar lookup and everything is
+        written into one float32 matrix; df is left untouched.
+        """
         # Encode categorical variables
-        categorical_cols = ['Store ID', 'Product ID', 'Category', 'Region', 
-                           'Weather Condition', 'Seasonality']
-        
-        for col in categorical_cols:
-            if col in data.columns:
+        encoded = {}
+        for col in self.categorical_cols:
+            if col in df.columns:
                 if col not in self.label_encoders:
-                    self.label_encoders[col] = LabelEncoder()
-                    data[f'{col}_encoded'] = self.label_encoders[col].fit_transform(data[col].astype(str))
+                    self.label_encoders[col] = CategoricalEncoder()
+                    encoded[f'{col}_encoded'] = self.label_encoders[col].fit_transform(df[col])
                 else:
-                    data[f'{col}_encoded'] = self.label_encoders[col].transform(data[col].astype(str))
+                    # Values unseen in training get the reserved unknown code
+                    encoded[f'{col}_encoded'] = self.label_encoders[col].transform(df[col])
         
         # Select features
         feature_cols = [
@@ -53,19 +60,21 @@ class DemandForecastModel:
         ]
         
         self.feature_columns = feature_cols
-        return data[feature_cols]
+        return build_features(df, feature_cols, date_col='Date', derived=encoded)
     
     def train(self, data_path):
         """Train the demand forecasting model"""
         print("Loading data...")
-        df = pd.read_csv(data_path)
+        df = read_dataset(data_path, columns=self.train_columns, as_category=['Date'])
+        self.data_hash = file_hash(data_path)
         
         print(f"Dataset shape: {df.shape}")
         print(f"Columns: {df.columns.tolist()}")
         
         # Prepare features and target
         X = self.prepare_features(df)
-        y = df['Demand Forecast']
+        y = df[self.target_col]
+        self.feature_defaults = compute_feature_defaults(df, self.numeric_cols, self.categorical_cols)
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
@@ -82,7 +91,7 @@ class DemandForecastModel:
             max_depth=6,
             learning_rate=0.1,
             random_state=42,
-            n_jobs=-1
+            n_jobs=self.n_jobs
         )
         
         self.model.fit(X_train, y_train)
@@ -90,6 +99,7 @@ class DemandForecastModel:
         # Evaluate
         train_pred = self.model.predict(X_train)
         test_pred = self.model.predict(X_test)
+        self.test_rmse = float(np.sqrt(mean_squared_error(y_test, test_pred)))
         
         print("\n=== Model Performance ===")
         print(f"Train MAE: {mean_absolute_error(y_train, train_pred):.2f}")
@@ -107,35 +117,62 @@ class DemandForecastModel:
             raise ValueError("Model not trained yet!")
         
         X = self.prepare_features(input_data)
-        predictions = self.model.predict(X)
-        
-        # Add confidence intervals (simple approach using std)
-        std = predictions.std()
-        lower_bound = predictions - 1.96 * std
-        upper_bound = predictions + 1.96 * std
-        
-        return {
-            'predicted': predictions.tolist(),
-            'lower': lower_bound.tolist(),
-            'upper': upper_bound.tolist()
-        }
+        return self.forecast_output(self.model.predict(X))
+    
+    def forecast_output(self, predictions):
+        """Attach confidence intervals to raw predictions"""
+        return forecast_interval(predictions, self.test_rmse)
+    
+    def forecast_features(self, dates, product_id=None, store_id=None):
+        """Feature matrix with one row per forecast date"""
+        defaults = dict(self.feature_defaults)
+        for col, encoder in self.label_encoders.items():
+            defaults.setdefault(col, str(encoder.classes_[0]))
+        
+        # Only use identifiers the encoders have seen; others fall back to defaults
+        overrides = {}
+        for col, value in (('Product ID', product_id), ('Store ID', store_id)):
+            if col in self.label_encoders and value in self.label_encoders[col]:
+                overrides[col] = value
+        
+        frame = horizon_frame(dates, 'Date', self.categorical_cols + self.numeric_cols,
+                              defaults, overrides)
+        return self.prepare_features(frame)
+    
+    def forecast(self, dates, product_id=None, store_id=None):
+        """Forecast demand for every date in one batched predict call"""
+        if self.model is None:
+            raise ValueError("Model not trained yet!")
+        
+        X = self.forecast_features(dates, product_id=product_id, store_id=store_id)
+        return self.forecast_output(self.model.predict(X))
+    
+    def update(self, new_data, data_path=None):
+        """Continue boosting on newly appended rows; a full rebuild from data_path when one is due"""
+        return update_model(self, new_data, data_path=data_path)
     
     def save(self, path):
-        """Save model and encoders"""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        joblib.dump({
+        """Save model and encoders as a new artifact version (or one .pkl file, for a .pkl path)"""
+        save_artifact(path, {
             'model': self.model,
-            'label_encoders': self.label_encoders,
-            'feature_columns': self.feature_columns
-        }, path)
+            'label_encoders': save_encoders(self.label_encoders),
+            'feature_columns': self.feature_columns,
+            'feature_defaults': self.feature_defaults,
+            'update_state': self.update_state,
+            'test_rmse': self.test_rmse
+        }, data_hash=self.data_hash)
         print(f"Model saved to {path}")
     
     def load(self, path):
         """Load model and encoders"""
-        data = joblib.load(path)
+        data = load_artifact(path)
+        self.data_hash = data.get('data_hash')
         self.model = data['model']
-        self.label_encoders = data['label_encoders']
+        self.label_encoders = load_encoders(data['label_encoders'])
         self.feature_columns = data['feature_columns']
+        self.feature_defaults = data.get('feature_defaults', {})
+        self.update_state = data.get('update_state') or new_update_state()
+        self.test_rmse = data.get('test_rmse')
         print(f"Model loaded from {path}")
 
 if __name__ == "__main__":
@@ -144,6 +181,6 @@ if __name__ == "__main__":
     data_path = "../../DATA SETS/inventory_forecast.csv"
     
     model.train(data_path)
-    model.save("../backend/models/demand_forecast_model.pkl")
+    model.save("../backend/models/demand_forecast")
     
     print("\n✅ Demand Forecasting Model trained and saved!")
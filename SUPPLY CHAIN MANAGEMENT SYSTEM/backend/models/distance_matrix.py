@@ -0,0 +1,127 @@
+"""
+City distance matrix for route optimization
+Interns the city names in distance.csv to integer ids and stores the
+all-pairs shortest-path distances as a dense int32 matrix, cached on disk
+as .npy and memory-mapped so every worker process shares one copy
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DISTANCE_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'DATA SETS',
+                             'route_optimization', 'distance.csv')
+CACHE_DIR = os.environ.get("DISTANCE_CACHE_DIR", os.path.join(os.path.dirname(__file__), '.cache'))
+
+# Distance for city pairs with no path at all
+UNREACHABLE = np.iinfo(np.int32).max
+
+_loaded = {}  # (path, mtime_ns, size) -> DistanceMatrix
+
+
+class DistanceMatrix:
+    """Dense shortest-path distances (metres) between interned cities"""
+
+    def __init__(self, cities, matrix):
+        self.cities = np.asarray(cities, dtype=object)
+        self.matrix = matrix
+        self._ids = pd.Index(self.cities)
+        self.index = {city: i for i, city in enumerate(self.cities)}
+
+    def __len__(self):
+        return len(self.cities)
+
+    def id(self, city, default=None):
+        """Integer id of a city name"""
+        return self.index.get(city, default)
+
+    def ids(self, cities):
+        """Vectorized ids for many city names; -1 for unknown names"""
+        return self._ids.get_indexer(pd.Index(cities))
+
+    def distance(self, source, destination):
+        """Distance between two city ids"""
+        return int(self.matrix[source, destination])
+
+    def submatrix(self, ids):
+        """Distances between the given city ids, as float64 for arithmetic"""
+        ids = np.asarray(ids)
+        return self.matrix[np.ix_(ids, ids)].astype(np.float64)
+
+
+def build_distance_matrix(edges):
+    """Intern the cities of an edge list and complete it with Floyd-Warshall
+
+    edges is a frame of (source, destination, distance) columns. Returns
+    (cities, int32 matrix).
+    """
+    source, destination, distance = (edges.iloc[:, k] for k in range(3))
+    codes, cities = pd.factorize(pd.concat([source, destination], ignore_index=True), sort=True)
+    src, dst = codes[:len(edges)], codes[len(edges):]
+
+    n = len(cities)
+    matrix = np.full((n, n), np.inf)
+    np.fill_diagonal(matrix, 0.0)
+    np.minimum.at(matrix, (src, dst), distance.to_numpy(dtype=np.float64))
+
+    for k in range(n):
+        np.minimum(matrix, matrix[:, k, None] + matrix[None, k, :], out=matrix)
+
+    matrix[~np.isfinite(matrix) | (matrix > UNREACHABLE)] = UNREACHABLE
+    return np.asarray(cities, dtype=object), matrix.astype(np.int32)
+
+
+def _content_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _write_atomic(path, write):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def load_distance_matrix(path=DISTANCE_PATH, cache_dir=CACHE_DIR):
+    """Distance matrix for an edge-list CSV, built once and memory-mapped after that
+
+    The cache files are keyed by a hash of the CSV content, so an edited
+    file is rebuilt automatically. Within a process the result is reused
+    until the file's mtime or size changes.
+    """
+    stat = os.stat(path)
+    signature = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    cached = _loaded.get(signature)
+    if cached is not None:
+        return cached
+
+    key = _content_hash(path)
+    matrix_path = os.path.join(cache_dir, f"distance_{key}.npy")
+    cities_path = os.path.join(cache_dir, f"distance_{key}.cities.json")
+
+    try:
+        with open(cities_path) as f:
+            cities = json.load(f)
+        matrix = np.load(matrix_path, mmap_mode='r')
+    except (OSError, ValueError):
+        cities, matrix = build_distance_matrix(pd.read_csv(path))
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            _write_atomic(matrix_path, lambda f: np.save(f, matrix))
+            _write_atomic(cities_path, lambda f: f.write(json.dumps(list(cities)).encode()))
+            matrix = np.load(matrix_path, mmap_mode='r')
+        except OSError as e:
+            # Read-only deploys still work, just without the on-disk cache
+            print(f"Warning: could not cache distance matrix: {e}")
+
+    result = DistanceMatrix(cities, matrix)
+    _loaded.clear()
+    _loaded[signature] = result
+    return result
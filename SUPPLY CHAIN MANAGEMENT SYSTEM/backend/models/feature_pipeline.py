@@ -0,0 +1,135 @@
+"""
+Shared feature engineering for the models
+Builds model inputs straight into one preallocated float32 matrix: calendar
+features come from a cached date -> features lookup (each distinct date is
+parsed once per process), and only the selected columns are ever copied
+"""
+
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+CALENDAR_FEATURES = ('year', 'month', 'day', 'day_of_week', 'quarter', 'week')
+
+# Distinct dates remembered per parse setting before the lookup starts over
+CALENDAR_CACHE_SIZE = int(os.environ.get("CALENDAR_CACHE_SIZE", "100000"))
+
+
+def calendar_features(parsed):
+    """Calendar feature columns (float32) for a DatetimeIndex, NaN where the date is missing"""
+    columns = {
+        'year': parsed.year,
+        'month': parsed.month,
+        'day': parsed.day,
+        'day_of_week': parsed.dayofweek,
+        'quarter': parsed.quarter,
+        'week': parsed.isocalendar().week.astype('Float64').to_numpy(dtype=np.float32, na_value=np.nan)
+    }
+    return np.column_stack([np.asarray(columns[name], dtype=np.float32) for name in CALENDAR_FEATURES])
+
+
+class CalendarLookup:
+    """Remembers the calendar features of every raw date value seen.
+
+    Raw values (strings as read from CSV, or timestamps) are factorized per
+    call, so pd.to_datetime only ever runs on dates this lookup has not
+    seen before; categorical columns reuse their own codes. One lookup is
+    kept per set of parse options. Row 0 of the table is all NaN and
+    stands for missing dates.
+    """
+
+    def __init__(self, max_dates=CALENDAR_CACHE_SIZE, **parse_options):
+        self.max_dates = max_dates
+        self.parse_options = parse_options
+        self._ids = {}  # raw value -> row in _table
+        self._table = np.full((1, len(CALENDAR_FEATURES)), np.nan, dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def _add(self, values, in_use):
+        """Parse and remember new values; the caller holds the lock"""
+        if len(self._ids) + len(values) > self.max_dates:
+            # Start over, keeping the dates the current call needs
+            self._ids, self._table = {}, self._table[:1]
+            values = in_use
+        parsed = pd.DatetimeIndex(pd.to_datetime(pd.Index(values, dtype=object), **self.parse_options))
+        start = len(self._table)
+        self._table = np.concatenate([self._table, calendar_features(parsed)])
+        self._ids.update(zip(values, range(start, start + len(values))))
+
+    def codes(self, values):
+        """(features per distinct value, code per value) for raw date values
+
+        The features of value i are features[codes[i]], with code -1 (a
+        missing date) picking the trailing NaN row. features is column-major
+        and has one row per distinct value, so callers gather just the
+        columns they need straight from the codes.
+        """
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = values.cat.codes.to_numpy()
+            uniques = list(values.cat.categories)
+        else:
+            codes, uniques = pd.factorize(np.asarray(values), use_na_sentinel=True)
+            uniques = list(uniques)
+        # Checked, filled in and gathered under one lock: another call may
+        # start the lookup over in between otherwise
+        with self._lock:
+            missing = [value for value in uniques if value not in self._ids]
+            if missing:
+                self._add(missing, uniques)
+            ids = np.array([self._ids[value] for value in uniques] + [0], dtype=np.intp)
+            features = np.asfortranarray(self._table[ids])
+        return features, codes
+
+    def lookup(self, values):
+        """Calendar feature rows (n x len(CALENDAR_FEATURES), float32) for raw date values"""
+        features, codes = self.codes(pd.Series(values))
+        return features[codes]
+
+
+_lookups = {}
+_lookups_lock = threading.Lock()
+
+
+def calendar_lookup(**parse_options):
+    """Shared CalendarLookup for the given pd.to_datetime options (e.g. dayfirst=True)"""
+    key = tuple(sorted(parse_options.items()))
+    with _lookups_lock:
+        if key not in _lookups:
+            _lookups[key] = CalendarLookup(**parse_options)
+        return _lookups[key]
+
+
+def build_features(df, feature_columns, date_col=None, derived=None, **parse_options):
+    """Model input frame holding only feature_columns, backed by one float32 matrix
+
+    Calendar columns (year, month, ...) are derived from date_col, columns
+    in derived (name -> array, e.g. encoded categories) are taken as given,
+    and every other column is read from df. df itself is never copied or
+    modified. The result is a DataFrame over the matrix, so the models keep
+    seeing their feature names.
+    """
+    derived = derived or {}
+    n = len(df)
+    # Column-major, so each feature is written contiguously and pandas can wrap it without a copy
+    X = np.empty((n, len(feature_columns)), dtype=np.float32, order='F')
+
+    calendar = None
+    if date_col is not None and any(col in CALENDAR_FEATURES for col in feature_columns):
+        calendar = calendar_lookup(**parse_options).codes(df[date_col])
+
+    for j, col in enumerate(feature_columns):
+        if col in derived:
+            X[:, j] = derived[col]
+        elif calendar is not None and col in CALENDAR_FEATURES:
+            features, codes = calendar
+            X[:, j] = features[:, CALENDAR_FEATURES.index(col)][codes]
+        else:
+            column = df[col]
+            if isinstance(column.dtype, pd.api.extensions.ExtensionDtype):
+                # Nullable / categorical columns: pd.NA becomes NaN
+                X[:, j] = column.to_numpy(dtype=np.float32, na_value=np.nan)
+            else:
+                X[:, j] = column.to_numpy()
+
+    return pd.DataFrame(X, columns=list(feature_columns), index=df.index, copy=False)
@@ -0,0 +1,48 @@
+"""
+Forecast input helpers shared by the forecasting models
+Builds one input frame covering a whole forecast horizon
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def compute_feature_defaults(df, numeric_cols, categorical_cols=()):
+    """Typical value of each non-date input: median for numbers, most frequent for categories"""
+    defaults = {}
+    for col in numeric_cols:
+        if col in df.columns:
+            defaults[col] = float(df[col].astype(float).median())
+    for col in categorical_cols:
+        if col in df.columns:
+            defaults[col] = str(df[col].astype(str).mode().iloc[0])
+    return defaults
+
+
+def forecast_interval(predictions, rmse=None, z=1.96):
+    """Predictions with a ~95% band of z times the model's test RMSE
+
+    Without a test RMSE (artifacts saved before it was recorded) the spread
+    of the predictions is used instead. Bounds never go below zero, since
+    every forecast here is a count or an amount of sales.
+    """
+    predictions = np.asarray(predictions, dtype=np.float64)
+    spread = z * (rmse if rmse is not None else predictions.std())
+    return {
+        'predicted': predictions.tolist(),
+        'lower': np.maximum(predictions - spread, 0).tolist(),
+        'upper': (predictions + spread).tolist()
+    }
+
+
+def horizon_frame(dates, date_col, input_cols, defaults, overrides=None):
+    """One row per forecast date, every other input held at its default or override"""
+    overrides = overrides or {}
+    n = len(dates)
+    data = {date_col: pd.DatetimeIndex(dates)}
+    for col in input_cols:
+        value = overrides.get(col)
+        if value is None:
+            value = defaults.get(col, 0)
+        data[col] = np.full(n, value, dtype=object if isinstance(value, str) else None)
+    return pd.DataFrame(data)
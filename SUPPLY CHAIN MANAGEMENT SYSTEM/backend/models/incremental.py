@@ -0,0 +1,142 @@
+"""
+Incremental (warm-start) retraining for the XGBoost models
+Continues boosting from a trained booster on newly appended rows, so a
+routine refresh adds a few trees instead of rebuilding the model. After a
+set number of updates the next refresh is a full rebuild, which keeps the
+tree count and the drift from warm starts in check.
+
+Usage (from backend/models/):
+    python incremental.py <model> <new_rows.csv> [--data full.csv] [--models-dir DIR]
+"""
+
+import argparse
+import hashlib
+import importlib
+import os
+
+import pandas as pd
+import xgboost as xgb
+from xgboost import XGBRegressor
+
+from artifacts import resolve_artifact
+
+# Trees added per update
+UPDATE_ROUNDS = int(os.environ.get("INCREMENTAL_UPDATE_ROUNDS", "20"))
+
+# Only the newest rows of each update are boosted on; 0 uses all of them
+REFRESH_WINDOW_ROWS = int(os.environ.get("INCREMENTAL_REFRESH_WINDOW_ROWS", "100000"))
+
+# Updates between full rebuilds
+FULL_REBUILD_EVERY = int(os.environ.get("INCREMENTAL_FULL_REBUILD_EVERY", "7"))
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Outcomes of update_model
+UPDATED = "updated"
+REBUILT = "rebuilt"
+
+# name -> (module, class, artifact) for the models with an update() path
+INCREMENTAL_MODELS = {
+    'demand_forecast': ('demand_forecast', 'DemandForecastModel', 'demand_forecast_model.pkl'),
+    'retail_demand': ('retail_demand_prediction', 'RetailDemandModel', 'retail_demand_model.pkl'),
+    'supplychain_demand': ('supplychain_demand_forecast', 'SupplyChainDemandModel', 'supplychain_demand_model.pkl'),
+    'walmart_sales': ('walmart_sales_forecast', 'WalmartSalesForecastModel', 'walmart_sales_model.pkl')
+}
+
+
+def rebuild_due(model, rebuild_every=FULL_REBUILD_EVERY):
+    return model.update_state['updates_since_rebuild'] >= rebuild_every
+
+
+def extend_data_hash(data_hash, rows):
+    """Training-data hash after boosting on rows: the previous hash chained with the rows' content"""
+    digest = hashlib.sha256((data_hash or '').encode())
+    digest.update(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def new_update_state():
+    """Update bookkeeping stored with a model: warm starts since the last full build"""
+    return {'updates_since_rebuild': 0, 'rows_since_rebuild': 0, 'trees': None}
+
+
+def continue_boosting(regressor, X, y, rounds=UPDATE_ROUNDS, n_jobs=None):
+    """A copy of regressor with `rounds` more trees boosted on (X, y)
+
+    The existing trees are kept as they are; new trees fit what they get
+    wrong on the new rows. The original regressor is left untouched, so a
+    failed update leaves the served model in place.
+    """
+    params = regressor.get_xgb_params()
+    if n_jobs is not None:
+        params['n_jobs'] = n_jobs
+    # Native training API: the sklearn wrapper's fit(xgb_model=...) does not
+    # start from the saved booster's margin
+    booster = xgb.train(params, xgb.DMatrix(X, label=y), num_boost_round=rounds,
+                        xgb_model=regressor.get_booster().copy())
+    updated = XGBRegressor(**regressor.get_params())
+    updated.load_model(bytearray(booster.save_raw(raw_format='ubj')))
+    return updated
+
+
+def update_model(model, new_data, data_path=None, rounds=UPDATE_ROUNDS,
+                 window=REFRESH_WINDOW_ROWS, rebuild_every=FULL_REBUILD_EVERY):
+    """Warm-start model.model on new_data, or rebuild it when one is due
+
+    model is one of the XGBoost forecasting models (it provides
+    prepare_features, target_col, update_state and train). Once
+    rebuild_every updates have been applied since the last full build, the
+    next call rebuilds from data_path, and raises ValueError without one.
+    The model's data_hash is chained with the rows each update boosts on.
+    Returns UPDATED or REBUILT.
+    """
+    state = model.update_state
+    if rebuild_due(model, rebuild_every):
+        if data_path is None:
+            raise ValueError(f"A full rebuild is due after {state['updates_since_rebuild']} "
+                             f"incremental updates; pass the full dataset (data_path)")
+        print(f"Full rebuild after {state['updates_since_rebuild']} incremental updates...")
+        model.train(data_path)
+        model.update_state = new_update_state()
+        return REBUILT
+
+    if model.model is None:
+        raise ValueError("Model not trained yet!")
+    rows = new_data.tail(window) if window else new_data
+    if len(rows) == 0:
+        raise ValueError("No new rows to update on")
+
+    X = model.prepare_features(rows)
+    y = rows[model.target_col]
+    model.model = continue_boosting(model.model, X, y, rounds, n_jobs=model.n_jobs)
+    model.data_hash = extend_data_hash(model.data_hash, rows)
+    state['updates_since_rebuild'] += 1
+    state['rows_since_rebuild'] += len(rows)
+    state['trees'] = model.model.get_booster().num_boosted_rounds()
+    print(f"Boosted {rounds} more trees on {len(rows)} rows "
+          f"({state['trees']} trees, update {state['updates_since_rebuild']}/{rebuild_every})")
+    return UPDATED
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm-start a trained model on new rows")
+    parser.add_argument('model', choices=sorted(INCREMENTAL_MODELS))
+    parser.add_argument('new_rows', help="CSV with the newly appended rows")
+    parser.add_argument('--data', help="full dataset; required when a full rebuild is due")
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    args = parser.parse_args(argv)
+
+    module, class_name, artifact = INCREMENTAL_MODELS[args.model]
+    model = getattr(importlib.import_module(module), class_name)()
+    model.load(resolve_artifact(args.models_dir, args.model, artifact))
+    if args.data is None and rebuild_due(model):
+        parser.error(f"{args.model} is due for a full rebuild "
+                     f"({model.update_state['updates_since_rebuild']} updates since the last one); pass --data")
+    outcome = model.update(pd.read_csv(args.new_rows), data_path=args.data)
+    # Always saved as a new version, which a running API picks up without a restart
+    model.save(os.path.join(args.models_dir, args.model))
+    print(f"✅ {args.model} {outcome}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,40 +6,55 @@ Trains on retail_demand.csv (169K rows) for product demand forecasting
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
+import xgboost as xgb
 from xgboost import XGBRegressor
-from sklearn.metrics import mean_absolute_error, r2_score
-import joblib
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import os
+from forecast_inputs import compute_feature_defaults, horizon_frame, forecast_interval
+from feature_pipeline import build_features
+from columnar_cache import read_dataset
+from artifacts import save_artifact, load_artifact, file_hash
+from incremental import update_model, new_update_state
+from categorical_encoder import CategoricalEncoder, load_encoders, save_encoders
+from chunked_training import (ChunkedCSVIter, StreamingDefaults, StreamingRegressionMetrics,
+                              iter_csv_chunks, holdout_mask, TRAIN_CHUNK_ROWS)
+
+# Datasets larger than this are streamed in chunks instead of loaded whole
+RETAIL_IN_MEMORY_MAX_MB = float(os.environ.get("RETAIL_IN_MEMORY_MAX_MB", "512"))
 
 class RetailDemandModel:
-    def __init__(self):
+    categorical_cols = ['Product_Code', 'Warehouse', 'Product_Category']
+    numeric_cols = ['Open', 'Promo', 'StateHoliday', 'SchoolHoliday', 'Petrol_price']
+    target_col = 'Order_Demand'
+    # CSV columns train() reads
+    train_columns = categorical_cols + ['Date'] + numeric_cols + [target_col]
+    
+    # Streamed reads keep only the model inputs, with numbers downcast to float32
+    stream_dtypes = {**{col: str for col in categorical_cols + ['Date']},
+                     **{col: np.float32 for col in numeric_cols + [target_col]}}
+    
+    def __init__(self, n_jobs=-1):
         self.model = None
+        self.data_hash = None  # hash of the training data, recorded in the artifact
+        self.n_jobs = n_jobs  # threads used by train(); -1 uses every core
         self.label_encoders = {}
         self.feature_columns = None
+        self.feature_defaults = {}
+        self.update_state = new_update_state()
+        self.test_rmse = None  # sets the width of forecast intervals
         
     def prepare_features(self, df):
         """Prepare features for retail demand prediction"""
-        data = df.copy()
-        
-        # Parse date
-        data['Date'] = pd.to_datetime(data['Date'], infer_datetime_format=True)
-        data['year'] = data['Date'].dt.year
-        data['month'] = data['Date'].dt.month
-        data['day'] = data['Date'].dt.day
-        data['day_of_week'] = data['Date'].dt.dayofweek
-        data['quarter'] = data['Date'].dt.quarter
-        
         # Encode categorical variables
-        categorical_cols = ['Product_Code', 'Warehouse', 'Product_Category']
-        
-        for col in categorical_cols:
-            if col in data.columns:
+        encoded = {}
+        for col in self.categorical_cols:
+            if col in df.columns:
                 if col not in self.label_encoders:
-                    self.label_encoders[col] = LabelEncoder()
-                    data[f'{col}_encoded'] = self.label_encoders[col].fit_transform(data[col].astype(str))
+                    self.label_encoders[col] = CategoricalEncoder()
+                    encoded[f'{col}_encoded'] = self.label_encoders[col].fit_transform(df[col])
                 else:
-                    data[f'{col}_encoded'] = self.label_encoders[col].transform(data[col].astype(str))
+                    # Values unseen in training get the reserved unknown code
+                    encoded[f'{col}_encoded'] = self.label_encoders[col].transform(df[col])
         
         # Select features
         feature_cols = [
@@ -49,12 +64,32 @@ class RetailDemandModel:
         ]
         
         self.feature_columns = feature_cols
-        return data[feature_cols]
+        # Date features come from the shared calendar lookup (each date parsed once)
+        return build_features(df, feature_cols, date_col='Date', derived=encoded)
+    
+    def _regressor(self):
+        return XGBRegressor(
+            n_estimators=120,
+            max_depth=8,
+            learning_rate=0.08,
+            random_state=42,
+            n_jobs=self.n_jobs
+        )
     
-    def train(self, data_path):
-        """Train retail demand prediction model"""
+    def train(self, data_path, out_of_core=None, chunk_rows=TRAIN_CHUNK_ROWS, cache_dir=None):
+        """Train retail demand prediction model
+        
+        out_of_core streams the CSV in chunks (see train_out_of_core); by
+        default that happens when the file is over RETAIL_IN_MEMORY_MAX_MB.
+        """
+        self.data_hash = file_hash(data_path)
+        if out_of_core is None:
+            out_of_core = os.path.getsize(data_path) > RETAIL_IN_MEMORY_MAX_MB * 1024 * 1024
+        if out_of_core:
+            return self.train_out_of_core(data_path, chunk_rows=chunk_rows, cache_dir=cache_dir)
+        
         print("Loading retail demand data...")
-        df = pd.read_csv(data_path)
+        df = read_dataset(data_path, columns=self.train_columns, as_category=['Date'])
         
         print(f"Dataset shape: {df.shape}")
         print(f"Unique products: {df['Product_Code'].nunique()}")
@@ -62,7 +97,8 @@ class RetailDemandModel:
         
         # Prepare features and target
         X = self.prepare_features(df)
-        y = df['Order_Demand']
+        y = df[self.target_col]
+        self.feature_defaults = compute_feature_defaults(df, self.numeric_cols, self.categorical_cols)
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
@@ -73,19 +109,14 @@ class RetailDemandModel:
         
         # Train XGBoost model
         print("Training XGBoost model for retail demand...")
-        self.model = XGBRegressor(
-            n_estimators=120,
-            max_depth=8,
-            learning_rate=0.08,
-            random_state=42,
-            n_jobs=-1
-        )
+        self.model = self._regressor()
         
         self.model.fit(X_train, y_train)
         
         # Evaluate
         train_pred = self.model.predict(X_train)
         test_pred = self.model.predict(X_test)
+        self.test_rmse = float(np.sqrt(mean_squared_error(y_test, test_pred)))
         
         print("\n=== Retail Demand Model Performance ===")
         print(f"Train MAE: {mean_absolute_error(y_train, train_pred):,.2f}")
@@ -93,7 +124,76 @@ class RetailDemandModel:
         print(f"Train R²: {r2_score(y_train, train_pred):.4f}")
         print(f"Test R²: {r2_score(y_test, test_pred):.4f}")
         
-        # Feature importance
+        self._print_top_features()
+        return self.model
+    
+    def train_out_of_core(self, data_path, chunk_rows=TRAIN_CHUNK_ROWS, cache_dir=None, test_size=0.2):
+        """Train from the CSV in chunks, with memory bounded by the chunk size
+        
+        A first pass fits the encoders and feature defaults. XGBoost then
+        reads the training rows through a data iterator into a quantized
+        QuantileDMatrix (or, with cache_dir, an external-memory DMatrix
+        paged to disk), and a last pass scores both splits. The test split
+        is picked by row hash, so it does not depend on the chunk size.
+        """
+        read_options = {'usecols': list(self.stream_dtypes), 'dtype': self.stream_dtypes}
+        
+        print("Streaming retail demand data...")
+        stats = StreamingDefaults(self.numeric_cols, self.categorical_cols)
+        rows = 0
+        for offset, chunk in iter_csv_chunks(data_path, chunk_rows, **read_options):
+            stats.update(offset, chunk)
+            rows += len(chunk)
+        self.label_encoders = {col: CategoricalEncoder().fit(stats.categories(col))
+                               for col in self.categorical_cols}
+        self.feature_defaults = stats.defaults()
+        
+        print(f"Dataset shape: ({rows}, {len(self.stream_dtypes)})")
+        print(f"Unique products: {len(self.label_encoders['Product_Code'])}")
+        print(f"Unique warehouses: {len(self.label_encoders['Warehouse'])}")
+        
+        def training_rows(offset, chunk):
+            chunk = chunk[~holdout_mask(offset, len(chunk), test_size)]
+            return self.prepare_features(chunk), chunk[self.target_col].to_numpy(dtype=np.float32)
+        
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            batches = ChunkedCSVIter(data_path, training_rows, chunk_rows,
+                                     cache_prefix=os.path.join(cache_dir, 'retail_demand'), **read_options)
+            dtrain = xgb.DMatrix(batches)
+        else:
+            batches = ChunkedCSVIter(data_path, training_rows, chunk_rows, **read_options)
+            dtrain = xgb.QuantileDMatrix(batches)
+        
+        print(f"Training set size: ({dtrain.num_row()}, {dtrain.num_col()})")
+        
+        print("Training XGBoost model for retail demand (out of core)...")
+        model = self._regressor()
+        booster = xgb.train(model.get_xgb_params(), dtrain, num_boost_round=model.n_estimators)
+        # Hand the booster to the sklearn wrapper, so the artifact looks like any other
+        model.load_model(bytearray(booster.save_raw(raw_format='ubj')))
+        self.model = model
+        del dtrain, batches
+        
+        train_metrics, test_metrics = StreamingRegressionMetrics(), StreamingRegressionMetrics()
+        for offset, chunk in iter_csv_chunks(data_path, chunk_rows, **read_options):
+            test = holdout_mask(offset, len(chunk), test_size)
+            y = chunk[self.target_col].to_numpy(dtype=np.float64)
+            pred = self.model.predict(self.prepare_features(chunk))
+            train_metrics.update(y[~test], pred[~test])
+            test_metrics.update(y[test], pred[test])
+        self.test_rmse = test_metrics.rmse
+        
+        print("\n=== Retail Demand Model Performance ===")
+        print(f"Train MAE: {train_metrics.mae:,.2f}")
+        print(f"Test MAE: {test_metrics.mae:,.2f}")
+        print(f"Train R²: {train_metrics.r2:.4f}")
+        print(f"Test R²: {test_metrics.r2:.4f}")
+        
+        self._print_top_features()
+        return self.model
+    
+    def _print_top_features(self):
         feature_importance = pd.DataFrame({
             'feature': self.feature_columns,
             'importance': self.model.feature_importances_
@@ -101,8 +201,6 @@ class RetailDemandModel:
         
         print("\n=== Top Features ===")
         print(feature_importance.head(8))
-        
-        return self.model
     
     def predict(self, input_data):
         """Predict retail demand"""
@@ -114,26 +212,64 @@ class RetailDemandModel:
         
         return predictions
     
+    def forecast_output(self, predictions):
+        """Attach confidence intervals to raw predictions"""
+        return forecast_interval(predictions, self.test_rmse)
+    
+    def forecast_features(self, dates, product_code=None, warehouse=None):
+        """Feature matrix with one row per forecast date"""
+        defaults = dict(self.feature_defaults)
+        for col, encoder in self.label_encoders.items():
+            defaults.setdefault(col, str(encoder.classes_[0]))
+        
+        # Only use identifiers the encoders have seen; others fall back to defaults
+        overrides = {}
+        for col, value in (('Product_Code', product_code), ('Warehouse', warehouse)):
+            if col in self.label_encoders and value in self.label_encoders[col]:
+                overrides[col] = value
+        
+        frame = horizon_frame(dates, 'Date', self.categorical_cols + self.numeric_cols,
+                              defaults, overrides)
+        return self.prepare_features(frame)
+    
+    def forecast(self, dates, product_code=None, warehouse=None):
+        """Predict demand for every date in one batched predict call"""
+        if self.model is None:
+            raise ValueError("Model not trained yet!")
+        
+        X = self.forecast_features(dates, product_code=product_code, warehouse=warehouse)
+        return self.forecast_output(self.model.predict(X))
+    
+    def update(self, new_data, data_path=None):
+        """Continue boosting on newly appended rows; a full rebuild from data_path when one is due"""
+        return update_model(self, new_data, data_path=data_path)
+    
     def save(self, path):
-        """Save model"""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        joblib.dump({
+        """Save model as a new artifact version (or one .pkl file, for a .pkl path)"""
+        save_artifact(path, {
             'model': self.model,
-            'label_encoders': self.label_encoders,
-            'feature_columns': self.feature_columns
-        }, path)
+            'label_encoders': save_encoders(self.label_encoders),
+            'feature_columns': self.feature_columns,
+            'feature_defaults': self.feature_defaults,
+            'update_state': self.update_state,
+            'test_rmse': self.test_rmse
+        }, data_hash=self.data_hash)
         print(f"Model saved to {path}")
     
     def load(self, path):
         """Load model"""
-        data = joblib.load(path)
+        data = load_artifact(path)
+        self.data_hash = data.get('data_hash')
         self.model = data['model']
-        self.label_encoders = data['label_encoders']
+        self.label_encoders = load_encoders(data['label_encoders'])
         self.feature_columns = data['feature_columns']
+        self.feature_defaults = data.get('feature_defaults', {})
+        self.update_state = data.get('update_state') or new_update_state()
+        self.test_rmse = data.get('test_rmse')
         print(f"Model loaded from {path}")
 
 if __name__ == "__main__":
     model = RetailDemandModel()
     model.train("../../DATA SETS/retail_demand.csv")
-    model.save("../backend/models/retail_demand_model.pkl")
+    model.save("../backend/models/retail_demand")
     print("\n✅ Retail Demand Model trained and saved!")
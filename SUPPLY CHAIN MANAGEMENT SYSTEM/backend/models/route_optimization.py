@@ -8,32 +8,52 @@ import numpy as np
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
-import joblib
 import os
+from route_solver import solve_routes
+from shipment_scheduler import schedule_shipments
+from feature_pipeline import build_features
+from columnar_cache import read_dataset
+from artifacts import save_artifact, load_artifact, file_hash
+
+# Search budget for a request = summed predicted reference solve times * scale,
+# clipped to [min, max] seconds. The model predicts vehicle_routing.csv's
+# computational_time, which runs 1,000-13,000x longer than one savings +
+# local search start of route_solver (e.g. 9.6s predicted vs 5ms for 100
+# customers, 1650s vs 130ms for 600), so even the clipped budget covers
+# many starts; multi_start usually stops earlier, once restarts stop helping.
+SEARCH_BUDGET_SCALE = float(os.environ.get("ROUTE_SEARCH_BUDGET_SCALE", "0.1"))
+SEARCH_BUDGET_MIN = float(os.environ.get("ROUTE_SEARCH_BUDGET_MIN", "0.5"))
+SEARCH_BUDGET_MAX = float(os.environ.get("ROUTE_SEARCH_BUDGET_MAX", "10"))
 
 class RouteOptimizationModel:
-    def __init__(self):
+    # Model inputs: summary statistics of a routing instance
+    input_cols = [
+        'min_distance_depot', 'average_distance_depot', 'max_distance_depot',
+        'min_distance_nondepot', 'average_distance_nondepot', 'max_distance_nondepot',
+        'min_demand', 'average_demand', 'max_demand',
+        'num_customers', 'vehicle_capacity'
+    ]
+    # CSV columns train() reads
+    train_columns = input_cols + ['computational_time']
+    
+    def __init__(self, n_jobs=-1):
         self.model = None
+        self.data_hash = None  # hash of the training data, recorded in the artifact
+        self.n_jobs = n_jobs  # unused: GradientBoostingRegressor trains on one core
         self.feature_columns = None
         
     def prepare_features(self, df):
         """Prepare features for training"""
-        data = df.copy()
-        
-        feature_cols = [
-            'min_distance_depot', 'average_distance_depot', 'max_distance_depot',
-            'min_distance_nondepot', 'average_distance_nondepot', 'max_distance_nondepot',
-            'min_demand', 'average_demand', 'max_demand',
-            'num_customers', 'vehicle_capacity'
-        ]
+        feature_cols = list(self.input_cols)
         
         self.feature_columns = feature_cols
-        return data[feature_cols]
+        return build_features(df, feature_cols)
     
     def train(self, data_path):
         """Train the route optimization model"""
         print("Loading data...")
-        df = pd.read_csv(data_path)
+        df = read_dataset(data_path, columns=self.train_columns)
+        self.data_hash = file_hash(data_path)
         
         print(f"Dataset shape: {df.shape}")
         
@@ -71,52 +91,55 @@ class RouteOptimizationModel:
         
         return self.model
     
+    def predict_solve_time(self, stats):
+        """Predicted computational_time (seconds) for an instance's statistics"""
+        if self.model is None:
+            raise ValueError("Model not trained yet!")
+        X = pd.DataFrame([stats], columns=self.feature_columns)
+        return float(self.model.predict(X)[0])
+    
+    def search_budgets(self, group_stats, max_seconds=SEARCH_BUDGET_MAX):
+        """Seconds of multi-start search for each depot group of one request
+
+        One budget for the whole request is split across the groups in
+        proportion to their predicted solve times, so together they never
+        take longer than max_seconds.
+        """
+        if not group_stats:
+            return []
+        predicted = np.maximum([self.predict_solve_time(stats) for stats in group_stats], 0.0)
+        total = min(max(float(predicted.sum()) * SEARCH_BUDGET_SCALE, SEARCH_BUDGET_MIN), max_seconds)
+        if predicted.sum() <= 0:
+            return [total / len(group_stats)] * len(group_stats)
+        return (total * predicted / predicted.sum()).tolist()
+    
     def optimize_route(self, orders, vehicle_capacity=500):
-        """Optimize route for given orders"""
-        # Simple greedy algorithm for route optimization
-        # In production, you'd use OR-Tools or similar
-        
-        optimized_stops = []
-        total_distance = 0
-        total_time = 0
+        """Optimize delivery routes for the given orders
         
-        for idx, order in enumerate(orders):
-            # Calculate estimated time based on distance
-            distance = np.random.uniform(5, 50)  # km
-            time = distance * 2 + 15  # 2 min per km + 15 min stop time
-            
-            total_distance += distance
-            total_time += time
-            
-            optimized_stops.append({
-                'sequence': idx + 1,
-                'order_id': order.get('order_id', f'ORD-{idx+1:04d}'),
-                'address': order.get('address', f'Address {idx+1}'),
-                'eta': f"{int(total_time // 60)}:{int(total_time % 60):02d}",
-                'distance_from_prev': round(distance, 2)
-            })
-        
-        return {
-            'vehicle_id': 'V-001',
-            'stops': optimized_stops,
-            'total_distance_km': round(total_distance, 2),
-            'total_time_minutes': round(total_time, 2),
-            'vehicle_capacity': vehicle_capacity,
-            'optimization_score': round(np.random.uniform(85, 95), 1)
-        }
+        Solves a capacitated vehicle routing problem over the city distances
+        in distance.csv (see route_solver.py), using several vehicles when
+        the orders don't fit in one. When trained, the predicted solve time
+        sets how long the multi-start search may run.
+        """
+        budgets = self.search_budgets if self.model is not None else None
+        return solve_routes(orders, vehicle_capacity, budgets=budgets)
+    
+    def schedule_shipments(self, items, vehicle_capacity, area_capacity=None):
+        """Assign order_large.csv style items to departures within their time windows"""
+        return schedule_shipments(items, vehicle_capacity, area_capacity)
     
     def save(self, path):
-        """Save model"""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        joblib.dump({
+        """Save model as a new artifact version (or one .pkl file, for a .pkl path)"""
+        save_artifact(path, {
             'model': self.model,
             'feature_columns': self.feature_columns
-        }, path)
+        }, data_hash=self.data_hash)
         print(f"Model saved to {path}")
     
     def load(self, path):
         """Load model"""
-        data = joblib.load(path)
+        data = load_artifact(path)
+        self.data_hash = data.get('data_hash')
         self.model = data['model']
         self.feature_columns = data['feature_columns']
         print(f"Model loaded from {path}")
@@ -127,6 +150,6 @@ if __name__ == "__main__":
     data_path = "../../DATA SETS/vehicle_routing.csv"
     
     model.train(data_path)
-    model.save("../backend/models/route_optimization_model.pkl")
+    model.save("../backend/models/route_optimization")
     
     print("\n✅ Route Optimization Model trained and saved!")
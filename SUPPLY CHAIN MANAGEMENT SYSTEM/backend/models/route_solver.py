@@ -0,0 +1,513 @@
+"""
+Capacitated vehicle routing (CVRP) over the city distances in distance.csv
+Clarke-Wright savings builds the initial routes, then 2-opt and or-opt
+local search improve them; every move is evaluated with NumPy
+"""
+
+import os
+import time
+
+import numpy as np
+
+from distance_matrix import DISTANCE_PATH, load_distance_matrix
+
+# Travel time model: 2 min per km + 15 min per stop
+MINUTES_PER_KM = 2
+STOP_MINUTES = 15
+
+DEFAULT_CAPACITY = 500
+SAVINGS_NEIGHBORS = 40        # savings candidates per customer (nearest neighbours)
+OR_OPT_MAX_SEGMENT = 3        # or-opt moves chains of up to this many stops
+MOVE_CHUNK = 512              # segments evaluated per NumPy block in or-opt
+LOCAL_SEARCH_SECONDS = float(os.environ.get("ROUTE_LOCAL_SEARCH_SECONDS", "2.0"))
+SAVINGS_NOISE = 0.2           # randomized starts scale each saving by U(1 - noise, 1 + noise)
+MULTI_START_MIN_NODES = 8     # smaller instances are solved with a single start
+# Multi-start stops after this many starts in a row without a cheaper solution
+MULTI_START_PATIENCE = int(os.environ.get("ROUTE_MULTI_START_PATIENCE", "10"))
+
+# Keys read from each order, in priority order
+DEMAND_KEYS = ('demand', 'quantity', 'Weight', 'weight')
+DESTINATION_KEYS = ('destination', 'Destination', 'city', 'City')
+SOURCE_KEYS = ('source', 'Source', 'depot')
+ORDER_ID_KEYS = ('order_id', 'Order_ID', 'orderId', 'id')
+
+_EPS = 1e-9
+
+
+def _first(order, keys, default=None):
+    for key in keys:
+        value = order.get(key)
+        if value is not None and value != "":
+            return value
+    return default
+
+
+def default_depot(matrix):
+    """Most central city (smallest total distance to all others)"""
+    return int(np.argmin(matrix.sum(axis=1, dtype=np.int64) + matrix.sum(axis=0, dtype=np.int64)))
+
+
+def route_cost(route, dist):
+    """Length of depot -> route -> depot for node ids into dist (0 is the depot)"""
+    path = np.concatenate(([0], route, [0]))
+    return float(dist[path[:-1], path[1:]].sum())
+
+
+# ---------------------------------------------------------------------------
+# Construction: Clarke-Wright savings
+# ---------------------------------------------------------------------------
+
+def savings_routes(dist, demand, capacity, neighbors=SAVINGS_NEIGHBORS, rng=None, noise=0.0):
+    """Parallel savings heuristic; returns routes as lists of node ids (1..n)
+
+    With an rng, savings are randomly perturbed so repeated calls give
+    different starting solutions.
+    """
+    n = len(dist) - 1
+    if n <= 0:
+        return []
+    if n == 1:
+        return [[1]]
+
+    # Only the nearest neighbours of each customer are savings candidates
+    k = min(neighbors, n - 1)
+    between = dist[1:, 1:].copy()
+    np.fill_diagonal(between, np.inf)
+    nearest = np.argpartition(between, k - 1, axis=1)[:, :k]
+    tails = np.repeat(np.arange(1, n + 1), k)
+    heads = nearest.ravel() + 1
+    # Saving of driving tail -> head directly instead of via the depot
+    savings = dist[tails, 0] + dist[0, heads] - dist[tails, heads]
+    keep = savings > _EPS
+    if rng is not None and noise > 0:
+        savings = savings * rng.uniform(1.0 - noise, 1.0 + noise, size=len(savings))
+    order = np.argsort(-savings[keep], kind='stable')
+    tails, heads = tails[keep][order], heads[keep][order]
+
+    parent = list(range(n + 1))
+    first = list(range(n + 1))
+    last = list(range(n + 1))
+    load = [float(x) for x in demand]
+    successor = [0] * (n + 1)
+
+    def find(node):
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    for tail, head in zip(tails.tolist(), heads.tolist()):
+        a, b = find(tail), find(head)
+        if a == b or last[a] != tail or first[b] != head:
+            continue
+        if load[a] + load[b] > capacity:
+            continue
+        successor[tail] = head
+        parent[b] = a
+        last[a] = last[b]
+        load[a] += load[b]
+
+    routes = []
+    for node in range(1, n + 1):
+        if find(node) == node:
+            route, current = [], first[node]
+            while current:
+                route.append(current)
+                current = successor[current]
+            routes.append(route)
+    return routes
+
+
+# ---------------------------------------------------------------------------
+# Local search
+# ---------------------------------------------------------------------------
+
+def two_opt(route, dist):
+    """Best-improvement 2-opt on one route; exact for asymmetric distances"""
+    path = np.concatenate(([0], route, [0]))
+    m = len(path)
+    if m < 5:
+        return list(route), False
+
+    i = np.arange(m - 1)[:, None]
+    j = np.arange(m - 1)[None, :]
+    valid = (j >= i + 2) & (j <= m - 2)
+    changed = False
+    while True:
+        forward = dist[path[:-1], path[1:]]
+        backward = dist[path[1:], path[:-1]]
+        F = np.concatenate(([0.0], np.cumsum(forward)))
+        B = np.concatenate(([0.0], np.cumsum(backward)))
+        # Reverse path[i+1..j]: replace edges (i, i+1), (j, j+1) and flip the segment
+        ii = np.minimum(i + 1, m - 1)
+        jj = np.minimum(j + 1, m - 1)
+        delta = (dist[path[i], path[j]] + dist[path[ii], path[jj]]
+                 - forward[i] - forward[j]
+                 + (B[j] - B[ii]) - (F[j] - F[ii]))
+        delta = np.where(valid, delta, np.inf)
+        best = int(np.argmin(delta))
+        bi, bj = divmod(best, m - 1)
+        if delta[bi, bj] >= -_EPS:
+            break
+        path[bi + 1:bj + 1] = path[bi + 1:bj + 1][::-1]
+        changed = True
+    return path[1:-1].tolist(), changed
+
+
+def _segments(routes, demand, max_segment):
+    """All chains of 1..max_segment consecutive stops as flat arrays"""
+    seg_route, seg_start, seg_len = [], [], []
+    for r, route in enumerate(routes):
+        m = len(route)
+        for length in range(1, min(max_segment, m) + 1):
+            starts = np.arange(1, m - length + 2)  # position in the depot-padded path
+            seg_route.append(np.full(len(starts), r))
+            seg_start.append(starts)
+            seg_len.append(np.full(len(starts), length))
+    if not seg_route:
+        empty = np.zeros(0, dtype=int)
+        return empty, empty, empty
+    return np.concatenate(seg_route), np.concatenate(seg_start), np.concatenate(seg_len)
+
+
+def or_opt(routes, dist, demand, capacity, max_segment=OR_OPT_MAX_SEGMENT, chunk=MOVE_CHUNK):
+    """One or-opt pass: relocate chains of stops within or between routes
+
+    All (segment, insertion edge) pairs are scored in NumPy blocks. The
+    improving moves are applied best first, skipping moves that touch a
+    route already changed in this pass. Returns (routes, ids of the changed
+    routes in the returned list, whether any move was applied).
+    """
+    paths = [np.concatenate(([0], route, [0])) for route in routes]
+    loads = np.array([demand[route].sum() for route in routes], dtype=float)
+
+    edge_from = np.concatenate([p[:-1] for p in paths])
+    edge_to = np.concatenate([p[1:] for p in paths])
+    edge_route = np.concatenate([np.full(len(p) - 1, r) for r, p in enumerate(paths)])
+    edge_pos = np.concatenate([np.arange(len(p) - 1) for p in paths])
+    edge_cost = dist[edge_from, edge_to]
+
+    seg_route, seg_start, seg_len = _segments(routes, demand, max_segment)
+    if len(seg_route) == 0:
+        return routes, set(), False
+
+    offsets = np.concatenate(([0], np.cumsum([len(p) for p in paths])))
+    flat = np.concatenate(paths)
+    cum_demand = np.concatenate(([0.0], np.cumsum(demand[flat])))
+    base = offsets[seg_route] + seg_start
+    first = flat[base]
+    last = flat[base + seg_len - 1]
+    prev = flat[base - 1]
+    nxt = flat[base + seg_len]
+    seg_load = cum_demand[base + seg_len] - cum_demand[base]
+    removal_gain = dist[prev, first] + dist[last, nxt] - dist[prev, nxt]
+
+    moves = []
+    for lo in range(0, len(seg_route), chunk):
+        hi = min(lo + chunk, len(seg_route))
+        delta = (dist[edge_from[None, :], first[lo:hi, None]]
+                 + dist[last[lo:hi, None], edge_to[None, :]]
+                 - edge_cost[None, :]
+                 - removal_gain[lo:hi, None])
+        same = edge_route[None, :] == seg_route[lo:hi, None]
+        # Edges touching the segment itself are not insertion points
+        touching = same & (edge_pos[None, :] >= seg_start[lo:hi, None] - 1) \
+            & (edge_pos[None, :] <= (seg_start + seg_len - 1)[lo:hi, None])
+        overload = ~same & (loads[edge_route][None, :] + seg_load[lo:hi, None] > capacity + _EPS)
+        delta[touching | overload] = np.inf
+
+        best_edge = np.argmin(delta, axis=1)
+        best_delta = delta[np.arange(hi - lo), best_edge]
+        improving = np.flatnonzero(best_delta < -_EPS)
+        moves.extend(zip(best_delta[improving].tolist(), (improving + lo).tolist(),
+                         best_edge[improving].tolist()))
+
+    routes = [list(route) for route in routes]
+    touched = set()
+    for _, s, e in sorted(moves):
+        source, target = int(seg_route[s]), int(edge_route[e])
+        if source in touched or target in touched:
+            continue
+        start, length, position = int(seg_start[s]) - 1, int(seg_len[s]), int(edge_pos[e])
+        segment = routes[source][start:start + length]
+        del routes[source][start:start + length]
+        if source == target and position > start:
+            position -= length
+        routes[target][position:position] = segment
+        touched.update((source, target))
+
+    # Emptied routes are dropped (one vehicle fewer); renumber the changed ids
+    kept = [r for r, route in enumerate(routes) if route]
+    renumber = {old: new for new, old in enumerate(kept)}
+    return [routes[r] for r in kept], {renumber[r] for r in touched if r in renumber}, bool(touched)
+
+
+def local_search(routes, dist, demand, capacity, deadline):
+    """2-opt + or-opt until no move improves or the deadline (perf_counter) passes"""
+    dirty = set(range(len(routes)))
+    while True:
+        for r in dirty:
+            if r < len(routes):
+                routes[r], _ = two_opt(routes[r], dist)
+        if time.perf_counter() >= deadline:
+            break
+        routes, dirty, moved = or_opt(routes, dist, demand, capacity)
+        if not moved:
+            break
+    return routes
+
+
+def total_cost(routes, dist):
+    return sum(route_cost(route, dist) for route in routes)
+
+
+def solve_cvrp(dist, demand, capacity, time_limit=LOCAL_SEARCH_SECONDS):
+    """Routes (lists of node ids) for a depot at node 0 and customers 1..n"""
+    demand = np.asarray(demand, dtype=float)
+    routes = savings_routes(dist, demand, capacity)
+    return local_search(routes, dist, demand, capacity, time.perf_counter() + time_limit)
+
+
+def multi_start(dist, demand, capacity, budget=None, seed=0, patience=MULTI_START_PATIENCE):
+    """Best of repeated randomized savings + local search starts within budget seconds
+
+    Returns (cost, routes, starts). Seed 0 begins with the unperturbed
+    savings solution. Stops early once `patience` starts in a row found
+    nothing cheaper. Without a budget, or for tiny instances, a single
+    start is run. Module-level so it can run in a process pool: give each
+    worker its own seed and keep the cheapest result.
+    """
+    demand = np.asarray(demand, dtype=float)
+    began = time.perf_counter()
+    if budget is None or len(dist) - 1 < MULTI_START_MIN_NODES:
+        routes = solve_cvrp(dist, demand, capacity)
+        return total_cost(routes, dist), routes, 1
+
+    deadline = began + budget
+    rng = np.random.default_rng(seed)
+    best_cost, best_routes, starts, stale = np.inf, [], 0, 0
+    while True:
+        if starts == 0 and seed == 0:
+            routes = savings_routes(dist, demand, capacity)
+        else:
+            neighbors = int(rng.integers(SAVINGS_NEIGHBORS // 2, SAVINGS_NEIGHBORS * 2))
+            routes = savings_routes(dist, demand, capacity, neighbors, rng, SAVINGS_NOISE)
+        routes = local_search(routes, dist, demand, capacity,
+                              min(deadline, time.perf_counter() + LOCAL_SEARCH_SECONDS))
+        cost = total_cost(routes, dist)
+        starts += 1
+        if cost < best_cost - _EPS:
+            best_cost, best_routes, stale = cost, routes, 0
+        else:
+            stale += 1
+        if stale >= patience or time.perf_counter() >= deadline:
+            break
+    return best_cost, best_routes, starts
+
+
+# ---------------------------------------------------------------------------
+# Orders -> routes
+# ---------------------------------------------------------------------------
+
+def _pack(order_ids, demands, capacity):
+    """Split one city's orders into loads that each fit a vehicle (first-fit decreasing)"""
+    bins, fill = [], []
+    for i in sorted(order_ids, key=lambda i: -demands[i]):
+        for b, used in enumerate(fill):
+            if used + demands[i] <= capacity + _EPS:
+                bins[b].append(i)
+                fill[b] += demands[i]
+                break
+        else:
+            bins.append([i])
+            fill.append(demands[i])
+    return bins
+
+
+def _baseline_distance(sequence, demands, depot, matrix, capacity):
+    """Distance when orders are served in input order, starting a new vehicle when full"""
+    if len(sequence) == 0:
+        return 0.0
+    # Which vehicle trip each order lands on
+    trip, load, trips = np.zeros(len(sequence), dtype=np.int64), 0.0, 0
+    for k, demand in enumerate(demands.tolist()):
+        if load + demand > capacity + _EPS:
+            trips, load = trips + 1, 0.0
+        load += demand
+        trip[k] = trips
+    starts = np.r_[True, trip[1:] != trip[:-1]]
+    ends = np.r_[starts[1:], True]
+    previous = np.where(starts, depot, np.r_[depot, sequence[:-1]])
+    return float(matrix[previous, sequence].sum(dtype=np.float64)
+                 + matrix[sequence[ends], depot].sum(dtype=np.float64))
+
+
+def prepare_instance(orders, vehicle_capacity=DEFAULT_CAPACITY, distance_path=DISTANCE_PATH):
+    """Turn order dicts into one CVRP per depot
+
+    Each order's city comes from destination/Destination/city, its depot
+    from source/Source (default: the most central city) and its load from
+    demand/quantity/Weight (default 1). Orders for the same city are
+    combined into as few vehicle loads as possible; each load is one node.
+    Raises ValueError for an order whose destination is missing or whose
+    destination or source is not a city in distance.csv.
+    """
+    capacity = float(vehicle_capacity or DEFAULT_CAPACITY)
+    distances = load_distance_matrix(distance_path)
+    cities, index, matrix = distances.cities, distances.index, distances.matrix
+    central = default_depot(matrix)
+
+    n = len(orders)
+    order_ids = [str(_first(o, ORDER_ID_KEYS, f"ORD-{i + 1:04d}")) for i, o in enumerate(orders)]
+    demands = np.array([float(_first(o, DEMAND_KEYS, 1)) for o in orders]) if n else np.zeros(0)
+    depots = np.empty(n, dtype=int)
+    destinations = np.empty(n, dtype=int)
+    for i, order in enumerate(orders):
+        city, source = _first(order, DESTINATION_KEYS), _first(order, SOURCE_KEYS)
+        if city is None:
+            raise ValueError(f"Order {order_ids[i]} has no destination city")
+        if city not in index:
+            raise ValueError(f"Order {order_ids[i]} destination {city!r} is not a city in the distance data")
+        if source is not None and source not in index:
+            raise ValueError(f"Order {order_ids[i]} source {source!r} is not a city in the distance data")
+        destinations[i] = index[city]
+        depots[i] = central if source is None else index[source]
+
+    too_heavy = np.flatnonzero(demands > capacity + _EPS)
+    if len(too_heavy):
+        i = int(too_heavy[0])
+        raise ValueError(f"Order {order_ids[i]} demand {demands[i]:g} exceeds vehicle capacity {capacity:g}")
+
+    groups = []
+    for depot in np.unique(depots):
+        members = np.flatnonzero(depots == depot)
+        nodes, node_city = [], []
+        for city in np.unique(destinations[members]):
+            at_city = members[destinations[members] == city].tolist()
+            for load in _pack(at_city, demands, capacity):
+                nodes.append(load)
+                node_city.append(city)
+        node_city = np.array([depot] + node_city, dtype=int)
+        groups.append({
+            'depot': int(depot),
+            'nodes': nodes,
+            'node_demand': np.array([0.0] + [demands[load].sum() for load in nodes]),
+            'dist': distances.submatrix(node_city),
+            'baseline': _baseline_distance(destinations[members], demands[members], depot, matrix, capacity)
+        })
+
+    return {
+        'orders': orders,
+        'order_ids': order_ids,
+        'destinations': destinations,
+        'cities': cities,
+        'capacity': capacity,
+        'vehicle_capacity': vehicle_capacity,
+        'groups': groups
+    }
+
+
+def instance_stats(group, capacity):
+    """The vehicle_routing.csv features of one depot's CVRP
+
+    Distances are in km and demands are rescaled so the vehicle capacity is
+    500, roughly the units of the instances the solve-time model was trained on.
+    """
+    dist, demand = group['dist'] / 1000.0, group['node_demand'][1:] * 500.0 / capacity
+    n = len(demand)
+    between = dist[1:, 1:][~np.eye(n, dtype=bool)] if n > 1 else np.zeros(1)
+    depot = dist[0, 1:] if n else np.zeros(1)
+    demand = demand if n else np.zeros(1)
+    return {
+        'min_distance_depot': float(depot.min()),
+        'average_distance_depot': float(depot.mean()),
+        'max_distance_depot': float(depot.max()),
+        'min_distance_nondepot': float(between.min()),
+        'average_distance_nondepot': float(between.mean()),
+        'max_distance_nondepot': float(between.max()),
+        'min_demand': float(demand.min()),
+        'average_demand': float(demand.mean()),
+        'max_demand': float(demand.max()),
+        'num_customers': n,
+        'vehicle_capacity': 500.0
+    }
+
+
+def routes_result(instance, group_routes):
+    """Response dict for the routes chosen for each depot group"""
+    orders, order_ids = instance['orders'], instance['order_ids']
+    destinations, cities = instance['destinations'], instance['cities']
+
+    all_routes, stops = [], []
+    total_distance = total_time = baseline = 0.0
+    for group, routes in zip(instance['groups'], group_routes):
+        dist, nodes, node_demand = group['dist'], group['nodes'], group['node_demand']
+        baseline += group['baseline']
+        for route in routes:
+            vehicle_id = f"V-{len(all_routes) + 1:03d}"
+            minutes, distance, position = 0.0, 0.0, 0
+            first_sequence = len(stops) + 1
+            for node in route:
+                leg_km = dist[position, node] / 1000.0
+                for k, i in enumerate(nodes[node - 1]):
+                    leg = leg_km if k == 0 else 0.0
+                    distance += leg
+                    minutes += leg * MINUTES_PER_KM + STOP_MINUTES
+                    stops.append({
+                        'sequence': len(stops) + 1,
+                        'vehicle_id': vehicle_id,
+                        'order_id': order_ids[i],
+                        'address': orders[i].get('address', cities[destinations[i]]),
+                        'city': cities[destinations[i]],
+                        'eta': f"{int(minutes // 60)}:{int(minutes % 60):02d}",
+                        'distance_from_prev': round(leg, 2)
+                    })
+                position = node
+            back_km = dist[position, 0] / 1000.0
+            distance += back_km
+            minutes += back_km * MINUTES_PER_KM
+            total_distance += distance
+            total_time += minutes
+            all_routes.append({
+                'vehicle_id': vehicle_id,
+                'depot': cities[group['depot']],
+                'load': round(float(node_demand[route].sum()), 2),
+                'num_stops': len(stops) - first_sequence + 1,
+                'first_sequence': first_sequence,
+                'distance_km': round(distance, 2),
+                'time_minutes': round(minutes, 2)
+            })
+
+    baseline_km = baseline / 1000.0
+    saved = 100.0 * (1.0 - total_distance / baseline_km) if baseline_km > 0 else 0.0
+    return {
+        'vehicle_id': all_routes[0]['vehicle_id'] if all_routes else None,
+        'stops': stops,
+        'routes': all_routes,
+        'vehicles_used': len(all_routes),
+        'total_distance_km': round(total_distance, 2),
+        'total_time_minutes': round(total_time, 2),
+        'baseline_distance_km': round(baseline_km, 2),
+        'vehicle_capacity': instance['vehicle_capacity'],
+        'optimization_score': round(max(saved, 0.0), 1)
+    }
+
+
+def solve_routes(orders, vehicle_capacity=DEFAULT_CAPACITY, budgets=None, distance_path=DISTANCE_PATH):
+    """Plan vehicle routes for a list of order dicts in this process
+
+    budgets, if given, maps the instance_stats() of every depot's problem
+    to multi-start search times in seconds, one per depot; otherwise one
+    start is run per depot.
+    """
+    instance = prepare_instance(orders, vehicle_capacity, distance_path)
+    seconds = [None] * len(instance['groups'])
+    if budgets:
+        seconds = budgets([instance_stats(group, instance['capacity']) for group in instance['groups']])
+    group_routes = []
+    for group, budget in zip(instance['groups'], seconds):
+        _, routes, _ = multi_start(group['dist'], group['node_demand'], instance['capacity'], budget)
+        group_routes.append(routes)
+    return routes_result(instance, group_routes)
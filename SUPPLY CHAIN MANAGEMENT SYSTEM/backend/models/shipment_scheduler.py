@@ -0,0 +1,264 @@
+"""
+Time-window-aware shipment scheduling for order_large.csv style items
+Assigns each item to a vehicle departure from its source so that it arrives
+before its Deadline, never leaves before its Available_Time, and the vehicle
+stays within weight and area capacity. Items with different Danger_Type
+never share a vehicle. Candidate insertions are checked in NumPy.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from distance_matrix import DISTANCE_PATH, load_distance_matrix
+from route_solver import STOP_MINUTES, _first, SOURCE_KEYS, DESTINATION_KEYS, ORDER_ID_KEYS
+
+SCHEDULE_SPEED_KMH = float(os.environ.get("SCHEDULE_SPEED_KMH", "60"))
+MAX_STOPS = 12        # stops per vehicle; bounds route length and the padded arrays
+
+ITEM_ID_KEYS = ('item_id', 'Item_ID')
+WEIGHT_KEYS = ('weight', 'Weight', 'demand', 'quantity')
+AREA_KEYS = ('area', 'Area')
+DANGER_KEYS = ('danger_type', 'Danger_Type')
+AVAILABLE_KEYS = ('available_time', 'Available_Time')
+DEADLINE_KEYS = ('deadline', 'Deadline')
+
+_EPS = 1e-6
+
+
+class _Fleet:
+    """Vehicles leaving one source with one danger type, as padded arrays
+
+    Times are minutes. For vehicle v, stop k: arrive/leave are offsets from
+    the departure time dep[v], due is the earliest deadline of the items
+    dropped there and slack = due - (dep + arrive).
+    """
+
+    def __init__(self, source, max_stops):
+        self.source = source
+        self.max_stops = max_stops
+        self.size = 0
+        self.city = np.zeros((0, max_stops), dtype=np.int64)
+        self.arrive = np.zeros((0, max_stops))
+        self.leave = np.zeros((0, max_stops))
+        self.slack = np.zeros((0, max_stops))
+        self.due = np.zeros((0, max_stops))
+        self.stops = np.zeros(0, dtype=np.int64)
+        self.dep = np.zeros(0)
+        self.weight = np.zeros(0)
+        self.area = np.zeros(0)
+        self.items = []  # per vehicle: list of item lists, one per stop
+
+    def _grow(self):
+        extra = max(8, self.size)
+        pad = lambda a, fill: np.concatenate([a, np.full((extra,) + a.shape[1:], fill, dtype=a.dtype)])
+        self.city = pad(self.city, self.source)
+        self.arrive, self.leave = pad(self.arrive, 0.0), pad(self.leave, 0.0)
+        self.slack, self.due = pad(self.slack, np.inf), pad(self.due, np.inf)
+        self.stops = pad(self.stops, 0)
+        self.dep, self.weight, self.area = pad(self.dep, 0.0), pad(self.weight, 0.0), pad(self.area, 0.0)
+
+    def open(self, departure):
+        if self.size == len(self.dep):
+            self._grow()
+        v = self.size
+        self.size += 1
+        self.dep[v] = departure
+        self.items.append([])
+        return v
+
+    def best_insertion(self, city, available, deadline, weight, area, capacity, area_capacity,
+                       distance, minutes):
+        """(cost, vehicle, position, merge) of the cheapest feasible insertion, or None"""
+        V, S = self.size, self.max_stops
+        if V == 0:
+            return None
+        stops = self.stops[:V]
+        cities = self.city[:V]
+        fits = (self.weight[:V] + weight <= capacity + _EPS) & (self.area[:V] + area <= area_capacity + _EPS)
+        shift = np.maximum(self.dep[:V], available) - self.dep[:V]
+        new_dep = self.dep[:V] + shift
+        slack = self.slack[:V]
+        shift_ok = slack.min(axis=1) >= shift - _EPS
+
+        # Drop at a stop the vehicle already makes: no extra distance or time
+        merge = (cities == city) & (np.arange(S)[None, :] < stops[:, None])
+        merge &= (new_dep[:, None] + self.arrive[:V] <= deadline + _EPS)
+        merge &= (fits & shift_ok)[:, None]
+        if merge.any():
+            v, k = np.argwhere(merge)[0]
+            return 0.0, int(v), int(k), True
+
+        # New stop before position p (p == stops appends before the return leg)
+        P = S + 1
+        positions = np.arange(P)[None, :]
+        prev_city = np.concatenate([np.full((V, 1), self.source), cities], axis=1)
+        prev_leave = np.concatenate([np.zeros((V, 1)), self.leave[:V]], axis=1)
+        padded_city = np.concatenate([cities, np.full((V, 1), self.source)], axis=1)
+        next_city = np.where(positions < stops[:, None], padded_city, self.source)
+        downstream = positions < stops[:, None]
+
+        extra_distance = distance[prev_city, city] + distance[city, next_city] - distance[prev_city, next_city]
+        delay = np.where(downstream,
+                         minutes[prev_city, city] + STOP_MINUTES + minutes[city, next_city]
+                         - minutes[prev_city, next_city], 0.0)
+        # Tightest slack among the stops after the insertion point
+        tail_slack = np.concatenate([np.minimum.accumulate(slack[:, ::-1], axis=1)[:, ::-1],
+                                     np.full((V, 1), np.inf)], axis=1)
+
+        feasible = (positions <= stops[:, None]) & (stops < S)[:, None] & (fits & shift_ok)[:, None]
+        feasible &= tail_slack >= shift[:, None] + delay - _EPS
+        feasible &= new_dep[:, None] + prev_leave + minutes[prev_city, city] <= deadline + _EPS
+        if not feasible.any():
+            return None
+
+        cost = np.where(feasible, extra_distance, np.inf)
+        v, p = np.unravel_index(int(np.argmin(cost)), cost.shape)
+        return float(cost[v, p]), int(v), int(p), False
+
+    def insert(self, v, position, merge, item, city, available, deadline, weight, area, minutes):
+        self.dep[v] = max(self.dep[v], available)
+        self.weight[v] += weight
+        self.area[v] += area
+        n = int(self.stops[v])
+        route = self.city[v, :n].tolist()
+        due = self.due[v, :n].tolist()
+        if merge:
+            self.items[v][position].append(item)
+            due[position] = min(due[position], deadline)
+        else:
+            route.insert(position, city)
+            due.insert(position, deadline)
+            self.items[v].insert(position, [item])
+            n += 1
+        self._retime(v, route, due, minutes)
+
+    def _retime(self, v, route, due, minutes):
+        n = len(route)
+        path = np.array([self.source] + route)
+        legs = minutes[path[:-1], path[1:]]
+        arrive = np.cumsum(legs) + STOP_MINUTES * np.arange(n)
+        self.stops[v] = n
+        self.city[v, :n] = route
+        self.arrive[v, :n] = arrive
+        self.leave[v, :n] = arrive + STOP_MINUTES
+        self.due[v, :n] = due
+        self.slack[v, :n] = np.asarray(due) - (self.dep[v] + arrive)
+
+
+def _timestamps(values):
+    return pd.to_datetime(pd.Series(values)).to_numpy(dtype='datetime64[ns]')
+
+
+def schedule_shipments(orders, vehicle_capacity, area_capacity=None, speed_kmh=SCHEDULE_SPEED_KMH,
+                       max_stops=MAX_STOPS, distance_path=DISTANCE_PATH):
+    """Assign items to vehicle departures and routes within their time windows
+
+    Items are taken in order of availability (then deadline) and inserted
+    where they add the least distance while every item already on that
+    vehicle still arrives in time; otherwise a new departure is opened.
+    Items that cannot make their deadline even on a dedicated vehicle are
+    still shipped that way and reported as late.
+    """
+    capacity = float(vehicle_capacity)
+    area_capacity = float(area_capacity) if area_capacity else np.inf
+    distances = load_distance_matrix(distance_path)
+    cities = distances.cities
+    n = len(orders)
+    if n == 0:
+        return {'departures': [], 'stops': [], 'vehicles_used': 0, 'items_scheduled': 0,
+                'items_late': 0, 'total_distance_km': 0.0, 'vehicle_capacity': vehicle_capacity,
+                'area_capacity': None if np.isinf(area_capacity) else area_capacity}
+
+    item_ids = [str(_first(o, ITEM_ID_KEYS, _first(o, ORDER_ID_KEYS, f"ITEM-{i + 1:05d}")))
+                for i, o in enumerate(orders)]
+    order_ids = [str(_first(o, ORDER_ID_KEYS, item_ids[i])) for i, o in enumerate(orders)]
+    weights = np.array([float(_first(o, WEIGHT_KEYS, 1)) for o in orders])
+    areas = np.array([float(_first(o, AREA_KEYS, 0)) for o in orders])
+    dangers = np.array([str(_first(o, DANGER_KEYS, 'non_danger')) for o in orders], dtype=object)
+    sources = distances.ids([_first(o, SOURCE_KEYS) for o in orders])
+    destinations = distances.ids([_first(o, DESTINATION_KEYS) for o in orders])
+    unknown = np.flatnonzero((sources < 0) | (destinations < 0))
+    if len(unknown):
+        i = int(unknown[0])
+        raise ValueError(f"Item {item_ids[i]} has an unknown source or destination city")
+    for label, values, limit in (('weight', weights, capacity), ('area', areas, area_capacity)):
+        over = np.flatnonzero(values > limit + _EPS)
+        if len(over):
+            i = int(over[0])
+            raise ValueError(f"Item {item_ids[i]} {label} {values[i]:g} exceeds vehicle {label} capacity {limit:g}")
+
+    available_at = _timestamps([_first(o, AVAILABLE_KEYS) for o in orders])
+    deadline_at = _timestamps([_first(o, DEADLINE_KEYS) for o in orders])
+    epoch = available_at.min()
+    available = (available_at - epoch) / np.timedelta64(1, 'm')
+    deadline = (deadline_at - epoch) / np.timedelta64(1, 'm')
+
+    distance = distances.matrix
+    minutes = distance.astype(np.float64) / 1000.0 / speed_kmh * 60.0
+
+    fleets = {}
+    late = np.zeros(n, dtype=bool)
+    for i in np.lexsort((deadline, available)).tolist():
+        key = (int(sources[i]), dangers[i])
+        fleet = fleets.get(key)
+        if fleet is None:
+            fleet = fleets[key] = _Fleet(key[0], max_stops)
+        city = int(destinations[i])
+
+        found = fleet.best_insertion(city, available[i], deadline[i], weights[i], areas[i],
+                                     capacity, area_capacity, distance, minutes)
+        if found is None:
+            v, position, merge = fleet.open(available[i]), 0, False
+            late[i] = available[i] + minutes[fleet.source, city] > deadline[i] + _EPS
+        else:
+            _, v, position, merge = found
+        fleet.insert(v, position, merge, i, city, available[i], deadline[i], weights[i], areas[i], minutes)
+
+    departures, stops = [], []
+    total_distance = 0.0
+    for (source, danger), fleet in fleets.items():
+        for v in np.argsort(fleet.dep[:fleet.size], kind='stable').tolist():
+            vehicle_id = f"V-{len(departures) + 1:03d}"
+            count = int(fleet.stops[v])
+            route = fleet.city[v, :count]
+            path = np.concatenate(([source], route, [source]))
+            route_km = float(distance[path[:-1], path[1:]].sum()) / 1000.0
+            total_distance += route_km
+            departure = epoch + np.timedelta64(int(round(fleet.dep[v] * 60)), 's')
+            for k in range(count):
+                eta = epoch + np.timedelta64(int(round((fleet.dep[v] + fleet.arrive[v, k]) * 60)), 's')
+                for i in fleet.items[v][k]:
+                    stops.append({
+                        'sequence': len(stops) + 1,
+                        'vehicle_id': vehicle_id,
+                        'order_id': order_ids[i],
+                        'item_id': item_ids[i],
+                        'city': cities[route[k]],
+                        'eta': str(pd.Timestamp(eta)),
+                        'deadline': str(pd.Timestamp(deadline_at[i])),
+                        'on_time': not late[i]
+                    })
+            departures.append({
+                'vehicle_id': vehicle_id,
+                'source': cities[source],
+                'danger_type': danger,
+                'departure': str(pd.Timestamp(departure)),
+                'route': [cities[c] for c in route],
+                'items': sum(len(items) for items in fleet.items[v]),
+                'weight': round(float(fleet.weight[v]), 2),
+                'area': round(float(fleet.area[v]), 2),
+                'distance_km': round(route_km, 2)
+            })
+
+    return {
+        'departures': departures,
+        'stops': stops,
+        'vehicles_used': len(departures),
+        'items_scheduled': n,
+        'items_late': int(late.sum()),
+        'total_distance_km': round(total_distance, 2),
+        'vehicle_capacity': vehicle_capacity,
+        'area_capacity': None if np.isinf(area_capacity) else area_capacity
+    }
@@ -8,54 +8,102 @@ import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, roc_auc_score
-import joblib
+import heapq
 import os
+from feature_pipeline import build_features
+from columnar_cache import read_dataset
+from artifacts import save_artifact, load_artifact, file_hash
+
+# Rows scored per chunk; bounds the temporary arrays for very large supplier files
+SCORE_CHUNK_ROWS = int(os.environ.get("SCORE_CHUNK_ROWS", "100000"))
+
+# Risk buckets by AI score: >= 85 Low, >= 70 Medium, otherwise High
+RISK_THRESHOLDS = (85, 70)
+RISK_LEVELS = ("Low", "Medium", "High")
+
+# Columns read from a supplier CSV for scoring and the ranking records
+SCORE_INPUT_COLUMNS = ['on_time_delivery_rate', 'defect_rate', 'return_rate', 'delivery_time_days',
+                       'forecast_accuracy', 'supplier_reliability_score', 'quality_score']
+
+def _records(scores, rows=None):
+    """Score rows (all, or the given positions) as dicts; tolist() + zip is far faster than to_dict('records')"""
+    keys = list(scores.columns)
+    columns = [scores[name].to_numpy() if rows is None else scores[name].to_numpy()[rows] for name in keys]
+    return [dict(zip(keys, values)) for values in zip(*(column.tolist() for column in columns))]
+
+def _round(values, decimals):
+    """Vectorized round() that matches Python's built-in on floats"""
+    values = np.asarray(values, dtype=np.float64)
+    scale = 10.0 ** decimals
+    scaled = values * scale
+    rounded = np.rint(scaled) / scale
+    # Near-ties depend on the exact binary value; settle those with round()
+    for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6).tolist():
+        rounded[i] = round(float(values[i]), decimals)
+    return rounded
 
 class SupplierScoringModel:
-    def __init__(self):
+    # Model inputs, read straight from the supplier master
+    input_cols = [
+        'price_per_unit', 'quality_score', 'delivery_time_days',
+        'on_time_delivery_rate', 'defect_rate', 'return_rate',
+        'lead_time_variance', 'forecast_accuracy', 'seasonality_index',
+        'demand_volatility_index', 'order_frequency_monthly',
+        'avg_order_volume', 'payment_term_days', 'offer_validity_days',
+        'items_requested', 'items_offered', 'temporal_month',
+        'supplier_reliability_score'
+    ]
+    # CSV columns train() reads
+    train_columns = input_cols + ['selected_supplier_flag']
+    
+    def __init__(self, n_jobs=-1):
         self.model = None
+        self.data_hash = None  # hash of the training data, recorded in the artifact
+        self.n_jobs = n_jobs  # threads used by train(); -1 uses every core
         self.feature_columns = None
         
     def prepare_features(self, df):
         """Prepare features for training"""
-        data = df.copy()
-        
         # Select relevant features for supplier scoring
-        feature_cols = [
-            'price_per_unit', 'quality_score', 'delivery_time_days',
-            'on_time_delivery_rate', 'defect_rate', 'return_rate',
-            'lead_time_variance', 'forecast_accuracy', 'seasonality_index',
-            'demand_volatility_index', 'order_frequency_monthly',
-            'avg_order_volume', 'payment_term_days', 'offer_validity_days',
-            'items_requested', 'items_offered', 'temporal_month',
-            'supplier_reliability_score'
-        ]
+        feature_cols = list(self.input_cols)
         
         self.feature_columns = feature_cols
-        return data[feature_cols]
+        return build_features(df, feature_cols)
     
     def calculate_supplier_score(self, row):
-        """Calculate AI supplier score (0-100)"""
-        score = 0
+        """Calculate AI supplier score (0-100)
+        
+        Takes one row (Series or dict) and returns a float, or a whole
+        DataFrame and returns a NumPy array with one score per row.
+        """
+        column = lambda name: np.asarray(row[name], dtype=np.float64)
         
         # Quality metrics (40 points)
-        score += (1 - row['defect_rate']) * 20  # Lower defect rate is better
-        score += (1 - row['return_rate']) * 20  # Lower return rate is better
+        score = (1 - column('defect_rate')) * 20  # Lower defect rate is better
+        score += (1 - column('return_rate')) * 20  # Lower return rate is better
         
         # Delivery metrics (30 points)
-        score += row['on_time_delivery_rate'] * 20  # Higher on-time rate is better
-        score += max(0, (30 - row['delivery_time_days']) / 30) * 10  # Faster delivery is better
+        score += column('on_time_delivery_rate') * 20  # Higher on-time rate is better
+        score += np.maximum(0, (30 - column('delivery_time_days')) / 30) * 10  # Faster delivery is better
         
         # Reliability metrics (30 points)
-        score += row['forecast_accuracy'] * 15  # Higher accuracy is better
-        score += row['supplier_reliability_score'] * 15  # Higher reliability is better
+        score += column('forecast_accuracy') * 15  # Higher accuracy is better
+        score += column('supplier_reliability_score') * 15  # Higher reliability is better
         
-        return min(100, max(0, score))
+        score = np.clip(score, 0, 100)
+        return float(score) if score.ndim == 0 else score
+    
+    def risk_levels(self, ai_scores):
+        """Risk level for each AI score"""
+        ai_scores = np.asarray(ai_scores)
+        return np.select([ai_scores >= RISK_THRESHOLDS[0], ai_scores >= RISK_THRESHOLDS[1]],
+                         RISK_LEVELS[:2], default=RISK_LEVELS[2])
     
     def train(self, data_path):
         """Train the supplier scoring model"""
         print("Loading data...")
-        df = pd.read_csv(data_path)
+        df = read_dataset(data_path, columns=self.train_columns)
+        self.data_hash = file_hash(data_path)
         
         print(f"Dataset shape: {df.shape}")
         
@@ -79,7 +127,7 @@ class SupplierScoringModel:
             max_depth=10,
             min_samples_split=5,
             random_state=42,
-            n_jobs=-1
+            n_jobs=self.n_jobs
         )
         
         self.model.fit(X_train, y_train)
@@ -110,54 +158,125 @@ class SupplierScoringModel:
         
         return self.model
     
-    def score_suppliers(self, supplier_data):
-        """Score suppliers and return rankings"""
-        if self.model is None:
-            raise ValueError("Model not trained yet!")
+    def score_frame(self, supplier_data, offset=0, positions=None):
+        """Score one chunk of suppliers as columns
         
+        Supplier ids come from the supplier_id column when there is one,
+        otherwise from row positions (offset + position, or the given
+        positions of the rows in the full table), so any index on
+        supplier_data is ignored.
+        """
         X = self.prepare_features(supplier_data)
         
         # Get probability of being selected (this is our AI score base)
         selection_probability = self.model.predict_proba(X)[:, 1]
+        raw_score = self.calculate_supplier_score(supplier_data)
+        if 'supplier_id' in supplier_data.columns:
+            supplier_ids = supplier_data['supplier_id'].astype(str).tolist()
+        else:
+            if positions is None:
+                positions = np.arange(offset, offset + len(supplier_data))
+            supplier_ids = [f"SUP-{i:04d}" for i in np.asarray(positions).tolist()]
+        
+        return pd.DataFrame({
+            'supplier_id': supplier_ids,
+            'ai_score': _round(raw_score, 1),
+            'selection_probability': _round(selection_probability * 100, 1),
+            'risk_level': self.risk_levels(raw_score),
+            'on_time_delivery_rate': _round(supplier_data['on_time_delivery_rate'].to_numpy(dtype=np.float64) * 100, 1),
+            'defect_rate': _round(supplier_data['defect_rate'].to_numpy(dtype=np.float64) * 100, 2),
+            'delivery_time_days': supplier_data['delivery_time_days'].to_numpy().astype(np.int64),
+            'quality_score': _round(supplier_data['quality_score'].to_numpy(dtype=np.float64), 2)
+        })
+    
+    def score_suppliers(self, supplier_data, chunk_size=SCORE_CHUNK_ROWS):
+        """Score suppliers and return rankings
         
-        # Calculate comprehensive supplier scores
-        scores = []
-        for idx, row in supplier_data.iterrows():
-            ai_score = self.calculate_supplier_score(row)
+        supplier_data is a DataFrame or an iterable of DataFrame chunks
+        (e.g. pd.read_csv(..., chunksize=n)). Rows are scored chunk_size at
+        a time and ranked by AI score, highest first.
+        """
+        if self.model is None:
+            raise ValueError("Model not trained yet!")
+        
+        if isinstance(supplier_data, pd.DataFrame):
+            chunks = (supplier_data.iloc[start:start + chunk_size]
+                      for start in range(0, len(supplier_data), chunk_size))
+        else:
+            chunks = iter(supplier_data)
+        
+        scored, offset = [], 0
+        for chunk in chunks:
+            scored.append(self.score_frame(chunk, offset))
+            offset += len(chunk)
+        if not scored:
+            return []
+        
+        scores = pd.concat(scored, ignore_index=True) if len(scored) > 1 else scored[0]
+        order = np.argsort(-scores['ai_score'].to_numpy(), kind='stable')
+        return _records(scores, order)
+    
+    def rank_suppliers_csv(self, path, k=100, chunk_size=SCORE_CHUNK_ROWS):
+        """Top-k suppliers and risk-level counts of a supplier CSV in one streaming pass
+        
+        The file is read chunk_size rows at a time, so it may be larger than
+        memory. Each chunk is scored in vectorized form and only its best
+        rows enter a heap bounded at k, so memory stays O(k + chunk_size).
+        The ranking matches score_suppliers(...)[:k].
+        """
+        if self.model is None:
+            raise ValueError("Model not trained yet!")
+        
+        usecols = set(self.feature_columns or []) | set(SCORE_INPUT_COLUMNS)
+        # Real supplier ids, when the file has them, as score_suppliers would use
+        if 'supplier_id' in pd.read_csv(path, nrows=0).columns:
+            usecols.add('supplier_id')
+        usecols = sorted(usecols)
+        heap = []  # (ai_score, -position, record); the worst kept supplier is heap[0]
+        risk_counts = dict.fromkeys(RISK_LEVELS, 0)
+        offset = 0
+        
+        for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunk_size):
+            scores = self.score_frame(chunk, offset)
+            levels, counts = np.unique(scores['risk_level'].to_numpy(), return_counts=True)
+            for level, count in zip(levels.tolist(), counts.tolist()):
+                risk_counts[level] += count
             
-            # Determine risk level
-            if ai_score >= 85:
-                risk_level = "Low"
-            elif ai_score >= 70:
-                risk_level = "Medium"
-            else:
-                risk_level = "High"
+            # Only rows that could beat the k-th best of this chunk and the heap's worst
+            ai_score = scores['ai_score'].to_numpy()
+            candidates = np.arange(len(ai_score) if k > 0 else 0)
+            if len(candidates) > k:
+                kth = ai_score[np.argpartition(-ai_score, k - 1)[k - 1]]
+                candidates = np.flatnonzero(ai_score >= kth)
+            if heap and len(heap) == k:
+                candidates = candidates[ai_score[candidates] >= heap[0][0]]
             
-            scores.append({
-                'supplier_id': f"SUP-{idx:04d}",
-                'ai_score': round(ai_score, 1),
-                'selection_probability': round(selection_probability[idx] * 100, 1),
-                'risk_level': risk_level,
-                'on_time_delivery_rate': round(row['on_time_delivery_rate'] * 100, 1),
-                'defect_rate': round(row['defect_rate'] * 100, 2),
-                'delivery_time_days': int(row['delivery_time_days']),
-                'quality_score': round(row['quality_score'], 2)
-            })
-        
-        return sorted(scores, key=lambda x: x['ai_score'], reverse=True)
+            for position, record in zip((offset + candidates).tolist(), _records(scores, candidates)):
+                item = (record['ai_score'], -position, record)
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, item)
+            offset += len(chunk)
+        
+        return {
+            'suppliers': offset,
+            'risk_levels': risk_counts,
+            'top': [record for _, _, record in sorted(heap, key=lambda item: item[:2], reverse=True)]
+        }
     
     def save(self, path):
-        """Save model"""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        joblib.dump({
+        """Save model as a new artifact version (or one .pkl file, for a .pkl path)"""
+        save_artifact(path, {
             'model': self.model,
             'feature_columns': self.feature_columns
-        }, path)
+        }, data_hash=self.data_hash)
         print(f"Model saved to {path}")
     
     def load(self, path):
         """Load model"""
-        data = joblib.load(path)
+        data = load_artifact(path)
+        self.data_hash = data.get('data_hash')
         self.model = data['model']
         self.feature_columns = data['feature_columns']
         print(f"Model loaded from {path}")
@@ -168,6 +287,6 @@ if __name__ == "__main__":
     data_path = "../../DATA SETS/supply_chain_master.csv"
     
     model.train(data_path)
-    model.save("../backend/models/supplier_scoring_model.pkl")
+    model.save("../backend/models/supplier_scoring")
     
     print("\n✅ Supplier Scoring Model trained and saved!")
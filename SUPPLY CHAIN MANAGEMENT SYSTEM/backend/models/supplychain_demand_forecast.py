@@ -7,27 +7,38 @@ import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from xgboost import XGBRegressor
-from sklearn.metrics import mean_absolute_error, r2_score
-import joblib
-import os
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from forecast_inputs import compute_feature_defaults, horizon_frame, forecast_interval
+from feature_pipeline import build_features
+from columnar_cache import read_dataset
+from artifacts import save_artifact, load_artifact, file_hash
+from incremental import update_model, new_update_state, UPDATED
 
 class SupplyChainDemandModel:
-    def __init__(self):
+    numeric_cols = [
+        'product_id', 'sales_units', 'holiday_season', 'promotion_applied',
+        'competitor_price_index', 'economic_index', 'weather_impact',
+        'price', 'discount_percentage', 'sales_revenue',
+        'region_Europe', 'region_North America',
+        'store_type_Retail', 'store_type_Wholesale',
+        'category_Cabinets', 'category_Chairs', 'category_Sofas', 'category_Tables'
+    ]
+    target_col = 'future_demand'
+    # CSV columns train() reads
+    train_columns = ['date'] + numeric_cols + [target_col]
+    
+    def __init__(self, n_jobs=-1):
         self.model = None
+        self.data_hash = None  # hash of the training data, recorded in the artifact
+        self.n_jobs = n_jobs  # threads used by train(); -1 uses every core
         self.feature_columns = None
+        self.feature_defaults = {}
+        self.update_state = new_update_state()
+        self.test_rmse = None  # sets the width of forecast intervals
+        self.known_product_ids = []
         
     def prepare_features(self, df):
         """Prepare features for supply chain demand prediction"""
-        data = df.copy()
-        
-        # Parse date
-        data['date'] = pd.to_datetime(data['date'])
-        data['year'] = data['date'].dt.year
-        data['month'] = data['date'].dt.month
-        data['day'] = data['date'].dt.day
-        data['day_of_week'] = data['date'].dt.dayofweek
-        data['quarter'] = data['date'].dt.quarter
-        
         # Select features
         feature_cols = [
             'year', 'month', 'day', 'day_of_week', 'quarter',
@@ -40,18 +51,22 @@ class SupplyChainDemandModel:
         ]
         
         self.feature_columns = feature_cols
-        return data[feature_cols]
+        # Date features come from the shared calendar lookup (each date parsed once)
+        return build_features(df, feature_cols, date_col='date')
     
     def train(self, data_path):
         """Train supply chain demand model"""
         print("Loading supply chain demand data...")
-        df = pd.read_csv(data_path)
+        df = read_dataset(data_path, columns=self.train_columns, as_category=['date'])
+        self.data_hash = file_hash(data_path)
         
         print(f"Dataset shape: {df.shape}")
         
         # Prepare features and target
         X = self.prepare_features(df)
-        y = df['future_demand']
+        y = df[self.target_col]
+        self.feature_defaults = compute_feature_defaults(df, self.numeric_cols)
+        self.known_product_ids = sorted(int(p) for p in df['product_id'].unique())
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
@@ -67,7 +82,7 @@ class SupplyChainDemandModel:
             max_depth=6,
             learning_rate=0.1,
             random_state=42,
-            n_jobs=-1
+            n_jobs=self.n_jobs
         )
         
         self.model.fit(X_train, y_train)
@@ -75,6 +90,7 @@ class SupplyChainDemandModel:
         # Evaluate
         train_pred = self.model.predict(X_train)
         test_pred = self.model.predict(X_test)
+        self.test_rmse = float(np.sqrt(mean_squared_error(y_test, test_pred)))
         
         print("\n=== Supply Chain Demand Model Performance ===")
         print(f"Train MAE: {mean_absolute_error(y_train, train_pred):.2f}")
@@ -103,24 +119,60 @@ class SupplyChainDemandModel:
         
         return predictions
     
+    def forecast_output(self, predictions):
+        """Attach confidence intervals to raw predictions"""
+        return forecast_interval(predictions, self.test_rmse)
+    
+    def forecast_features(self, dates, product_id=None):
+        """Feature matrix with one row per forecast date"""
+        overrides = {}
+        if product_id is not None and int(product_id) in set(self.known_product_ids):
+            overrides['product_id'] = int(product_id)
+        
+        frame = horizon_frame(dates, 'date', self.numeric_cols, self.feature_defaults, overrides)
+        return self.prepare_features(frame)
+    
+    def forecast(self, dates, product_id=None):
+        """Predict future demand for every date in one batched predict call"""
+        if self.model is None:
+            raise ValueError("Model not trained yet!")
+        
+        X = self.forecast_features(dates, product_id=product_id)
+        return self.forecast_output(self.model.predict(X))
+    
+    def update(self, new_data, data_path=None):
+        """Continue boosting on newly appended rows; a full rebuild from data_path when one is due"""
+        outcome = update_model(self, new_data, data_path=data_path)
+        if outcome == UPDATED:
+            self.known_product_ids = sorted(set(self.known_product_ids) | {int(v) for v in new_data['product_id'].unique()})
+        return outcome
+    
     def save(self, path):
-        """Save model"""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        joblib.dump({
+        """Save model as a new artifact version (or one .pkl file, for a .pkl path)"""
+        save_artifact(path, {
             'model': self.model,
-            'feature_columns': self.feature_columns
-        }, path)
+            'feature_columns': self.feature_columns,
+            'feature_defaults': self.feature_defaults,
+            'known_product_ids': self.known_product_ids,
+            'update_state': self.update_state,
+            'test_rmse': self.test_rmse
+        }, data_hash=self.data_hash)
         print(f"Model saved to {path}")
     
     def load(self, path):
         """Load model"""
-        data = joblib.load(path)
+        data = load_artifact(path)
+        self.data_hash = data.get('data_hash')
         self.model = data['model']
         self.feature_columns = data['feature_columns']
+        self.feature_defaults = data.get('feature_defaults', {})
+        self.known_product_ids = data.get('known_product_ids', [])
+        self.update_state = data.get('update_state') or new_update_state()
+        self.test_rmse = data.get('test_rmse')
         print(f"Model loaded from {path}")
 
 if __name__ == "__main__":
     model = SupplyChainDemandModel()
     model.train("../../DATA SETS/supplychain_demand.csv")
-    model.save("../backend/models/supplychain_demand_model.pkl")
+    model.save("../backend/models/supplychain_demand")
     print("\n✅ Supply Chain Demand Model trained and saved!")
@@ -3,30 +3,34 @@ Walmart Sales Forecasting Model using LSTM/XGBoost
 Trains on walmart_forecast/train.csv and walmart_sales.csv
 """
 
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from xgboost import XGBRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import joblib
-import os
+from forecast_inputs import compute_feature_defaults, horizon_frame, forecast_interval
+from feature_pipeline import build_features
+from columnar_cache import read_dataset
+from artifacts import save_artifact, load_artifact, file_hash
+from incremental import update_model, new_update_state, UPDATED
 
 class WalmartSalesForecastModel:
-    def __init__(self):
+    numeric_cols = ['Store', 'Holiday_Flag', 'Temperature', 'Fuel_Price', 'CPI', 'Unemployment']
+    target_col = 'Weekly_Sales'
+    # CSV columns train() reads
+    train_columns = ['Date'] + numeric_cols + [target_col]
+    
+    def __init__(self, n_jobs=-1):
         self.model = None
+        self.data_hash = None  # hash of the training data, recorded in the artifact
+        self.n_jobs = n_jobs  # threads used by train(); -1 uses every core
         self.feature_columns = None
+        self.feature_defaults = {}
+        self.update_state = new_update_state()
+        self.test_rmse = None  # sets the width of forecast intervals
+        self.known_stores = []
         
     def prepare_features(self, df):
         """Prepare features for Walmart sales prediction"""
-        data = df.copy()
-        
-        # Parse date
-        data['Date'] = pd.to_datetime(data['Date'], dayfirst=True)
-        data['year'] = data['Date'].dt.year
-        data['month'] = data['Date'].dt.month
-        data['week'] = data['Date'].dt.isocalendar().week
-        data['day_of_week'] = data['Date'].dt.dayofweek
-        
         # Select features
         feature_cols = [
             'Store', 'year', 'month', 'week', 'day_of_week',
@@ -34,18 +38,22 @@ class WalmartSalesForecastModel:
         ]
         
         self.feature_columns = feature_cols
-        return data[feature_cols]
+        # Dates are day-first (05-02-2010); each distinct one is parsed once
+        return build_features(df, feature_cols, date_col='Date', dayfirst=True)
     
     def train(self, data_path):
         """Train Walmart sales forecasting model"""
         print("Loading Walmart sales data...")
-        df = pd.read_csv(data_path)
+        df = read_dataset(data_path, columns=self.train_columns, as_category=['Date'])
+        self.data_hash = file_hash(data_path)
         
         print(f"Dataset shape: {df.shape}")
         
         # Prepare features and target
         X = self.prepare_features(df)
-        y = df['Weekly_Sales']
+        y = df[self.target_col]
+        self.feature_defaults = compute_feature_defaults(df, self.numeric_cols)
+        self.known_stores = sorted(int(s) for s in df['Store'].unique())
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
@@ -61,7 +69,7 @@ class WalmartSalesForecastModel:
             max_depth=7,
             learning_rate=0.05,
             random_state=42,
-            n_jobs=-1
+            n_jobs=self.n_jobs
         )
         
         self.model.fit(X_train, y_train)
@@ -69,6 +77,7 @@ class WalmartSalesForecastModel:
         # Evaluate
         train_pred = self.model.predict(X_train)
         test_pred = self.model.predict(X_test)
+        self.test_rmse = float(np.sqrt(mean_squared_error(y_test, test_pred)))
         
         print("\n=== Walmart Sales Model Performance ===")
         print(f"Train MAE: ${mean_absolute_error(y_train, train_pred):,.2f}")
@@ -90,24 +99,60 @@ class WalmartSalesForecastModel:
         
         return predictions
     
+    def forecast_output(self, predictions):
+        """Attach confidence intervals to raw predictions"""
+        return forecast_interval(predictions, self.test_rmse)
+    
+    def forecast_features(self, dates, store=None):
+        """Feature matrix with one row per forecast date"""
+        overrides = {}
+        if store is not None and int(store) in set(self.known_stores):
+            overrides['Store'] = int(store)
+        
+        frame = horizon_frame(dates, 'Date', self.numeric_cols, self.feature_defaults, overrides)
+        return self.prepare_features(frame)
+    
+    def forecast(self, dates, store=None):
+        """Predict weekly sales for every date in one batched predict call"""
+        if self.model is None:
+            raise ValueError("Model not trained yet!")
+        
+        X = self.forecast_features(dates, store=store)
+        return self.forecast_output(self.model.predict(X))
+    
+    def update(self, new_data, data_path=None):
+        """Continue boosting on newly appended rows; a full rebuild from data_path when one is due"""
+        outcome = update_model(self, new_data, data_path=data_path)
+        if outcome == UPDATED:
+            self.known_stores = sorted(set(self.known_stores) | {int(v) for v in new_data['Store'].unique()})
+        return outcome
+    
     def save(self, path):
-        """Save model"""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        joblib.dump({
+        """Save model as a new artifact version (or one .pkl file, for a .pkl path)"""
+        save_artifact(path, {
             'model': self.model,
-            'feature_columns': self.feature_columns
-        }, path)
+            'feature_columns': self.feature_columns,
+            'feature_defaults': self.feature_defaults,
+            'known_stores': self.known_stores,
+            'update_state': self.update_state,
+            'test_rmse': self.test_rmse
+        }, data_hash=self.data_hash)
         print(f"Model saved to {path}")
     
     def load(self, path):
         """Load model"""
-        data = joblib.load(path)
+        data = load_artifact(path)
+        self.data_hash = data.get('data_hash')
         self.model = data['model']
         self.feature_columns = data['feature_columns']
+        self.feature_defaults = data.get('feature_defaults', {})
+        self.known_stores = data.get('known_stores', [])
+        self.update_state = data.get('update_state') or new_update_state()
+        self.test_rmse = data.get('test_rmse')
         print(f"Model loaded from {path}")
 
 if __name__ == "__main__":
     model = WalmartSalesForecastModel()
     model.train("../../DATA SETS/walmart_sales.csv")
-    model.save("../backend/models/walmart_sales_model.pkl")
+    model.save("../backend/models/walmart_sales")
     print("\n✅ Walmart Sales Forecasting Model trained and saved!")
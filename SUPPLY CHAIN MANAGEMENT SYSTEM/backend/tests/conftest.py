@@ -0,0 +1,37 @@
+"""
+Shared pytest setup: the models/ and api/ modules are imported by name,
+as they are when the API and training scripts run
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(BACKEND, 'models'))
+sys.path.insert(0, os.path.join(BACKEND, 'api'))
+
+# Keep on-disk caches out of the source tree
+_CACHE_ROOT = tempfile.mkdtemp(prefix='scm-tests-')
+os.environ.setdefault("DISTANCE_CACHE_DIR", os.path.join(_CACHE_ROOT, 'distance'))
+os.environ.setdefault("COLUMNAR_CACHE_DIR", os.path.join(_CACHE_ROOT, 'columns'))
+
+# Edge list (metres) for a small road network; City_A <-> City_D only via City_B
+ROAD_EDGES = [
+    ('City_A', 'City_B', 10000), ('City_B', 'City_A', 10000),
+    ('City_B', 'City_C', 20000), ('City_C', 'City_B', 20000),
+    ('City_A', 'City_C', 25000), ('City_C', 'City_A', 25000),
+    ('City_B', 'City_D', 30000), ('City_D', 'City_B', 30000),
+    ('City_C', 'City_E', 15000), ('City_E', 'City_C', 15000),
+]
+
+
+@pytest.fixture
+def distance_csv(tmp_path):
+    """Path of a distance.csv for ROAD_EDGES"""
+    path = tmp_path / 'distance.csv'
+    lines = ['Source,Destination,Distance(M)'] + [f"{a},{b},{d}" for a, b, d in ROAD_EDGES]
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
@@ -0,0 +1,162 @@
+import json
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import LabelEncoder
+from xgboost import XGBRegressor
+
+from artifacts import (CURRENT, MANIFEST, current_version, load_artifact, read_manifest,
+                       resolve_artifact, save_artifact)
+from categorical_encoder import CategoricalEncoder, save_encoders
+from demand_forecast import DemandForecastModel
+
+X = np.random.default_rng(0).uniform(size=(60, 3)).astype(np.float32)
+Y = X @ np.array([1.0, -2.0, 0.5]) + 3.0
+
+
+def make_state(estimator, **extra):
+    return {
+        'model': estimator,
+        'label_encoders': save_encoders({'Store': CategoricalEncoder().fit(['North', 'South'])}),
+        'feature_columns': ['a', 'b', 'c'],
+        'known_ids': [3, 1, 2],
+        'feature_defaults': {'a': 0.5},
+        'test_rmse': 1.25,
+        **extra
+    }
+
+
+def versions(path):
+    return sorted(name for name in os.listdir(path) if not name.startswith('.') and name != CURRENT)
+
+
+@pytest.mark.parametrize('estimator', [
+    XGBRegressor(n_estimators=5, max_depth=2),
+    RandomForestRegressor(n_estimators=5, random_state=0),
+])
+def test_save_load_round_trip(tmp_path, estimator):
+    estimator.fit(X, Y)
+    path = str(tmp_path / 'model')
+    version = save_artifact(path, make_state(estimator), data_hash='abc')
+
+    assert current_version(path) == version
+    state = load_artifact(path)
+    np.testing.assert_allclose(state['model'].predict(X), estimator.predict(X), rtol=1e-6)
+    assert state['feature_columns'] == ['a', 'b', 'c']
+    assert state['known_ids'] == [3, 1, 2]
+    assert state['feature_defaults'] == {'a': 0.5}
+    assert state['test_rmse'] == 1.25
+    assert state['data_hash'] == 'abc'
+    assert CategoricalEncoder.from_state(state['label_encoders']['Store']).transform(['South']).tolist() == [1]
+
+    manifest = read_manifest(path)
+    assert manifest['estimator']['format'] == ('xgboost-ubj' if isinstance(estimator, XGBRegressor) else 'pickle')
+    assert manifest['schema']['encoders'] == {'Store': 2}
+
+
+def test_identical_save_reuses_the_version(tmp_path):
+    path = str(tmp_path / 'model')
+    first = save_artifact(path, make_state(None))
+    assert save_artifact(path, make_state(None)) == first
+    assert versions(path) == [first]
+    assert load_artifact(path)['model'] is None
+
+
+def test_prune_keeps_the_live_version_and_the_newest_old_ones(tmp_path):
+    path = str(tmp_path / 'model')
+    saved = []
+    for i in range(5):
+        saved.append(save_artifact(path, make_state(None, test_rmse=float(i)), keep=2))
+        # Prune orders by mtime; keep the saves apart on coarse filesystem clocks
+        os.utime(os.path.join(path, saved[-1]), ns=(i * 10 ** 9, i * 10 ** 9))
+    assert current_version(path) == saved[-1]
+    assert versions(path) == sorted(saved[-3:])
+    assert load_artifact(path)['test_rmse'] == 4.0
+
+
+def test_corrupt_files_are_detected(tmp_path):
+    path = str(tmp_path / 'model')
+    version = save_artifact(path, make_state(RandomForestRegressor(n_estimators=2).fit(X, Y)))
+    with open(os.path.join(path, version, 'arrays.bin'), 'r+b') as f:
+        f.write(b'\xff')
+    with pytest.raises(ValueError, match='Corrupt'):
+        load_artifact(path)
+
+
+def test_newer_format_is_rejected(tmp_path):
+    path = str(tmp_path / 'model')
+    version = save_artifact(path, make_state(None))
+    manifest_path = os.path.join(path, version, MANIFEST)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest['format'] += 1
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    with pytest.raises(ValueError, match='newer'):
+        load_artifact(path)
+
+
+def test_missing_artifact(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_artifact(str(tmp_path / 'model'))
+
+
+def test_pkl_paths_use_the_legacy_format(tmp_path):
+    path = str(tmp_path / 'nested' / 'model.pkl')
+    state = make_state(XGBRegressor(n_estimators=2).fit(X, Y))
+    assert save_artifact(path, state) is None
+    assert isinstance(joblib.load(path), dict)
+    np.testing.assert_allclose(load_artifact(path)['model'].predict(X), state['model'].predict(X))
+
+
+def test_resolve_prefers_the_versioned_artifact(tmp_path):
+    models_dir = str(tmp_path)
+    legacy = os.path.join(models_dir, 'demand_model.pkl')
+    assert resolve_artifact(models_dir, 'demand_forecast', 'demand_model.pkl') == legacy
+    save_artifact(os.path.join(models_dir, 'demand_forecast'), make_state(None))
+    assert resolve_artifact(models_dir, 'demand_forecast', 'demand_model.pkl') == \
+        os.path.join(models_dir, 'demand_forecast')
+
+
+def test_model_loads_a_legacy_pkl_with_label_encoders(tmp_path):
+    # Artifacts from before the versioned format: a joblib dict holding fitted LabelEncoders
+    model = DemandForecastModel()
+    encoder = LabelEncoder().fit(['S001', 'S002'])
+    path = str(tmp_path / 'demand_model.pkl')
+    joblib.dump({'model': XGBRegressor(n_estimators=2).fit(X, Y),
+                 'label_encoders': {'Store ID': encoder},
+                 'feature_columns': ['a', 'b', 'c']}, path)
+    model.load(path)
+    assert isinstance(model.label_encoders['Store ID'], CategoricalEncoder)
+    assert model.label_encoders['Store ID'].transform(['S002', 'S999']).tolist() == [1, -1]
+    assert model.feature_defaults == {} and model.test_rmse is None
+
+    # Saving it again to a directory upgrades it to the versioned format
+    model.save(str(tmp_path / 'demand_forecast'))
+    upgraded = DemandForecastModel()
+    upgraded.load(resolve_artifact(str(tmp_path), 'demand_forecast', 'demand_model.pkl'))
+    assert upgraded.label_encoders['Store ID'].classes_.tolist() == ['S001', 'S002']
+    np.testing.assert_allclose(upgraded.model.predict(X), model.model.predict(X))
+
+
+@pytest.mark.parametrize('value', [[1, 'x'], [None, 1.5], [[1], [1, 2]], [{'a': 1}]])
+def test_lists_without_a_fixed_dtype_round_trip_through_json(tmp_path, value):
+    path = str(tmp_path / 'model')
+    save_artifact(path, {'model': None, 'mixed': value, 'ids': [3, 1, 2]})
+    state = load_artifact(path)
+    assert state['mixed'] == value
+    assert state['ids'] == [3, 1, 2]
+    assert 'mixed' in read_manifest(path)['metadata']
+
+
+def test_unserializable_state_leaves_the_live_version_alone(tmp_path):
+    path = str(tmp_path / 'model')
+    live = save_artifact(path, make_state(None))
+    with pytest.raises(TypeError):
+        save_artifact(path, {'model': None, 'bad': [object()]})
+    assert current_version(path) == live
+    assert versions(path) == [live]
+    assert load_artifact(path)['known_ids'] == [3, 1, 2]
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelEncoder
+
+from categorical_encoder import UNKNOWN, CategoricalEncoder, load_encoders, save_encoders
+
+TRAIN = ['Store_B', 'Store_A', 'Store_C', 'Store_A']
+
+
+def test_codes_match_label_encoder():
+    values = TRAIN + [np.nan]
+    encoder = CategoricalEncoder().fit(values)
+    reference = LabelEncoder().fit(pd.Series(values).astype(str))
+    assert encoder.classes_.tolist() == reference.classes_.tolist()
+    assert encoder.transform(values).tolist() == reference.transform(pd.Series(values).astype(str)).tolist()
+
+
+def test_unknown_values_get_the_reserved_code():
+    encoder = CategoricalEncoder().fit(TRAIN)
+    codes = encoder.transform(['Store_A', 'Store_Z', 'Store_C', None, 'store_a'])
+    assert codes.dtype == np.int64
+    assert codes.tolist() == [0, UNKNOWN, 2, UNKNOWN, UNKNOWN]
+    assert 'Store_Z' not in encoder
+
+
+def test_missing_values_are_known_once_fitted_on_them():
+    encoder = CategoricalEncoder().fit(TRAIN + [None])
+    assert 'nan' in encoder
+    assert encoder.transform([None, np.nan, 'nan']).tolist() == [encoder.classes_.tolist().index('nan')] * 3
+
+
+def test_inverse_transform_maps_unknown_to_none():
+    encoder = CategoricalEncoder().fit(TRAIN)
+    labels = encoder.inverse_transform(encoder.transform(['Store_C', 'Store_Z']))
+    assert labels.tolist() == ['Store_C', None]
+    assert CategoricalEncoder().inverse_transform([UNKNOWN]).tolist() == [None]
+
+
+def test_non_string_values_compare_as_strings():
+    encoder = CategoricalEncoder().fit([1, 2, 3])
+    assert encoder.transform(['2', 3, 4]).tolist() == [1, 2, UNKNOWN]
+
+
+def test_state_round_trip_and_label_encoder_artifacts():
+    encoder = CategoricalEncoder().fit(TRAIN)
+    legacy = LabelEncoder().fit(TRAIN)
+    loaded = load_encoders({**save_encoders({'store': encoder}), 'legacy': legacy, 'live': encoder})
+    for restored in loaded.values():
+        assert isinstance(restored, CategoricalEncoder)
+        assert restored.transform(['Store_C', 'Store_Z']).tolist() == [2, UNKNOWN]
+    assert load_encoders(None) == {}
+
+
+@pytest.mark.parametrize('values', [[], ['only']])
+def test_tiny_vocabularies(values):
+    encoder = CategoricalEncoder().fit(values)
+    assert len(encoder) == len(values)
+    assert encoder.transform(['other']).tolist() == [UNKNOWN]
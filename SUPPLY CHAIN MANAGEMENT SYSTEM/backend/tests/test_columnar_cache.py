@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from columnar_cache import convert_csv, read_dataset
+
+CSV = """Date,Store,Product,Units,Price,Promo
+2024-01-01,North,Bolt,3,1.5,True
+2024-01-02,,Wire,,2.25,False
+2024-01-02,South,Bolt,7,,True
+2024-01-03,North,,1,0.5,False
+"""
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'sales.csv'
+    path.write_text(CSV)
+    return str(path)
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / 'cache')
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_round_trip_matches_read_csv(csv_path, cache_dir, mmap):
+    expected = pd.read_csv(csv_path)
+    for _ in range(2):  # converted on the first read, served from the cache on the second
+        frame = read_dataset(csv_path, mmap=mmap, cache_dir=cache_dir)
+        pd.testing.assert_frame_equal(frame, expected)
+    assert frame['Store'].isna().tolist() == [False, True, False, False]
+
+
+def test_selected_columns(csv_path, cache_dir):
+    frame = read_dataset(csv_path, columns=['Price', 'Store'], cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(frame, pd.read_csv(csv_path)[['Price', 'Store']])
+    with pytest.raises(KeyError, match='Missing'):
+        read_dataset(csv_path, columns=['Missing'], cache_dir=cache_dir)
+
+
+def test_categorical_columns_keep_categories(csv_path, cache_dir):
+    dtype = pd.CategoricalDtype(['South', 'North', 'West'], ordered=True)
+    frame = read_dataset(csv_path, cache_dir=cache_dir, dtype={'Store': dtype, 'Product': 'category'})
+    expected = pd.read_csv(csv_path, dtype={'Store': dtype, 'Product': 'category'})
+    pd.testing.assert_frame_equal(frame, expected)
+    assert frame['Store'].cat.ordered
+    assert frame['Store'].cat.categories.tolist() == ['South', 'North', 'West']
+
+
+def test_strings_as_category(csv_path, cache_dir):
+    frame = read_dataset(csv_path, columns=['Date', 'Store'], cache_dir=cache_dir, as_category=['Store'])
+    expected = pd.read_csv(csv_path)
+    assert isinstance(frame['Store'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_series_equal(frame['Store'].astype(object), expected['Store'])
+    assert frame['Date'].dtype == object
+
+
+def test_read_options_and_content_are_part_of_the_key(csv_path, cache_dir):
+    plain = convert_csv(csv_path, cache_dir)
+    assert convert_csv(csv_path, cache_dir) == plain
+    assert convert_csv(csv_path, cache_dir, usecols=['Units']) != plain
+
+    with open(csv_path, 'a') as f:
+        f.write("2024-01-04,East,Wire,9,3.0,True\n")
+    assert convert_csv(csv_path, cache_dir) != plain
+    frame = read_dataset(csv_path, cache_dir=cache_dir)
+    assert len(frame) == 5 and frame['Store'].iloc[-1] == 'East'
+
+
+def test_unwritable_cache_falls_back_to_csv(csv_path, tmp_path):
+    blocker = tmp_path / 'not_a_directory'
+    blocker.write_text('')
+    frame = read_dataset(csv_path, cache_dir=str(blocker / 'cache'), as_category=['Store'])
+    expected = pd.read_csv(csv_path).astype({'Store': 'category'})
+    pd.testing.assert_frame_equal(frame, expected)
+
+
+def test_mmap_columns_are_read_only(csv_path, cache_dir):
+    values = read_dataset(csv_path, cache_dir=cache_dir)['Price'].to_numpy()
+    assert not values.flags.writeable
+    with pytest.raises(ValueError):
+        values[0] = 1.0
+    copied = read_dataset(csv_path, mmap=False, cache_dir=cache_dir)['Price'].to_numpy()
+    copied[0] = 1.0
@@ -0,0 +1,44 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from feature_pipeline import CalendarLookup, calendar_features
+
+DATES = pd.date_range('2020-01-01', periods=400).strftime('%Y-%m-%d').to_numpy(dtype=object)
+
+
+def expected(values):
+    return calendar_features(pd.DatetimeIndex(pd.to_datetime(pd.Series(values))))
+
+
+def test_lookup_matches_parsing_every_value():
+    lookup = CalendarLookup()
+    values = np.concatenate([DATES[:50], DATES[:10], [None]])
+    np.testing.assert_array_equal(lookup.lookup(values), expected(values))
+    categorical = pd.Series(values).astype('category')
+    features, codes = lookup.codes(categorical)
+    np.testing.assert_array_equal(features[codes], expected(values))
+
+
+def test_concurrent_lookups_survive_cache_resets():
+    # A small cache makes threads start the lookup over under each other
+    lookup = CalendarLookup(max_dates=60)
+    errors = []
+
+    def work(seed):
+        rng = np.random.default_rng(seed)
+        try:
+            for _ in range(30):
+                values = DATES[rng.integers(0, len(DATES), size=40)]
+                np.testing.assert_array_equal(lookup.lookup(values), expected(values))
+        except Exception as e:  # reported from the main thread
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(lookup._ids) <= 60
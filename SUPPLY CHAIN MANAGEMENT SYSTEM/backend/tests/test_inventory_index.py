@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from inventory_index import InvalidCursor, InventoryIndex, decode_cursor, encode_cursor
+
+PRODUCTS = ['Steel Bolt', 'Copper Wire', 'Widget', 'Steel Plate']
+
+
+@pytest.fixture(scope='module')
+def frame():
+    rng = np.random.default_rng(0)
+    n = 1000
+    ids = rng.permutation(n) + 1
+    return pd.DataFrame({
+        'id': ids,
+        'sku': [f"SKU-{i + 1000:04d}" for i in ids],
+        'product': rng.choice(PRODUCTS, n),
+        'quantity': rng.integers(0, 20, n),      # many ties, so the id tie-break matters
+        'stock': rng.integers(0, 500, n),
+        'status': rng.choice(['In Stock', 'Low Stock', 'Out of Stock'], n),
+        'warehouse': rng.choice(['North', 'South', 'East'], n),
+        'price': rng.uniform(1, 100, n).round(2),
+        'quality_score': rng.uniform(0, 1, n),
+        'delivery_time_days': rng.integers(1, 10, n),
+    })
+
+
+@pytest.fixture(scope='module')
+def index(frame):
+    return InventoryIndex(frame)
+
+
+def matches_search(row, search):
+    prefix = search.lower()
+    sku = row['sku'].lower()
+    name = row['product'].lower()
+    keys = [sku, sku.replace('sku-', ''), name] + name.split()
+    return any(key.startswith(prefix) for key in keys)
+
+
+def expected_ids(frame, sort_by, descending=False, warehouse=None, status=None, search=None):
+    rows = frame
+    if warehouse is not None:
+        rows = rows[rows['warehouse'] == warehouse]
+    if status is not None:
+        rows = rows[rows['status'] == status]
+    if search:
+        rows = rows[rows.apply(matches_search, axis=1, search=search)]
+    ordered = sorted(zip(rows[sort_by], rows['id']), reverse=descending)
+    return [row_id for _, row_id in ordered]
+
+
+def page_through(index, limit, **filters):
+    ids, cursor, totals = [], None, set()
+    while True:
+        page, total, cursor = index.query(cursor=cursor, limit=limit, **filters)
+        assert len(page) <= limit
+        ids.extend(index.ids[page].tolist())
+        totals.add(total)
+        if cursor is None:
+            return ids, totals
+
+
+@pytest.mark.parametrize('sort_by', ['id', 'quantity', 'price', 'product', 'status'])
+@pytest.mark.parametrize('descending', [False, True])
+def test_pages_follow_sort_order(frame, index, sort_by, descending):
+    ids, totals = page_through(index, 37, sort_by=sort_by, descending=descending)
+    assert ids == expected_ids(frame, sort_by, descending)
+    assert totals == {len(frame)}
+
+
+@pytest.mark.parametrize('filters', [
+    {'warehouse': 'North'},
+    {'warehouse': 'South', 'status': 'Low Stock'},
+    {'search': 'steel'},                     # broad: walks the sorted order under a mask
+    {'search': 'sku-115'},                   # narrow: sorts the few matches
+    {'search': 'bolt', 'status': 'In Stock'},
+    {'warehouse': 'Nowhere'},
+])
+def test_filtered_pages_follow_sort_order(frame, index, filters):
+    for descending in (False, True):
+        ids, totals = page_through(index, 25, sort_by='quantity', descending=descending, **filters)
+        expected = expected_ids(frame, 'quantity', descending, **filters)
+        assert ids == expected
+        assert totals == {len(expected)}
+
+
+def test_last_page_has_no_cursor(frame, index):
+    page, total, cursor = index.query(limit=len(frame))
+    assert len(page) == total == len(frame)
+    assert cursor is None
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor('price', 12.5, 42)
+    assert decode_cursor(cursor) == ('price', 12.5, 42)
+    assert '=' not in cursor
+    assert decode_cursor(encode_cursor('product', 'Steel Bolt', 7)) == ('product', 'Steel Bolt', 7)
+
+
+def test_invalid_cursors_are_rejected(index):
+    with pytest.raises(InvalidCursor):
+        decode_cursor('not a cursor')
+    _, _, cursor = index.query(sort_by='price', limit=10)
+    with pytest.raises(InvalidCursor, match='sort'):
+        index.query(sort_by='quantity', cursor=cursor, limit=10)
+    with pytest.raises(InvalidCursor):
+        index.query(sort_by='price', cursor=encode_cursor('price', 'cheap', 1), limit=10)
+
+
+def test_unknown_sort_key(index):
+    with pytest.raises(ValueError, match='Unknown sort key'):
+        index.query(sort_by='colour')
+
+
+def test_unknown_filter_values_are_not_cached(frame):
+    index = InventoryIndex(frame)
+    for i in range(20):
+        page, total, cursor = index.query(warehouse=f"WH-{i}", limit=10)
+        assert len(page) == total == 0 and cursor is None
+    assert index.query(warehouse='North', status='Missing')[1] == 0
+    assert index._masks == {}
+    index.query(warehouse='North', status='In Stock')
+    assert list(index._masks) == [('North', 'In Stock')]
@@ -0,0 +1,27 @@
+import pytest
+
+import route_optimization
+from route_optimization import RouteOptimizationModel
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = RouteOptimizationModel()
+    # Predicted reference solve time = number of customers
+    monkeypatch.setattr(model, 'predict_solve_time', lambda stats: float(stats['num_customers']))
+    monkeypatch.setattr(route_optimization, 'SEARCH_BUDGET_SCALE', 0.1)
+    monkeypatch.setattr(route_optimization, 'SEARCH_BUDGET_MIN', 0.5)
+    return model
+
+
+def test_one_budget_is_split_across_groups(model):
+    budgets = model.search_budgets([{'num_customers': 30}, {'num_customers': 10}], max_seconds=10)
+    assert budgets == pytest.approx([3.0, 1.0])
+
+
+def test_request_budget_is_capped_and_floored(model):
+    budgets = model.search_budgets([{'num_customers': 600}, {'num_customers': 200}], max_seconds=2)
+    assert sum(budgets) == pytest.approx(2.0)
+    assert budgets == pytest.approx([1.5, 0.5])
+    assert model.search_budgets([{'num_customers': 1}], max_seconds=2) == pytest.approx([0.5])
+    assert model.search_budgets([]) == []
@@ -0,0 +1,177 @@
+import itertools
+import time
+
+import numpy as np
+import pytest
+
+from route_solver import (local_search, multi_start, or_opt, prepare_instance, route_cost, savings_routes,
+                          solve_cvrp, solve_routes, total_cost, two_opt)
+
+
+def random_instance(n, seed, symmetric=True):
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 100, size=(n + 1, 2))
+    dist = np.linalg.norm(points[:, None] - points[None, :], axis=2)
+    if not symmetric:
+        dist = dist * rng.uniform(1.0, 1.5, size=dist.shape)
+        np.fill_diagonal(dist, 0.0)
+    demand = np.concatenate(([0.0], rng.integers(1, 10, size=n).astype(float)))
+    return dist, demand
+
+
+def assert_feasible(routes, demand, capacity):
+    visited = sorted(node for route in routes for node in route)
+    assert visited == list(range(1, len(demand)))
+    for route in routes:
+        assert route
+        assert demand[route].sum() <= capacity + 1e-9
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_savings_routes_visit_every_customer_within_capacity(seed):
+    dist, demand = random_instance(30, seed)
+    routes = savings_routes(dist, demand, capacity=20)
+    assert_feasible(routes, demand, 20)
+    assert len(routes) > 1
+
+
+def test_savings_routes_merge_everything_without_a_capacity_limit():
+    dist, demand = random_instance(15, 0)
+    assert len(savings_routes(dist, demand, capacity=np.inf)) == 1
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_solve_cvrp_is_feasible_and_no_worse_than_savings(seed):
+    dist, demand = random_instance(40, seed, symmetric=seed != 1)
+    routes = solve_cvrp(dist, demand, capacity=25, time_limit=5)
+    assert_feasible(routes, demand, 25)
+    assert total_cost(routes, dist) <= total_cost(savings_routes(dist, demand, 25), dist) + 1e-9
+
+
+@pytest.mark.parametrize('symmetric', [True, False])
+def test_two_opt_leaves_no_improving_reversal(symmetric):
+    dist, _ = random_instance(12, 3, symmetric)
+    start = list(range(1, 13))
+    route, changed = two_opt(start, dist)
+    assert changed
+    assert sorted(route) == start
+    assert route_cost(route, dist) < route_cost(start, dist)
+    # The vectorized deltas are exact: brute force finds nothing left to gain
+    best = route_cost(route, dist)
+    for i, j in itertools.combinations(range(len(route) + 1), 2):
+        candidate = route[:i] + route[i:j][::-1] + route[j:]
+        assert route_cost(candidate, dist) >= best - 1e-9
+
+
+def test_two_opt_skips_short_routes():
+    dist, _ = random_instance(2, 0)
+    assert two_opt([2, 1], dist) == ([2, 1], False)
+
+
+def test_or_opt_moves_a_stop_to_the_cheaper_route():
+    # Customer 3 sits next to customer 1 but starts on customer 2's route
+    dist = np.array([[0, 10, 10, 11],
+                     [10, 0, 20, 1],
+                     [10, 20, 0, 20],
+                     [11, 1, 20, 0]], dtype=float)
+    demand = np.array([0, 1, 1, 1], dtype=float)
+    routes, changed, moved = or_opt([[1], [2, 3]], dist, demand, capacity=2)
+    assert moved
+    assert sorted(map(sorted, routes)) == [[1, 3], [2]]
+    assert total_cost(routes, dist) == pytest.approx(42.0)
+    assert changed == {0, 1}
+
+
+def test_or_opt_respects_capacity():
+    dist = np.array([[0, 10, 10, 11],
+                     [10, 0, 20, 1],
+                     [10, 20, 0, 20],
+                     [11, 1, 20, 0]], dtype=float)
+    demand = np.array([0, 4, 1, 2], dtype=float)
+    routes, changed, moved = or_opt([[1], [2, 3]], dist, demand, capacity=5)
+    assert not moved
+    assert routes == [[1], [2, 3]]
+    assert changed == set()
+
+
+def test_or_opt_drops_emptied_routes():
+    dist = np.array([[0, 10, 10],
+                     [10, 0, 1],
+                     [10, 1, 0]], dtype=float)
+    demand = np.array([0, 1, 1], dtype=float)
+    routes, _, moved = or_opt([[1], [2]], dist, demand, capacity=5)
+    assert moved
+    assert len(routes) == 1 and sorted(routes[0]) == [1, 2]
+
+
+def relocations(routes, max_segment=3):
+    """Every or-opt neighbour of routes (chains moved without reversal)"""
+    for source, route in enumerate(routes):
+        for length in range(1, min(max_segment, len(route)) + 1):
+            for start in range(len(route) - length + 1):
+                segment = route[start:start + length]
+                rest = route[:start] + route[start + length:]
+                for target in range(len(routes)):
+                    base = rest if target == source else routes[target]
+                    for position in range(len(base) + 1):
+                        candidate = [list(r) for r in routes]
+                        candidate[source] = rest
+                        candidate[target] = base[:position] + segment + base[position:]
+                        yield target, [r for r in candidate if r]
+
+
+@pytest.mark.parametrize('symmetric', [True, False])
+def test_local_search_leaves_no_improving_relocation(symmetric):
+    dist, demand = random_instance(14, 5, symmetric)
+    capacity = 20
+    routes = local_search(savings_routes(dist, demand, capacity), dist, demand, capacity, deadline=float('inf'))
+    assert_feasible(routes, demand, capacity)
+    best = total_cost(routes, dist)
+    for _, candidate in relocations(routes):
+        if all(demand[r].sum() <= capacity for r in candidate):
+            assert total_cost(candidate, dist) >= best - 1e-6
+
+
+def test_multi_start_stops_once_restarts_stop_improving():
+    dist, demand = random_instance(20, 2)
+    began = time.perf_counter()
+    cost, routes, starts = multi_start(dist, demand, 25, budget=60, patience=3)
+    assert time.perf_counter() - began < 30
+    assert 4 <= starts < 1000
+    assert_feasible(routes, demand, 25)
+    assert cost == pytest.approx(total_cost(routes, dist))
+    assert cost <= total_cost(solve_cvrp(dist, demand, 25), dist) + 1e-9
+
+
+def test_prepare_instance_rejects_orders_over_capacity(distance_csv):
+    orders = [{'order_id': 'ORD-1', 'destination': 'City_B', 'demand': 600}]
+    with pytest.raises(ValueError, match='ORD-1'):
+        prepare_instance(orders, vehicle_capacity=500, distance_path=distance_csv)
+
+
+@pytest.mark.parametrize('order, problem', [
+    ({'order_id': 'ORD-1', 'address': '123 Main St'}, 'no destination'),
+    ({'order_id': 'ORD-1', 'destination': 'Atlantis'}, 'Atlantis'),
+    ({'order_id': 'ORD-1', 'destination': 'City_B', 'source': 'Atlantis'}, 'Atlantis'),
+])
+def test_prepare_instance_rejects_unknown_cities(distance_csv, order, problem):
+    with pytest.raises(ValueError, match=problem):
+        prepare_instance([order], distance_path=distance_csv)
+
+
+def test_orders_without_a_source_leave_from_the_central_city(distance_csv):
+    instance = prepare_instance([{'destination': 'City_D'}], distance_path=distance_csv)
+    assert [instance['cities'][g['depot']] for g in instance['groups']] == ['City_B']
+
+
+def test_solve_routes_serves_every_order_once_within_capacity(distance_csv):
+    cities = ['City_B', 'City_C', 'City_D', 'City_E']
+    orders = [{'order_id': f"ORD-{i}", 'source': 'City_A', 'destination': cities[i % 4], 'demand': 30 + i}
+              for i in range(12)]
+    result = solve_routes(orders, vehicle_capacity=100, distance_path=distance_csv)
+
+    assert sorted(stop['order_id'] for stop in result['stops']) == sorted(o['order_id'] for o in orders)
+    assert all(route['load'] <= 100 for route in result['routes'])
+    assert sum(route['load'] for route in result['routes']) == sum(o['demand'] for o in orders)
+    assert sum(route['num_stops'] for route in result['routes']) == len(orders)
+    assert result['total_distance_km'] <= result['baseline_distance_km']
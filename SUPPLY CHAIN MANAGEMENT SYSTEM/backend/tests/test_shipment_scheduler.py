@@ -0,0 +1,113 @@
+import pandas as pd
+import pytest
+
+from shipment_scheduler import schedule_shipments
+
+START = pd.Timestamp('2022-04-05 08:00:00')
+
+
+def item(item_id, destination, deadline_minutes, available_minutes=0, weight=1, danger='non_danger', area=0):
+    return {
+        'Item_ID': item_id, 'Order_ID': f"ORD-{item_id}", 'Source': 'City_A', 'Destination': destination,
+        'Available_Time': str(START + pd.Timedelta(minutes=available_minutes)),
+        'Deadline': str(START + pd.Timedelta(minutes=deadline_minutes)),
+        'Danger_Type': danger, 'Weight': weight, 'Area': area
+    }
+
+
+def schedule(items, distance_csv, capacity=100, area_capacity=None):
+    # 60 km/h: one minute per km
+    return schedule_shipments(items, capacity, area_capacity, speed_kmh=60, distance_path=distance_csv)
+
+
+def vehicles_by_item(result):
+    return {stop['item_id']: stop['vehicle_id'] for stop in result['stops']}
+
+
+def assert_within_windows(items, result):
+    by_id = {i['Item_ID']: i for i in items}
+    departures = {d['vehicle_id']: pd.Timestamp(d['departure']) for d in result['departures']}
+    for stop in result['stops']:
+        source = by_id[stop['item_id']]
+        assert departures[stop['vehicle_id']] >= pd.Timestamp(source['Available_Time'])
+        assert pd.Timestamp(stop['eta']) <= pd.Timestamp(source['Deadline'])
+        assert stop['on_time']
+
+
+def test_loose_deadlines_share_one_vehicle(distance_csv):
+    items = [item('1', 'City_B', 600), item('2', 'City_D', 600), item('3', 'City_E', 600)]
+    result = schedule(items, distance_csv)
+    assert result['vehicles_used'] == 1
+    assert result['items_late'] == 0
+    assert_within_windows(items, result)
+
+
+def test_tight_deadlines_open_another_vehicle(distance_csv):
+    # City_B is 10 min away and City_D 40 min (via City_B); a 15 min stop at
+    # City_B would bring City_D in at 55 min
+    items = [item('1', 'City_B', 10), item('2', 'City_D', 40)]
+    result = schedule(items, distance_csv)
+    assert result['vehicles_used'] == 2
+    assert result['items_late'] == 0
+    assert_within_windows(items, result)
+
+    relaxed = schedule([item('1', 'City_B', 10), item('2', 'City_D', 55)], distance_csv)
+    assert relaxed['vehicles_used'] == 1
+    assert relaxed['departures'][0]['route'] == ['City_B', 'City_D']
+
+
+def test_departure_waits_for_available_time(distance_csv):
+    items = [item('1', 'City_B', 600), item('2', 'City_C', 600, available_minutes=90)]
+    result = schedule(items, distance_csv)
+    assert_within_windows(items, result)
+    assert result['vehicles_used'] == 1
+    assert pd.Timestamp(result['departures'][0]['departure']) == START + pd.Timedelta(minutes=90)
+
+
+def test_late_departure_would_break_an_earlier_deadline(distance_csv):
+    # Waiting for item 2 would get item 1 to City_B after its deadline
+    items = [item('1', 'City_B', 30), item('2', 'City_B', 600, available_minutes=60)]
+    result = schedule(items, distance_csv)
+    assert result['vehicles_used'] == 2
+    assert_within_windows(items, result)
+
+
+def test_unreachable_deadline_is_reported_late(distance_csv):
+    items = [item('1', 'City_D', 30), item('2', 'City_B', 600)]
+    result = schedule(items, distance_csv)
+    assert result['items_late'] == 1
+    on_time = {stop['item_id']: stop['on_time'] for stop in result['stops']}
+    assert on_time == {'1': False, '2': True}
+
+
+def test_capacity_and_danger_types_split_vehicles(distance_csv):
+    items = [item('1', 'City_B', 600, weight=60), item('2', 'City_B', 600, weight=60),
+             item('3', 'City_B', 600, weight=1, danger='type_1')]
+    result = schedule(items, distance_csv)
+    vehicles = vehicles_by_item(result)
+    assert len(set(vehicles.values())) == 3
+    assert all(d['weight'] <= 100 for d in result['departures'])
+
+    by_area = schedule([item('1', 'City_B', 600, area=6), item('2', 'City_C', 600, area=6)],
+                       distance_csv, area_capacity=10)
+    assert by_area['vehicles_used'] == 2
+
+
+def test_items_for_one_city_share_a_stop(distance_csv):
+    items = [item('1', 'City_C', 600), item('2', 'City_C', 600), item('3', 'City_E', 600)]
+    result = schedule(items, distance_csv)
+    assert result['vehicles_used'] == 1
+    assert sorted(result['departures'][0]['route']) == ['City_C', 'City_E']
+    assert result['departures'][0]['items'] == 3
+
+
+def test_invalid_items_are_rejected(distance_csv):
+    with pytest.raises(ValueError, match='unknown'):
+        schedule([item('1', 'City_Z', 600)], distance_csv)
+    with pytest.raises(ValueError, match='weight'):
+        schedule([item('1', 'City_B', 600, weight=101)], distance_csv)
+
+
+def test_no_items(distance_csv):
+    result = schedule([], distance_csv)
+    assert result['vehicles_used'] == 0 and result['stops'] == []
@@ -0,0 +1,200 @@
+"""
+Training orchestrator for the ML models
+Trains every model at the same time, each in its own worker process with its
+own share of the CPU cores, and reports wall time and peak memory per model
+
+Usage (from backend/):
+    python train_all.py [--cores 8] [--data-dir "../DATA SETS"] [--models-dir models] [--report report.json] [model ...]
+
+Each job gets one core, and the remaining cores go to the multi-threaded
+trainers in proportion to the size of their dataset. Jobs whose dataset
+is missing are skipped. The exit status is non-zero if any job failed.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import traceback
+from collections import namedtuple
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BACKEND_DIR, 'models')
+DATA_DIR = os.path.join(BACKEND_DIR, '..', 'DATA SETS')
+
+# Cores shared out between the training jobs
+TRAIN_CORES = int(os.environ.get("TRAIN_CORES", str(os.cpu_count() or 1)))
+
+# Thread pools that size themselves from the environment when numpy/xgboost load
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+# threaded: whether train() can use more than one core; artifact: legacy single-file name
+TrainingJob = namedtuple('TrainingJob', ['name', 'module', 'class_name', 'data_file', 'artifact', 'threaded'])
+
+TRAINING_JOBS = [
+    TrainingJob('demand_forecast', 'demand_forecast', 'DemandForecastModel',
+                'inventory_forecast.csv', 'demand_forecast_model.pkl', True),
+    TrainingJob('supplier_scoring', 'supplier_scoring', 'SupplierScoringModel',
+                'supply_chain_master.csv', 'supplier_scoring_model.pkl', True),
+    TrainingJob('route_optimization', 'route_optimization', 'RouteOptimizationModel',
+                'vehicle_routing.csv', 'route_optimization_model.pkl', False),
+    TrainingJob('retail_demand', 'retail_demand_prediction', 'RetailDemandModel',
+                'retail_demand.csv', 'retail_demand_model.pkl', True),
+    TrainingJob('supplychain_demand', 'supplychain_demand_forecast', 'SupplyChainDemandModel',
+                'supplychain_demand.csv', 'supplychain_demand_model.pkl', True),
+    TrainingJob('walmart_sales', 'walmart_sales_forecast', 'WalmartSalesForecastModel',
+                'walmart_sales.csv', 'walmart_sales_model.pkl', True)
+]
+
+# Job outcomes
+TRAINED = "trained"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+def allocate_cores(jobs, sizes, cores):
+    """Threads per job name: one core each, spare cores split by data size among threaded jobs"""
+    threads = {job.name: 1 for job in jobs}
+    weights = {job.name: max(sizes.get(job.name, 0), 1) for job in jobs if job.threaded}
+    spare = cores - len(jobs)
+    if spare <= 0 or not weights:
+        return threads
+
+    total = sum(weights.values())
+    shares = {name: spare * weight / total for name, weight in weights.items()}
+    for name, share in shares.items():
+        threads[name] += int(share)
+    # Cores left over from rounding down go to the largest fractional shares
+    left = spare - sum(int(share) for share in shares.values())
+    for name in sorted(shares, key=lambda name: int(shares[name]) - shares[name])[:left]:
+        threads[name] += 1
+    return threads
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_job(job, data_path, artifact_path, threads):
+    """Train and save one model in this (fresh) worker process; returns its report"""
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    if MODELS_DIR not in sys.path:
+        sys.path.insert(0, MODELS_DIR)
+
+    output = io.StringIO()
+    error = None
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            model_class = getattr(importlib.import_module(job.module), job.class_name)
+            model = model_class(n_jobs=threads)
+            model.train(data_path)
+            model.save(artifact_path)
+        except Exception:
+            error = traceback.format_exc()
+    return {
+        'model': job.name,
+        'status': FAILED if error else TRAINED,
+        'threads': threads,
+        'wall_seconds': round(time.perf_counter() - start, 3),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'artifact': artifact_path,
+        'error': error,
+        'output': output.getvalue()
+    }
+
+
+def _run_job(args):
+    return run_job(*args)
+
+
+def train_all(jobs=TRAINING_JOBS, data_dir=DATA_DIR, models_dir=MODELS_DIR, cores=TRAIN_CORES):
+    """Train the jobs concurrently; returns one report per job, in finishing order"""
+    reports = []
+    runnable, sizes = [], {}
+    for job in jobs:
+        data_path = os.path.join(data_dir, job.data_file)
+        if not os.path.exists(data_path):
+            reports.append({'model': job.name, 'status': SKIPPED, 'threads': 0, 'wall_seconds': 0.0,
+                            'peak_rss_mb': None, 'artifact': None,
+                            'error': f"{job.data_file} not found in {data_dir}", 'output': ''})
+            continue
+        runnable.append(job)
+        sizes[job.name] = os.path.getsize(data_path)
+    if not runnable:
+        return reports
+
+    threads = allocate_cores(runnable, sizes, cores)
+    # Each model is saved as a new version of its artifact directory (see models/artifacts.py)
+    tasks = [(job, os.path.join(data_dir, job.data_file), os.path.join(models_dir, job.name), threads[job.name])
+             for job in runnable]
+    # Spawned workers import numpy/xgboost after their thread limits are set, and one
+    # task per worker keeps each job's peak RSS its own
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes=len(tasks), maxtasksperchild=1) as pool:
+        for report in pool.imap_unordered(_run_job, tasks):
+            _print_job(report)
+            reports.append(report)
+    return reports
+
+
+def _print_job(report):
+    print(f"=== {report['model']} ({report['status']}, {report['threads']} threads, "
+          f"{report['wall_seconds']:.1f}s) ===")
+    print(report['output'].rstrip() or "(no output)")
+    if report['error']:
+        print(report['error'].rstrip())
+    print("")
+
+
+def print_summary(reports, wall_seconds):
+    print(f"{'model':<20} {'status':<8} {'threads':>7} {'wall s':>8} {'peak RSS MB':>12}")
+    for report in sorted(reports, key=lambda report: report['model']):
+        peak = f"{report['peak_rss_mb']:.1f}" if report['peak_rss_mb'] is not None else "-"
+        print(f"{report['model']:<20} {report['status']:<8} {report['threads']:>7} "
+              f"{report['wall_seconds']:>8.1f} {peak:>12}")
+    print(f"Total wall time: {wall_seconds:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train all ML models in parallel")
+    parser.add_argument('models', nargs='*', help="models to train (default: all)")
+    parser.add_argument('--cores', type=int, default=TRAIN_CORES)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--report', help="also write the per-model report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    names = {job.name for job in TRAINING_JOBS}
+    unknown = sorted(set(args.models) - names)
+    if unknown:
+        parser.error(f"unknown model(s): {', '.join(unknown)}; choose from {', '.join(sorted(names))}")
+    jobs = [job for job in TRAINING_JOBS if not args.models or job.name in args.models]
+
+    start = time.perf_counter()
+    reports = train_all(jobs, args.data_dir, args.models_dir, max(1, args.cores))
+    wall_seconds = time.perf_counter() - start
+    for report in reports:
+        if report['status'] == SKIPPED:
+            print(f"Skipped {report['model']}: {report['error']}")
+    print_summary(reports, wall_seconds)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'wall_seconds': round(wall_seconds, 3), 'cores': args.cores,
+                       'models': [{k: v for k, v in report.items() if k != 'output'} for report in reports]},
+                      f, indent=2)
+    return 1 if any(report['status'] == FAILED for report in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,11 +12,11 @@ export default function Logistics() {
     const [optimizing, setOptimizing] = useState(false);
     const [optimized, setOptimized] = useState(false);
 
-    // Sample orders for route optimization
+    // Sample orders for route optimization (destinations are cities in distance.csv)
     const sampleOrders = [
-        { order_id: '8821', address: '123 Main St', priority: 'high' },
-        { order_id: '8822', address: '456 Oak Ave', priority: 'medium' },
-        { order_id: '8823', address: '789 Elm Rd', priority: 'low' }
+        { order_id: '8821', address: '123 Main St', destination: 'City_24', priority: 'high' },
+        { order_id: '8822', address: '456 Oak Ave', destination: 'City_31', priority: 'medium' },
+        { order_id: '8823', address: '789 Elm Rd', destination: 'City_47', priority: 'low' }
     ];
 
     const { data: routeDataRaw, loading, refetch } = useRouteOptimization(sampleOrders);